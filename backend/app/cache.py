@@ -0,0 +1,219 @@
+"""
+Caché en proceso de listados de personajes (read-through, TTL + LRU) y revisiones
+para ETags. Las rutas de escritura invalidan solo las dimensiones afectadas; el resto
+sigue caliente. Cada worker tiene su propia caché: el TTL acota lo desactualizada que
+puede quedar (y cuánto se revalida un ETag) respecto a escrituras hechas en otros
+workers; con change streams las escrituras de otros workers también invalidan (ver
+services/change_feed.py).
+"""
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIST_CACHE_TTL_SECONDS = 5.0
+DEFAULT_LIST_CACHE_MAX_ENTRIES = 256
+DEFAULT_CHARACTER_CACHE_TTL_SECONDS = 30.0
+DEFAULT_CHARACTER_CACHE_MAX_ENTRIES = 1024
+
+
+class TTLCache:
+    """
+    Caché LRU acotada con expiración por entrada y contadores de aciertos/fallos.
+    Pensada para el bucle de asyncio (un solo hilo): no usa locks.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        # Se incrementa en cada invalidación: un valor leído de la base de datos antes
+        # de una invalidación no se guarda (evita cachear datos ya obsoletos).
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Devuelve el valor si existe y no ha expirado; cuenta acierto o fallo."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self._clock():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, epoch: Optional[int] = None) -> None:
+        """Guarda un valor; si se indica `epoch` y hubo invalidaciones desde entonces, lo descarta."""
+        if not self.enabled or (epoch is not None and epoch != self.epoch):
+            return
+        self._entries[key] = (self._clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Elimina las entradas cuya clave cumple `predicate`; devuelve cuántas."""
+        self.epoch += 1
+        keys = [key for key in self._entries if predicate(key)]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def discard(self, keys: Iterable[Hashable]) -> int:
+        """Elimina las claves indicadas (sin recorrer la caché); devuelve cuántas había."""
+        self.epoch += 1
+        removed = 0
+        for key in keys:
+            if self._entries.pop(key, None) is not None:
+                removed += 1
+        return removed
+
+    def clear(self) -> None:
+        self.epoch += 1
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+
+def _float_from_env(var: str, default: float) -> float:
+    try:
+        return float(os.getenv(var, default))
+    except ValueError:
+        logger.warning("Valor inválido en %s, se usa %s", var, default)
+        return default
+
+
+class RevisionTracker:
+    """
+    Revisiones monótonas por dimensión para ETags: cada escritura asigna a las dimensiones
+    afectadas el siguiente número de secuencia. La revisión global (listados sin filtro)
+    es la propia secuencia, que avanza con cualquier escritura.
+
+    Con `ttl_seconds` (y `expires` activo) una revisión que no ha cambiado en ese tiempo
+    avanza al leerla: las escrituras de otros workers no llegan a este sin change streams,
+    y así un ETag no se revalida más allá del TTL de la caché de listados.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.expires = ttl_seconds is not None
+        self._clock = clock
+        self._sequence = 0
+        self._floor = 0
+        self._by_dimension: dict[str, int] = {}
+        # Momento en que se asignó la revisión actual (None = global)
+        self._assigned_at: dict[Optional[str], float] = {}
+
+    def bump(self, dimensions: Iterable[str] = ()) -> None:
+        self._sequence += 1
+        now = self._clock()
+        self._assigned_at[None] = now
+        for dimension in dimensions:
+            self._by_dimension[dimension] = self._sequence
+            self._assigned_at[dimension] = now
+
+    def bump_all(self) -> None:
+        """Invalida todas las dimensiones (escrituras de alcance desconocido)."""
+        self._sequence += 1
+        self._floor = self._sequence
+        self._by_dimension.clear()
+        self._assigned_at = {None: self._clock()}
+
+    def revision(self, dimension: Optional[str] = None) -> int:
+        if self.expires and self.ttl_seconds is not None:
+            now = self._clock()
+            assigned_at = self._assigned_at.setdefault(dimension, now)
+            if now - assigned_at >= self.ttl_seconds:
+                self.bump([dimension] if dimension is not None else ())
+        if dimension is None:
+            return self._sequence
+        return max(self._by_dimension.get(dimension, 0), self._floor)
+
+
+# Claves: (dimension | None, limit, after | None, fields | None). Dimensión None = sin filtro.
+character_list_cache = TTLCache(
+    max_entries=int(_float_from_env("LIST_CACHE_MAX_ENTRIES", DEFAULT_LIST_CACHE_MAX_ENTRIES)),
+    ttl_seconds=_float_from_env("LIST_CACHE_TTL_SECONDS", DEFAULT_LIST_CACHE_TTL_SECONDS),
+)
+
+# Claves: ObjectId del personaje. Valores: JSON ya serializado de GET /api/characters/{id}.
+character_cache = TTLCache(
+    max_entries=int(
+        _float_from_env("CHARACTER_CACHE_MAX_ENTRIES", DEFAULT_CHARACTER_CACHE_MAX_ENTRIES)
+    ),
+    ttl_seconds=_float_from_env("CHARACTER_CACHE_TTL_SECONDS", DEFAULT_CHARACTER_CACHE_TTL_SECONDS),
+)
+
+# Revisiones de GET /api/characters (por dimensión) y de GET /api/stones (global).
+# Caducan con el TTL de los listados salvo con change streams (ver set_revision_expiry).
+character_revisions = RevisionTracker(ttl_seconds=character_list_cache.ttl_seconds)
+stone_revisions = RevisionTracker(ttl_seconds=character_list_cache.ttl_seconds)
+
+
+def set_revision_expiry(enabled: bool) -> None:
+    """
+    Activa la caducidad de las revisiones. El feed de eventos la desactiva con change
+    streams: entonces las escrituras de todos los workers avanzan las revisiones de cada uno.
+    """
+    character_revisions.expires = enabled
+    stone_revisions.expires = enabled
+
+
+def invalidate_character_lists(dimensions: Iterable[Optional[str]]) -> None:
+    """
+    Invalida los listados de las dimensiones indicadas y el listado sin filtro
+    (que contiene a todas). Las demás dimensiones conservan su caché.
+    """
+    affected = {d for d in dimensions if d}
+    character_revisions.bump(affected)
+    removed = character_list_cache.invalidate(lambda key: key[0] is None or key[0] in affected)
+    logger.debug("Caché de listados invalidada: dimensiones=%s entradas=%d", affected, removed)
+
+
+def invalidate_all_character_lists() -> None:
+    """Invalida todos los listados (escrituras cuyo alcance no se conoce)."""
+    character_revisions.bump_all()
+    character_list_cache.clear()
+
+
+def invalidate_characters(ids: Iterable[Hashable]) -> None:
+    """Invalida la caché por id de los personajes indicados (ObjectId)."""
+    character_cache.discard(ids)
+
+
+def invalidate_all_characters() -> None:
+    """Invalida toda la caché por id (escrituras cuyos ids no se conocen)."""
+    character_cache.clear()
+
+
+def invalidate_stone_lists() -> None:
+    """Avanza la revisión del listado de piedras (creación o eliminación de piedras)."""
+    stone_revisions.bump()
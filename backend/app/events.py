@@ -0,0 +1,286 @@
+"""
+Bus de eventos en proceso para el feed de cambios en tiempo real (SSE y WebSocket).
+Los eventos llegan de un change stream compartido de MongoDB o, si no hay change
+streams (mongod standalone), se publican desde los manejadores de las rutas.
+Guarda un histórico acotado para que los clientes que reconectan reciban lo perdido.
+Las suscripciones por dimensión se indexan para que cada evento solo recorra a los
+clientes interesados, aunque haya miles conectados.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import secrets
+from collections import deque
+from typing import Iterable, Optional
+
+from app.utils import character_row, stone_row
+
+logger = logging.getLogger(__name__)
+
+# Tipos de evento
+EVENT_CHARACTER_CREATED = "character_created"
+EVENT_CHARACTER_UPDATED = "character_updated"
+EVENT_CHARACTER_MOVED = "character_moved"
+EVENT_CHARACTERS_MOVED = "characters_moved"
+EVENT_CHARACTER_DELETED = "character_deleted"
+EVENT_CHARACTER_STOLEN = "character_stolen"
+EVENT_STONE_CREATED = "stone_created"
+# Enviado a un cliente cuyo último evento ya no está en el histórico: debe recargar
+EVENT_RESYNC = "resync"
+
+# Deltas por dimensión enviados a los suscriptores WebSocket
+DELTA_CREATED = "created"
+DELTA_UPDATED = "updated"
+DELTA_DELETED = "deleted"
+DELTA_MOVED_IN = "moved_in"
+DELTA_MOVED_OUT = "moved_out"
+DELTA_STOLEN = "stolen"
+DELTA_STONE_CREATED = "stone_created"
+
+# Origen de los eventos
+SOURCE_MEMORY = "memory"
+SOURCE_CHANGE_STREAM = "change_stream"
+
+DEFAULT_EVENT_HISTORY_SIZE = 1000
+DEFAULT_EVENT_QUEUE_SIZE = 256
+
+
+def _size_from_env(var: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(var, default)))
+    except ValueError:
+        logger.warning("Valor inválido en %s, se usa %d", var, default)
+        return default
+
+
+class Subscription:
+    """
+    Cola acotada de un cliente conectado. Si el cliente no consume a tiempo se
+    descartan los eventos más antiguos (y se cuentan) en lugar de crecer sin límite.
+    """
+
+    def __init__(self, max_size: int, dimensions: Optional[frozenset[str]] = None) -> None:
+        self._events: deque[dict] = deque(maxlen=max_size)
+        self._ready = asyncio.Event()
+        self.dropped = 0
+        # None = todos los eventos (SSE); si no, solo los que tocan estas dimensiones
+        self.dimensions = dimensions
+
+    def put(self, event: dict) -> None:
+        if len(self._events) == self._events.maxlen:
+            self.dropped += 1
+        self._events.append(event)
+        self._ready.set()
+
+    async def get(self) -> dict:
+        """Espera y devuelve el siguiente evento."""
+        while not self._events:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._events.popleft()
+
+
+class EventBus:
+    """Reparte cada evento a las suscripciones interesadas y lo guarda en el histórico."""
+
+    def __init__(self, history_size: int, queue_size: int) -> None:
+        self.source = SOURCE_MEMORY
+        self.queue_size = queue_size
+        self._history: deque[dict] = deque(maxlen=history_size)
+        self._subscriptions: set[Subscription] = set()
+        self._by_dimension: dict[str, set[Subscription]] = {}
+        self._sequence = itertools.count(1)
+        # Prefijo de los ids del bus en memoria: un Last-Event-ID de otro worker o de antes
+        # de un reinicio no debe coincidir con un evento distinto de este histórico
+        self._boot_id = secrets.token_hex(4)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions) + len(
+            {sub for subs in self._by_dimension.values() for sub in subs}
+        )
+
+    def dispatch(self, event: dict) -> None:
+        """Entrega el evento; si no trae `id` (bus en memoria) se le asigna uno secuencial."""
+        event.setdefault("id", f"{self._boot_id}-{next(self._sequence)}")
+        self._history.append(event)
+        for subscription in self._subscriptions:
+            subscription.put(event)
+        if not self._by_dimension:
+            return
+        if event["type"] == EVENT_RESYNC:
+            targets = {sub for subs in self._by_dimension.values() for sub in subs}
+        else:
+            targets = set()
+            for dimension in _event_dimensions(event):
+                targets.update(self._by_dimension.get(dimension, ()))
+        for subscription in targets:
+            subscription.put(event)
+
+    def subscribe(
+        self,
+        last_event_id: Optional[str] = None,
+        dimensions: Optional[Iterable[str]] = None,
+    ) -> Subscription:
+        """
+        Registra un cliente, opcionalmente solo para `dimensions`. Con `last_event_id`
+        (cabecera Last-Event-ID) se le reenvían los eventos posteriores del histórico,
+        o un evento `resync` si ya no están o el id es de otro proceso.
+        """
+        subscription = Subscription(
+            self.queue_size, frozenset(dimensions) if dimensions is not None else None
+        )
+        if last_event_id:
+            missed = None if self._foreign_id(last_event_id) else self._events_after(last_event_id)
+            if missed is None:
+                subscription.put({"id": last_event_id, "type": EVENT_RESYNC})
+            else:
+                for event in missed:
+                    if _is_relevant(event, subscription.dimensions):
+                        subscription.put(event)
+        self._register(subscription)
+        return subscription
+
+    def set_dimensions(self, subscription: Subscription, dimensions: Iterable[str]) -> None:
+        """Cambia las dimensiones de una suscripción filtrada."""
+        self._unregister(subscription)
+        subscription.dimensions = frozenset(dimensions)
+        self._register(subscription)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._unregister(subscription)
+
+    def _register(self, subscription: Subscription) -> None:
+        if subscription.dimensions is None:
+            self._subscriptions.add(subscription)
+            return
+        for dimension in subscription.dimensions:
+            self._by_dimension.setdefault(dimension, set()).add(subscription)
+
+    def _unregister(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+        for dimension in subscription.dimensions or ():
+            subs = self._by_dimension.get(dimension)
+            if subs is not None:
+                subs.discard(subscription)
+                if not subs:
+                    del self._by_dimension[dimension]
+
+    def _foreign_id(self, event_id: str) -> bool:
+        """Id asignado por el bus en memoria de otro worker o de un arranque anterior."""
+        return self.source == SOURCE_MEMORY and not event_id.startswith(f"{self._boot_id}-")
+
+    def _events_after(self, event_id: str) -> Optional[list[dict]]:
+        for index in range(len(self._history) - 1, -1, -1):
+            if self._history[index]["id"] == event_id:
+                return list(itertools.islice(self._history, index + 1, None))
+        return None
+
+    def reset(self) -> None:
+        """Vacía histórico y suscripciones (tests y cierre)."""
+        self._history.clear()
+        self._subscriptions.clear()
+        self._by_dimension.clear()
+
+
+def _event_dimensions(event: dict) -> tuple:
+    return tuple(d for d in (event.get("from_dimension"), event.get("to_dimension")) if d)
+
+
+def _is_relevant(event: dict, dimensions: Optional[frozenset[str]]) -> bool:
+    if dimensions is None or event["type"] == EVENT_RESYNC:
+        return True
+    return any(d in dimensions for d in _event_dimensions(event))
+
+
+event_bus = EventBus(
+    history_size=_size_from_env("EVENT_HISTORY_SIZE", DEFAULT_EVENT_HISTORY_SIZE),
+    queue_size=_size_from_env("EVENT_QUEUE_SIZE", DEFAULT_EVENT_QUEUE_SIZE),
+)
+
+
+def character_event(
+    event_type: str,
+    doc: Optional[dict] = None,
+    *,
+    character_id: Optional[str] = None,
+    from_dimension: Optional[str] = None,
+    to_dimension: Optional[str] = None,
+) -> dict:
+    """Construye un evento de personaje; `doc` es el documento completo si se conoce."""
+    if doc is not None:
+        character_id = str(doc["_id"])
+        to_dimension = doc.get("current_dimension")
+    return {
+        "type": event_type,
+        "character_id": character_id,
+        "from_dimension": from_dimension,
+        "to_dimension": to_dimension,
+        "character": character_row(doc) if doc is not None else None,
+    }
+
+
+def batch_move_event(from_dimension: str, to_dimension: str, count: int) -> dict:
+    """Evento de un movimiento masivo por dimensión de origen (sin IDs individuales)."""
+    return {
+        "type": EVENT_CHARACTERS_MOVED,
+        "from_dimension": from_dimension,
+        "to_dimension": to_dimension,
+        "count": count,
+    }
+
+
+def stone_event(doc: dict) -> dict:
+    """Construye el evento de una piedra dimensional nueva."""
+    return {
+        "type": EVENT_STONE_CREATED,
+        "character_id": doc.get("previous_character_id"),
+        "from_dimension": None,
+        "to_dimension": doc.get("dimension"),
+        "stone": stone_row(doc),
+    }
+
+
+def publish(*events: dict) -> None:
+    """
+    Publica eventos desde los manejadores. Con el change stream activo no hace nada:
+    esos cambios ya llegan (también los de otros workers) por el stream.
+    """
+    if event_bus.source != SOURCE_MEMORY:
+        return
+    for event in events:
+        event_bus.dispatch(event)
+
+
+def event_deltas(event: dict, dimensions: frozenset[str]) -> list[dict]:
+    """
+    Traduce un evento a deltas para un suscriptor de `dimensions`: un movimiento entre
+    dos dimensiones es `moved_out` en el origen y `moved_in` en el destino.
+    """
+    event_type = event["type"]
+    source, target = event.get("from_dimension"), event.get("to_dimension")
+    if event_type in (EVENT_CHARACTER_MOVED, EVENT_CHARACTERS_MOVED):
+        pairs = [(DELTA_MOVED_OUT, source), (DELTA_MOVED_IN, target)]
+    elif event_type == EVENT_CHARACTER_STOLEN:
+        pairs = [(DELTA_STOLEN, source), (DELTA_MOVED_IN, target)]
+    elif event_type == EVENT_CHARACTER_CREATED:
+        pairs = [(DELTA_CREATED, target)]
+    elif event_type == EVENT_CHARACTER_UPDATED:
+        pairs = [(DELTA_UPDATED, target)]
+    elif event_type == EVENT_CHARACTER_DELETED:
+        pairs = [(DELTA_DELETED, source)]
+    elif event_type == EVENT_STONE_CREATED:
+        pairs = [(DELTA_STONE_CREATED, target)]
+    else:
+        return []
+    deltas = []
+    for delta_type, dimension in pairs:
+        if dimension not in dimensions:
+            continue
+        delta = {"type": delta_type, "dimension": dimension, "event_id": event["id"]}
+        for key in ("character_id", "character", "stone", "count"):
+            if event.get(key) is not None:
+                delta[key] = event[key]
+        deltas.append(delta)
+    return deltas
@@ -0,0 +1,208 @@
+"""
+Métricas HTTP en formato de texto de Prometheus (GET /metrics): histograma de latencia
+por ruta y del tiempo de cada fase (mongo, conversion, serialization; ver app/timing.py),
+más las métricas de pool y comandos de MongoDB.
+REQUEST_METRICS=on|off activa el middleware (por defecto on); SERVER_TIMING=on|off
+añade además la cabecera Server-Timing a cada respuesta (por defecto off).
+"""
+import os
+from bisect import bisect_left
+from typing import Iterable
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.mongo_monitoring import mongo_stats
+from app.timing import RequestTiming, finish_request_timing, start_request_timing
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Cubos en segundos (los de los clientes oficiales de Prometheus, más 1 ms)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Etiqueta de las peticiones que no casan con ninguna ruta (evita una serie por URL)
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _flag_from_env(var: str, default: str) -> bool:
+    return os.getenv(var, default).strip().lower() in ("on", "true", "1")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Iterable[str], values: Iterable[object]) -> str:
+    pairs = ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+    return "{" + pairs + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    Histograma con etiquetas. Solo lo actualiza el bucle de asyncio (un solo hilo),
+    así que no usa locks; guarda cuentas por cubo y las acumula al exportar.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple[str, ...],
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        # labels -> [cuentas por cubo (+Inf al final), suma, total]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, labels: tuple) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def reset(self) -> None:
+        self._series.clear()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        bucket_names = (*self.label_names, "le")
+        bounds = [_number(b) for b in self.buckets] + ["+Inf"]
+        for labels, (counts, total, observations) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                lines.append(
+                    f"{self.name}_bucket{_labels(bucket_names, (*labels, bound))} {cumulative}"
+                )
+            label_text = _labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_number(total)}")
+            lines.append(f"{self.name}_count{label_text} {observations}")
+        return lines
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Latencia de las peticiones HTTP por ruta (hasta enviar el último byte).",
+    ("method", "route", "status"),
+)
+request_phase_duration = Histogram(
+    "http_request_phase_seconds",
+    "Tiempo de cada petición en comandos de MongoDB, conversión de documentos y serialización.",
+    ("method", "route", "phase"),
+)
+
+
+def _route_label(scope: Scope) -> str:
+    """Plantilla de la ruta (p. ej. /api/characters/{id}), no la URL concreta."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+def server_timing_header(timing: RequestTiming) -> str:
+    """Cabecera Server-Timing: cada fase y `app` (el resto del tiempo hasta la respuesta)."""
+    total = timing.elapsed()
+    parts = [f"{phase};dur={seconds * 1000:.3f}" for phase, seconds in timing.phases.items()]
+    parts.append(f"app;dur={max(0.0, total - sum(timing.phases.values())) * 1000:.3f}")
+    parts.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(parts)
+
+
+def observe_request(scope: Scope, status: int, timing: RequestTiming) -> None:
+    method = scope["method"]
+    route = _route_label(scope)
+    request_duration.observe((method, route, str(status)), timing.elapsed())
+    for phase, seconds in timing.phases.items():
+        request_phase_duration.observe((method, route, phase), seconds)
+
+
+class RequestMetricsMiddleware:
+    """
+    Middleware ASGI (sin BaseHTTPMiddleware, para no añadir una tarea por petición):
+    abre el RequestTiming de la petición, añade Server-Timing si está activo y registra
+    los histogramas al terminar de enviar la respuesta (incluidas las de streaming).
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = False) -> None:
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timing, token = start_request_timing()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    MutableHeaders(scope=message).append("Server-Timing", server_timing_header(timing))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            observe_request(scope, status, timing)
+            finish_request_timing(token)
+
+
+def request_metrics_enabled() -> bool:
+    return _flag_from_env("REQUEST_METRICS", "on")
+
+
+def server_timing_enabled() -> bool:
+    return _flag_from_env("SERVER_TIMING", "off")
+
+
+def _mongo_lines() -> list[str]:
+    stats = mongo_stats()
+    pool_metrics = (
+        ("mongodb_pool_connections", "gauge", "size", "Conexiones abiertas en el pool."),
+        ("mongodb_pool_connections_in_use", "gauge", "in_use", "Conexiones en uso."),
+        ("mongodb_pool_checkouts_total", "counter", "checkouts", "Conexiones obtenidas del pool."),
+        ("mongodb_pool_checkout_failures_total", "counter", "checkout_failures", "Checkouts fallidos."),
+        (
+            "mongodb_pool_checkout_wait_seconds_total",
+            "counter",
+            "checkout_wait_seconds_total",
+            "Tiempo total esperando una conexión del pool.",
+        ),
+    )
+    command_metrics = (
+        ("mongodb_commands_total", "counter", "count", "Comandos de MongoDB ejecutados."),
+        ("mongodb_command_failures_total", "counter", "failures", "Comandos de MongoDB fallidos."),
+        ("mongodb_command_seconds_total", "counter", "seconds_total", "Tiempo total en comandos de MongoDB."),
+    )
+    lines: list[str] = []
+    for group, label, metrics in (("pools", "address", pool_metrics), ("commands", "command", command_metrics)):
+        for name, kind, key, documentation in metrics:
+            lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+            for value, values in sorted(stats[group].items()):
+                lines.append(f"{name}{_labels((label,), (value,))} {_number(values[key])}")
+    return lines
+
+
+def render_metrics() -> str:
+    """Todas las métricas en formato de texto de Prometheus."""
+    lines = request_duration.render() + request_phase_duration.render() + _mongo_lines()
+    return "\n".join(lines) + "\n"
+
+
+def reset_request_metrics() -> None:
+    request_duration.reset()
+    request_phase_duration.reset()
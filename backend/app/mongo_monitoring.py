@@ -0,0 +1,133 @@
+"""
+Métricas del pool de conexiones y de los comandos de MongoDB (listeners de pymongo).
+Sirven para dimensionar el pool: espera al obtener una conexión, conexiones abiertas
+y en uso, y tiempo por comando (que también se suma a la fase "mongo" de la petición en curso,
+ver app/timing.py). Pymongo llama a los listeners desde varios hilos.
+"""
+import threading
+from collections import defaultdict
+from typing import Any
+
+from pymongo import monitoring
+
+from app.timing import PHASE_MONGO, record_phase
+
+
+def _address(address: Any) -> str:
+    host, port = address
+    return f"{host}:{port}"
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Conexiones abiertas y en uso por servidor, y tiempo de espera al hacer checkout."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pools: dict[str, dict[str, float]] = defaultdict(self._empty_pool)
+
+    @staticmethod
+    def _empty_pool() -> dict[str, float]:
+        return {
+            "size": 0,
+            "in_use": 0,
+            "checkouts": 0,
+            "checkout_failures": 0,
+            "checkout_wait_seconds_total": 0.0,
+            "checkout_wait_seconds_max": 0.0,
+        }
+
+    def _update(self, address: Any, **deltas: float) -> None:
+        with self._lock:
+            pool = self._pools[_address(address)]
+            for key, delta in deltas.items():
+                pool[key] += delta
+
+    def _record_wait(self, address: Any, duration: float, failed: bool) -> None:
+        with self._lock:
+            pool = self._pools[_address(address)]
+            pool["checkout_failures" if failed else "checkouts"] += 1
+            pool["checkout_wait_seconds_total"] += duration
+            pool["checkout_wait_seconds_max"] = max(pool["checkout_wait_seconds_max"], duration)
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        with self._lock:
+            self._pools[_address(event.address)]
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        pass
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        with self._lock:
+            self._pools.pop(_address(event.address), None)
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        self._update(event.address, size=1)
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        pass
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        self._update(event.address, size=-1)
+
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent) -> None:
+        pass
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        self._record_wait(event.address, event.duration, failed=True)
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        self._record_wait(event.address, event.duration, failed=False)
+        self._update(event.address, in_use=1)
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        self._update(event.address, in_use=-1)
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {address: dict(pool) for address, pool in self._pools.items()}
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Número de comandos, fallos y tiempo acumulado por nombre de comando."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._commands: dict[str, dict[str, float]] = defaultdict(
+            lambda: {"count": 0, "failures": 0, "seconds_total": 0.0, "seconds_max": 0.0}
+        )
+
+    def _record(self, name: str, duration_micros: int, failed: bool) -> None:
+        seconds = duration_micros / 1_000_000
+        record_phase(PHASE_MONGO, seconds)
+        with self._lock:
+            command = self._commands[name]
+            command["count"] += 1
+            if failed:
+                command["failures"] += 1
+            command["seconds_total"] += seconds
+            command["seconds_max"] = max(command["seconds_max"], seconds)
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._record(event.command_name, event.duration_micros, failed=False)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._record(event.command_name, event.duration_micros, failed=True)
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._commands.items()}
+
+
+pool_metrics = PoolMetrics()
+command_metrics = CommandMetrics()
+
+
+def mongo_stats() -> dict[str, Any]:
+    """Instantánea de las métricas de pool y comandos."""
+    return {"pools": pool_metrics.snapshot(), "commands": command_metrics.snapshot()}
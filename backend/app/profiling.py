@@ -0,0 +1,244 @@
+"""
+Perfilado por muestreo opcional (PROFILING=on, desactivado por defecto).
+Se perfila una fracción de las peticiones (PROFILING_SAMPLE_RATE) y las que lleven la
+cabecera X-Profile: 1. Mientras haya alguna perfilada en curso, un hilo toma cada
+PROFILING_INTERVAL_MS la pila del hilo del bucle de eventos y la guarda solo si la tarea
+que está corriendo es la de una petición perfilada, desde el handler de app/routes hasta
+la hoja (app/services, Motor, Pydantic...). Las pilas se agregan por handler en formato
+"collapsed" (flamegraph.pl, speedscope, inferno) y se escriben en PROFILING_DIR cada
+PROFILING_FLUSH_SECONDS, al apagar y desde POST /admin/profiling/flush.
+Sin peticiones perfiladas el hilo está dormido.
+
+Limitaciones: mide tiempo de CPU en el bucle; el tiempo esperando a MongoDB (await) no
+aparece (ver las fases de /metrics y Server-Timing). Tampoco se muestrean los handlers
+síncronos (threadpool) ni las tareas hijas que lance la petición.
+"""
+import asyncio
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+
+DEFAULT_SAMPLE_RATE = 0.01
+DEFAULT_INTERVAL_MS = 5.0
+DEFAULT_FLUSH_SECONDS = 60.0
+DEFAULT_PROFILING_DIR = "profiles"
+# Módulos cuyas funciones son handlers de rutas (raíz de cada pila)
+HANDLER_MODULES = ("app.routes.",)
+# Profundidad máxima de pila que se recorre desde la hoja
+MAX_STACK_DEPTH = 128
+
+
+def _frame_label(frame: FrameType) -> tuple[str, str]:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return module, f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _handler_filename(handler: str) -> str:
+    """"app.routes.characters:list_characters" -> "characters.list_characters.collapsed"."""
+    for prefix in HANDLER_MODULES:
+        handler = handler.removeprefix(prefix)
+    return re.sub(r"[^A-Za-z0-9_.]+", ".", handler).strip(".") + ".collapsed"
+
+
+class Profiler:
+    """Muestreador de pilas agregadas por handler; el hilo se arranca con la primera petición."""
+
+    def __init__(
+        self,
+        output_dir: str,
+        sample_rate: float = DEFAULT_SAMPLE_RATE,
+        interval_seconds: float = DEFAULT_INTERVAL_MS / 1000,
+        flush_seconds: float = DEFAULT_FLUSH_SECONDS,
+    ) -> None:
+        self.output_dir = output_dir
+        # Modificable en caliente desde PUT /admin/profiling
+        self.sample_rate = sample_rate
+        self.interval_seconds = interval_seconds
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        # Tareas de las peticiones perfiladas en curso (el hilo solo muestrea si hay alguna)
+        self._tasks: set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self.profiled_requests = 0
+        self._stacks: dict[str, Counter] = {}
+        self._dirty = False
+
+    def begin(self, task: asyncio.Task) -> None:
+        """Empieza a perfilar la petición que corre en `task` (llamado desde el bucle)."""
+        with self._lock:
+            self._tasks.add(task)
+            self._loop = task.get_loop()
+            self._loop_thread = threading.get_ident()
+            self.profiled_requests += 1
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self._thread.start()
+        self._wakeup.set()
+
+    def end(self, task: asyncio.Task) -> None:
+        with self._lock:
+            self._tasks.discard(task)
+
+    def _sample(self) -> None:
+        """
+        Toma la pila del bucle si la tarea en curso es de una petición perfilada. La tarea se
+        lee antes y después de la pila: si el bucle cambió de tarea entremedias se descarta.
+        """
+        with self._lock:
+            loop, loop_thread, tasks = self._loop, self._loop_thread, set(self._tasks)
+        if loop is None:
+            return
+        task = asyncio.current_task(loop)
+        if task is None or task not in tasks:
+            return
+        frame = sys._current_frames().get(loop_thread)
+        if frame is None or asyncio.current_task(loop) is not task:
+            return
+        labels: list[str] = []
+        handler_depth = None
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            module, label = _frame_label(frame)
+            labels.append(label)
+            if module.startswith(HANDLER_MODULES):
+                # El más cercano a la raíz es el handler (los helpers de la ruta cuelgan de él)
+                handler_depth = len(labels)
+            frame = frame.f_back
+        if handler_depth is None:
+            return
+        stack = labels[:handler_depth]
+        with self._lock:
+            self._stacks.setdefault(stack[-1], Counter())[";".join(reversed(stack))] += 1
+            self._dirty = True
+
+    def _run(self) -> None:
+        last_flush = time.monotonic()
+        while not self._stopped:
+            with self._lock:
+                idle = not self._tasks
+                if idle:
+                    self._wakeup.clear()
+            if idle:
+                self._wakeup.wait(self.flush_seconds)
+            else:
+                self._sample()
+                time.sleep(self.interval_seconds)
+            if self._dirty and time.monotonic() - last_flush >= self.flush_seconds:
+                self.flush()
+                last_flush = time.monotonic()
+
+    def flush(self) -> list[str]:
+        """Escribe un fichero collapsed por handler (reemplaza al anterior); devuelve las rutas."""
+        with self._lock:
+            stacks = {handler: dict(counter) for handler, counter in self._stacks.items()}
+            self._dirty = False
+        os.makedirs(self.output_dir, exist_ok=True)
+        paths = []
+        for handler, counter in stacks.items():
+            path = os.path.join(self.output_dir, _handler_filename(handler))
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for stack, count in sorted(counter.items()):
+                    f.write(f"{stack} {count}\n")
+            os.replace(tmp, path)
+            paths.append(path)
+        return paths
+
+    def samples(self) -> dict[str, int]:
+        """Muestras tomadas por handler."""
+        with self._lock:
+            return {handler: sum(counter.values()) for handler, counter in self._stacks.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stacks.clear()
+            self.profiled_requests = 0
+            self._dirty = False
+
+    def stop(self) -> None:
+        """Detiene el hilo y vuelca lo pendiente."""
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        self._stopped = False
+        try:
+            self.flush()
+        except OSError as e:
+            logger.warning("No se pudieron escribir los perfiles en %s: %s", self.output_dir, e)
+
+
+class ProfilingMiddleware:
+    """Decide qué peticiones se perfilan y avisa al Profiler al empezar y terminar."""
+
+    def __init__(self, app: ASGIApp, profiler: Profiler) -> None:
+        self.app = app
+        self.profiler = profiler
+
+    def _wants_profile(self, scope: Scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return value.strip().lower() in (b"1", b"true", b"on")
+        return random.random() < self.profiler.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        task = asyncio.current_task()
+        self.profiler.begin(task)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.end(task)
+
+
+def _float_from_env(var: str, default: float) -> float:
+    try:
+        return float(os.getenv(var, default))
+    except ValueError:
+        logger.warning("Valor inválido en %s, se usa %s", var, default)
+        return default
+
+
+def profiling_enabled() -> bool:
+    return os.getenv("PROFILING", "off").strip().lower() in ("on", "true", "1")
+
+
+def profiler_from_env() -> Optional[Profiler]:
+    """Profiler configurado por entorno, o None si PROFILING no está activo."""
+    if not profiling_enabled():
+        return None
+    profiler = Profiler(
+        output_dir=os.getenv("PROFILING_DIR", DEFAULT_PROFILING_DIR),
+        sample_rate=min(1.0, max(0.0, _float_from_env("PROFILING_SAMPLE_RATE", DEFAULT_SAMPLE_RATE))),
+        interval_seconds=max(0.001, _float_from_env("PROFILING_INTERVAL_MS", DEFAULT_INTERVAL_MS) / 1000),
+        flush_seconds=max(1.0, _float_from_env("PROFILING_FLUSH_SECONDS", DEFAULT_FLUSH_SECONDS)),
+    )
+    logger.info(
+        "Perfilado activo: %.1f%% de las peticiones (y X-Profile: 1) -> %s",
+        profiler.sample_rate * 100,
+        profiler.output_dir,
+    )
+    return profiler
+
+
+profiler = profiler_from_env()
@@ -0,0 +1,141 @@
+"""
+Verificación de planes de consulta: ejecuta explain() sobre las formas de consulta
+calientes de las rutas y servicios y detecta las que caen en COLLSCAN.
+Las formas replican los filtros y órdenes que usan app/routes y app/services.
+"""
+import logging
+from datetime import datetime
+from typing import Any
+
+from bson import ObjectId
+
+from app.database import COLLECTION_CHARACTERS, COLLECTION_STONES, RANDOM_KEY_FIELD, get_database
+from app.services.rick_prime_service import (
+    DOC_TYPE_DIMENSIONAL_STONE,
+    RICK_PRIME_DIMENSION,
+    character_filter,
+    legacy_stones_in_characters,
+    random_key_query,
+)
+
+logger = logging.getLogger(__name__)
+
+# Valores representativos para las consultas de ejemplo
+_SAMPLE_DIMENSION = "C-137"
+_SAMPLE_NAME = "Rick Sanchez"
+_PAGE_SORT = {"name": 1, "_id": 1}
+
+
+def hot_queries() -> dict[str, dict]:
+    """Comandos (find/aggregate) de cada consulta caliente, listos para envolver en explain."""
+    movable = {**character_filter(), "current_dimension": {"$ne": RICK_PRIME_DIMENSION}}
+    queries: dict[str, dict] = {
+        "list_characters": {
+            "find": COLLECTION_CHARACTERS,
+            "filter": character_filter(),
+            "sort": _PAGE_SORT,
+            "limit": 1001,
+        },
+        "list_characters_by_dimension": {
+            "find": COLLECTION_CHARACTERS,
+            "filter": {**character_filter(), "current_dimension": _SAMPLE_DIMENSION},
+            "sort": _PAGE_SORT,
+            "limit": 1001,
+        },
+        "list_characters_after_cursor": {
+            "find": COLLECTION_CHARACTERS,
+            "filter": {
+                **character_filter(),
+                "current_dimension": _SAMPLE_DIMENSION,
+                "$or": [
+                    {"name": {"$gt": _SAMPLE_NAME}},
+                    {"name": _SAMPLE_NAME, "_id": {"$gt": ObjectId()}},
+                ],
+            },
+            "sort": _PAGE_SORT,
+            "limit": 1001,
+        },
+        "move_character": {
+            "find": COLLECTION_CHARACTERS,
+            "filter": {"_id": ObjectId(), **movable},
+        },
+        "batch_move_by_source": {
+            "find": COLLECTION_CHARACTERS,
+            "filter": {**character_filter(), "current_dimension": _SAMPLE_DIMENSION},
+        },
+        "select_random_character": {
+            "find": COLLECTION_CHARACTERS,
+            "filter": random_key_query(0.5),
+            "sort": {RANDOM_KEY_FIELD: 1},
+            "limit": 1,
+        },
+        "list_stones": {
+            "find": COLLECTION_STONES,
+            "filter": {},
+            "sort": {"dimension": 1},
+            "limit": 1000,
+        },
+        "reconcile_orphan_stones": {
+            "find": COLLECTION_STONES,
+            "filter": {"type": DOC_TYPE_DIMENSIONAL_STONE, "created_at": {"$lt": datetime.utcnow()}},
+        },
+        "export_characters": {
+            "find": COLLECTION_CHARACTERS,
+            "filter": {},
+            "sort": {"_id": 1},
+        },
+    }
+    if legacy_stones_in_characters():
+        queries["list_legacy_stones"] = {
+            "find": COLLECTION_CHARACTERS,
+            "filter": {"type": DOC_TYPE_DIMENSIONAL_STONE},
+            "sort": {"dimension": 1},
+            "limit": 1000,
+        }
+    return queries
+
+
+def winning_plan_stages(explain: Any) -> list[str]:
+    """Devuelve las etapas (`stage`) de todos los winningPlan de una salida de explain."""
+    stages: list[str] = []
+
+    def walk_plan(node: Any) -> None:
+        if isinstance(node, dict):
+            if "stage" in node:
+                stages.append(node["stage"])
+            for value in node.values():
+                walk_plan(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk_plan(item)
+
+    def find_winning(node: Any) -> None:
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == "winningPlan":
+                    walk_plan(value)
+                elif key != "rejectedPlans":
+                    find_winning(value)
+        elif isinstance(node, list):
+            for item in node:
+                find_winning(item)
+
+    find_winning(explain)
+    return stages
+
+
+async def explain_hot_queries() -> dict[str, list[str]]:
+    """Ejecuta explain (queryPlanner) sobre cada consulta caliente; devuelve sus etapas."""
+    db = get_database()
+    plans: dict[str, list[str]] = {}
+    for name, command in hot_queries().items():
+        explain = await db.command({"explain": command, "verbosity": "queryPlanner"})
+        plans[name] = winning_plan_stages(explain)
+        logger.debug("Plan de %s: %s", name, plans[name])
+    return plans
+
+
+async def find_collscans() -> list[str]:
+    """Nombres de las consultas calientes cuyo plan ganador incluye un COLLSCAN."""
+    plans = await explain_hot_queries()
+    return [name for name, stages in plans.items() if "COLLSCAN" in stages]
@@ -2,35 +2,105 @@
 Endpoints REST para personajes (CRUD y move).
 Incluye manejo de errores y logging.
 """
+import json
 import logging
-from typing import Optional
+import os
+from typing import AsyncIterator, Literal, Optional
 
 from bson import ObjectId
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pymongo import ReturnDocument
-from pymongo.errors import PyMongoError
+from pymongo.errors import BulkWriteError, PyMongoError
 
-from app.database import get_characters_collection
+from app.cache import (
+    character_cache,
+    character_list_cache,
+    character_revisions,
+    invalidate_all_characters,
+    invalidate_character_lists,
+    invalidate_characters,
+)
+from app.database import (
+    RANDOM_KEY_FIELD,
+    get_characters_repository,
+    get_stones_repository,
+    transaction_session,
+)
+from app.events import (
+    EVENT_CHARACTER_CREATED,
+    EVENT_CHARACTER_DELETED,
+    EVENT_CHARACTER_MOVED,
+    EVENT_CHARACTER_UPDATED,
+    batch_move_event,
+    character_event,
+    publish,
+)
 from app.schemas import (
+    BatchMoveRequest,
+    BatchMoveResponse,
+    BulkCreateItemResult,
+    BulkCreateResponse,
     CharacterCreate,
     CharacterResponse,
     CharacterUpdate,
     MoveCharacterRequest,
 )
+from app.services.counters_service import apply_dimension_deltas, move_deltas
 from app.services.rick_prime_service import (
     DOC_TYPE_DIMENSIONAL_STONE,
     RICK_PRIME_DIMENSION,
+    character_filter,
+    new_random_key,
+    with_random_key,
+)
+from app.storage.base import UpdateManyOp
+from app.timing import PHASE_SERIALIZATION, timed
+from app.utils import (
+    CHARACTER_LIST_PROJECTION,
+    character_list_projection,
+    character_to_json,
+    characters_to_json,
+    decode_cursor,
+    doc_to_character_response,
+    doc_to_stone_response,
+    encode_cursor,
+    etag_headers,
+    etag_matches,
+    make_etag,
+    parse_character_fields,
 )
-from app.utils import doc_to_character_response
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["characters"])
 
+# Paginación por cursor (keyset sobre (name, _id))
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Exportación en streaming: documentos por lote del cursor de Motor
+EXPORT_BATCH_SIZE = 500
 
-def _character_filter() -> dict:
-    """Excluye piedras dimensionales de la lista de personajes."""
-    return {"type": {"$ne": DOC_TYPE_DIMENSIONAL_STONE}}
+# Creación masiva: tamaño de cada insert_many y máximo de elementos por petición
+DEFAULT_BULK_CHUNK_SIZE = int(os.getenv("BULK_INSERT_CHUNK_SIZE", "1000"))
+MAX_BULK_CHUNK_SIZE = 10000
+MAX_BULK_ITEMS = 50000
+
+
+def _movable_filter() -> dict:
+    """Personajes que se pueden mover: no piedras y no trofeos de la bóveda Prime."""
+    return {**character_filter(), "current_dimension": {"$ne": RICK_PRIME_DIMENSION}}
+
+
+def _reject_prime_target(target_dimension: str) -> None:
+    """Solo Rick Prime puede meter personajes en su bóveda."""
+    if target_dimension == RICK_PRIME_DIMENSION:
+        raise HTTPException(
+            status_code=400,
+            detail="Solo Rick Prime puede poner personajes en su bóveda. Usa el botón Rick Prime Attack.",
+        )
 
 
 def _validate_object_id(id: str) -> ObjectId:
@@ -41,6 +111,86 @@ def _validate_object_id(id: str) -> ObjectId:
     return ObjectId(id)
 
 
+def _new_character_document(body: CharacterCreate) -> dict:
+    """
+    Construye el documento a insertar; crear en la bóveda Prime lo marca como robado y,
+    fuera de ella, recibe la clave aleatoria con la que Rick Prime elige víctimas.
+    """
+    doc = body.model_dump()
+    doc["type"] = "character"
+    if doc.get("current_dimension") == RICK_PRIME_DIMENSION:
+        doc["stolen_by_rick_prime"] = True
+    else:
+        doc[RANDOM_KEY_FIELD] = new_random_key()
+    return doc
+
+
+def _list_response(body: bytes, next_cursor: Optional[str], etag: str) -> Response:
+    """Respuesta JSON ya serializada de un listado, con el cursor de la siguiente página."""
+    headers = etag_headers(etag)
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _mark_bulk_failed(item: BulkCreateItemResult, error: str) -> None:
+    """Marca un elemento de la creación masiva como no insertado."""
+    item.ok = False
+    item.id = None
+    item.error = error
+
+
+def _after_cursor_filter(after: str) -> dict:
+    """Filtro keyset: documentos estrictamente posteriores a (name, _id) del cursor."""
+    try:
+        name, oid = decode_cursor(after)
+    except ValueError:
+        logger.warning("Cursor de paginación inválido: %s", after)
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+    return {"$or": [{"name": {"$gt": name}}, {"name": name, "_id": {"$gt": oid}}]}
+
+
+def _export_line(doc: dict) -> Optional[str]:
+    """Serializa un documento (personaje o piedra) como una línea NDJSON con su `type`."""
+    if doc.get("type") == DOC_TYPE_DIMENSIONAL_STONE:
+        resp = doc_to_stone_response(doc)
+    else:
+        resp = doc_to_character_response(doc)
+    if resp is None:
+        return None
+    with timed(PHASE_SERIALIZATION):
+        line = {"type": doc.get("type") or "character", **resp.model_dump(mode="json")}
+        return json.dumps(line, ensure_ascii=False) + "\n"
+
+
+async def _export_ndjson() -> AsyncIterator[bytes]:
+    """Recorre personajes y piedras por lotes y emite un bloque NDJSON por lote."""
+    lines: list[str] = []
+    exported = 0
+    for coll in (get_characters_repository(), get_stones_repository()):
+        cursor = coll.find({}, sort=[("_id", 1)], batch_size=EXPORT_BATCH_SIZE)
+        try:
+            async for doc in cursor:
+                line = _export_line(doc)
+                if line is None:
+                    continue
+                lines.append(line)
+                if len(lines) >= EXPORT_BATCH_SIZE:
+                    exported += len(lines)
+                    yield "".join(lines).encode("utf-8")
+                    lines = []
+        except PyMongoError as e:
+            # La respuesta ya está en curso: solo se puede cortar el stream y registrar el error
+            logger.exception("Error exportando personajes tras %d documentos: %s", exported, e)
+            raise
+        finally:
+            await cursor.close()
+    if lines:
+        exported += len(lines)
+        yield "".join(lines).encode("utf-8")
+    logger.info("Exportación NDJSON completada: %d documentos", exported)
+
+
 # --- Characters CRUD ---
 
 
@@ -50,39 +200,139 @@ async def list_characters(
         default=None,
         description="Filtrar por dimensión actual del personaje",
     ),
-) -> list[CharacterResponse]:
-    """Lista todos los personajes, opcionalmente filtrados por dimensión."""
+    limit: int = Query(
+        default=DEFAULT_PAGE_SIZE,
+        ge=1,
+        le=MAX_PAGE_SIZE,
+        description="Número máximo de personajes por página",
+    ),
+    after: Optional[str] = Query(
+        default=None,
+        description=f"Cursor opaco devuelto en la cabecera {NEXT_CURSOR_HEADER} de la página anterior",
+    ),
+    fields: Optional[str] = Query(
+        default=None,
+        description=(
+            "Campos a devolver separados por comas (p. ej. name,status,current_dimension); "
+            "`id` siempre se incluye. Sin indicar: todos los campos de CharacterResponse"
+        ),
+    ),
+    if_none_match: Optional[str] = Header(default=None),
+) -> Response:
+    """
+    Lista los personajes ordenados por (name, _id), opcionalmente filtrados por dimensión.
+    Paginación por cursor: si hay más resultados, la cabecera X-Next-Cursor trae el
+    cursor a pasar en `after` para obtener la siguiente página.
+    Las páginas se sirven desde una caché en proceso que invalidan las escrituras.
+    Con `fields` la consulta proyecta solo esos campos y la respuesta se recorta igual.
+    Devuelve un ETag según la revisión de la dimensión (o global sin filtro); con
+    If-None-Match coincidente responde 304 sin consultar la base de datos.
+    """
+    try:
+        selected_fields = parse_character_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    dimension = dimension.strip() if dimension and dimension.strip() else None
+    cache_key = (dimension, limit, after, selected_fields)
+    # La revisión se lee antes de consultar: una escritura concurrente solo puede
+    # hacer que el ETag quede atrasado (el siguiente GET devolverá 200), nunca adelantado
+    etag = make_etag(character_revisions.revision(dimension), cache_key)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=etag_headers(etag))
+    cached = character_list_cache.get(cache_key)
+    if cached is not None:
+        body, next_cursor = cached
+        logger.debug("Listado de personajes desde caché (dimension=%s)", dimension)
+        return _list_response(body, next_cursor, etag)
+
+    filter_query = character_filter()
+    if dimension is not None:
+        filter_query["current_dimension"] = dimension
+    if after:
+        filter_query.update(_after_cursor_filter(after))
+    epoch = character_list_cache.epoch
     try:
-        coll = get_characters_collection()
-        filter_query = _character_filter()
-        if dimension is not None and dimension.strip():
-            filter_query["current_dimension"] = dimension.strip()
-        cursor = coll.find(filter_query).sort("name", 1)
-        docs = await cursor.to_list(length=1000)
-        result = []
-        for doc in docs:
-            resp = doc_to_character_response(doc)
-            if resp:
-                result.append(resp)
-        logger.info("Listados %d personajes (filtro dimension=%s)", len(result), dimension)
-        return result
+        cursor = get_characters_repository().find(
+            filter_query,
+            character_list_projection(selected_fields),
+            sort=[("name", 1), ("_id", 1)],
+            limit=limit + 1,
+        )
+        docs = await cursor.to_list(length=limit + 1)
     except PyMongoError as e:
         logger.exception("Error listando personajes: %s", e)
         raise HTTPException(status_code=500, detail="Error al listar personajes") from e
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    next_cursor = encode_cursor(docs[-1]["name"], docs[-1]["_id"]) if has_more else None
+    body = characters_to_json(docs, selected_fields)
+    character_list_cache.set(cache_key, (body, next_cursor), epoch=epoch)
+    logger.info(
+        "Listados %d personajes (filtro dimension=%s, hay_mas=%s)",
+        len(docs),
+        dimension,
+        has_more,
+    )
+    return _list_response(body, next_cursor, etag)
+
+
+@router.get("/characters/export")
+async def export_characters(
+    format: Literal["ndjson"] = Query(
+        default="ndjson",
+        description="Formato de exportación (una línea JSON por documento)",
+    ),
+) -> StreamingResponse:
+    """
+    Exporta todos los personajes y piedras dimensionales en streaming (NDJSON).
+    Cada línea lleva `type` ("character" o "dimensional_stone") y los campos de su respuesta.
+    La memoria es constante: el cursor se consume por lotes y cada lote se envía al cliente.
+    """
+    return StreamingResponse(
+        _export_ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="characters.ndjson"'},
+    )
+
+
+@router.get("/characters/{id}", response_model=CharacterResponse)
+async def get_character(id: str) -> Response:
+    """
+    Devuelve un personaje por id. Se sirve desde una caché LRU por id que invalidan
+    las escrituras; en un fallo cuesta una búsqueda por _id.
+    """
+    oid = _validate_object_id(id)
+    cached = character_cache.get(oid)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+    epoch = character_cache.epoch
+    try:
+        doc = await get_characters_repository().find_one(
+            {"_id": oid, **character_filter()}, CHARACTER_LIST_PROJECTION
+        )
+    except PyMongoError as e:
+        logger.exception("Error leyendo personaje id=%s: %s", id, e)
+        raise HTTPException(status_code=500, detail="Error al leer personaje") from e
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Personaje no encontrado")
+    body = character_to_json(doc)
+    character_cache.set(oid, body, epoch=epoch)
+    return Response(content=body, media_type="application/json")
 
 
 @router.post("/characters", response_model=CharacterResponse, status_code=201)
 async def create_character(body: CharacterCreate) -> CharacterResponse:
     """Crea un nuevo personaje."""
     try:
-        coll = get_characters_collection()
-        doc = body.model_dump()
-        doc["type"] = "character"
-        if doc.get("current_dimension") == RICK_PRIME_DIMENSION:
-            doc["stolen_by_rick_prime"] = True
-        insert_result = await coll.insert_one(doc)
+        coll = get_characters_repository()
+        doc = _new_character_document(body)
+        async with transaction_session() as session:
+            insert_result = await coll.insert_one(doc, session=session)
+            await apply_dimension_deltas({doc["current_dimension"]: 1}, session=session)
         new_id = str(insert_result.inserted_id)
         doc["_id"] = insert_result.inserted_id
+        invalidate_character_lists([doc["current_dimension"]])
+        publish(character_event(EVENT_CHARACTER_CREATED, doc))
         logger.info("Personaje creado: id=%s name=%s", new_id, body.name)
         return doc_to_character_response(doc)
     except PyMongoError as e:
@@ -90,6 +340,194 @@ async def create_character(body: CharacterCreate) -> CharacterResponse:
         raise HTTPException(status_code=500, detail="Error al crear personaje") from e
 
 
+@router.post("/characters/bulk", response_model=BulkCreateResponse)
+async def bulk_create_characters(
+    body: list[CharacterCreate],
+    chunk_size: int = Query(
+        default=DEFAULT_BULK_CHUNK_SIZE,
+        ge=1,
+        le=MAX_BULK_CHUNK_SIZE,
+        description="Número de personajes por cada insert_many",
+    ),
+) -> BulkCreateResponse:
+    """
+    Crea muchos personajes en una sola petición con insert_many no ordenado, por lotes.
+    Un fallo de escritura no detiene el resto: se devuelve el resultado de cada elemento.
+    """
+    if not body:
+        raise HTTPException(status_code=400, detail="No hay personajes a crear")
+    if len(body) > MAX_BULK_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Máximo {MAX_BULK_ITEMS} personajes por petición",
+        )
+    docs = []
+    for item in body:
+        doc = _new_character_document(item)
+        doc["_id"] = ObjectId()
+        docs.append(doc)
+    results = [
+        BulkCreateItemResult(index=i, ok=True, id=str(doc["_id"])) for i, doc in enumerate(docs)
+    ]
+    coll = get_characters_repository()
+    for start in range(0, len(docs), chunk_size):
+        chunk = docs[start : start + chunk_size]
+        failed_in_chunk: set[int] = set()
+        try:
+            await coll.insert_many(chunk, ordered=False)
+        except BulkWriteError as e:
+            for err in e.details.get("writeErrors", []):
+                failed_in_chunk.add(err["index"])
+                _mark_bulk_failed(results[start + err["index"]], err.get("errmsg", "Error de escritura"))
+        except PyMongoError as e:
+            if start == 0:
+                logger.exception("Error en creación masiva de personajes: %s", e)
+                invalidate_character_lists({doc["current_dimension"] for doc in chunk})
+                raise HTTPException(status_code=500, detail="Error al crear personajes") from e
+            # Los lotes anteriores ya se escribieron: se informa del resto como fallido
+            logger.exception("Creación masiva interrumpida en el elemento %d: %s", start, e)
+            for item in results[start:]:
+                _mark_bulk_failed(item, "Error al crear personaje")
+            break
+        inserted = [doc for i, doc in enumerate(chunk) if i not in failed_in_chunk]
+        # Sin transacción (un error de escritura la abortaría): se cuenta lo insertado
+        await apply_dimension_deltas(move_deltas((None, doc["current_dimension"]) for doc in inserted))
+        publish(*(character_event(EVENT_CHARACTER_CREATED, doc) for doc in inserted))
+    invalidate_character_lists({doc["current_dimension"] for doc in docs})
+    failed = sum(1 for r in results if not r.ok)
+    logger.info(
+        "Creación masiva: %d insertados, %d fallidos (lotes de %d)",
+        len(results) - failed,
+        failed,
+        chunk_size,
+    )
+    return BulkCreateResponse(inserted=len(results) - failed, failed=failed, results=results)
+
+
+@router.post("/characters/move", response_model=BatchMoveResponse)
+async def batch_move_characters(body: BatchMoveRequest) -> BatchMoveResponse:
+    """
+    Mueve muchos personajes a otra dimensión con un único update_many. En modo `ids` hacen
+    falta las dimensiones de origen para los contadores: se leen antes (una consulta) y el
+    movimiento es un único bulk_write con un UpdateMany por origen, condicionado a él.
+    Los trofeos de Rick Prime y las piedras se excluyen en el propio filtro; en modo `ids`
+    se devuelven los IDs que no se pudieron mover.
+    """
+    _reject_prime_target(body.target_dimension)
+    if body.source_dimension == RICK_PRIME_DIMENSION:
+        raise HTTPException(status_code=400, detail="Los trofeos de Rick Prime no se pueden mover")
+
+    filter_query = _movable_filter()
+    rejected_ids: list[str] = []
+    oids: list[ObjectId] = []
+    if body.ids is not None:
+        for raw_id in dict.fromkeys(body.ids):
+            if ObjectId.is_valid(raw_id):
+                oids.append(ObjectId(raw_id))
+            else:
+                rejected_ids.append(raw_id)
+        if not oids:
+            return BatchMoveResponse(matched=0, modified=0, rejected_ids=rejected_ids)
+        filter_query["_id"] = {"$in": oids}
+    else:
+        filter_query["current_dimension"] = body.source_dimension
+
+    try:
+        coll = get_characters_repository()
+        async with transaction_session() as session:
+            source_dimensions: dict[ObjectId, Optional[str]] = {}
+            moved: list[ObjectId] = []
+            if oids:
+                # Se leen antes las dimensiones de origen; la misma lectura indica qué IDs
+                # no se pueden mover
+                cursor = coll.find(filter_query, {"current_dimension": 1}, session=session)
+                source_dimensions = {doc["_id"]: doc.get("current_dimension") async for doc in cursor}
+                rejected_ids.extend(str(oid) for oid in oids if oid not in source_dimensions)
+                by_source: dict[Optional[str], list[ObjectId]] = {}
+                for oid, source in source_dimensions.items():
+                    if source != body.target_dimension:
+                        by_source.setdefault(source, []).append(oid)
+                # Los que ya están en el destino coinciden pero no cambian
+                matched = len(source_dimensions) - sum(map(len, by_source.values()))
+                modified = 0
+                if by_source:
+                    # Un único bulk_write con un UpdateMany por dimensión de origen, cada uno
+                    # condicionado a ella: un personaje que cambió de dimensión tras la lectura
+                    # (sin transacción) no se mueve ni cuenta en los deltas
+                    result = await coll.bulk_write(
+                        [
+                            UpdateManyOp(
+                                {**filter_query, "_id": {"$in": ids}, "current_dimension": source},
+                                {"$set": {"current_dimension": body.target_dimension}},
+                            )
+                            for source, ids in by_source.items()
+                        ],
+                        ordered=False,
+                        session=session,
+                    )
+                    matched += result.matched_count
+                    modified = result.modified_count
+                    moved = [oid for ids in by_source.values() for oid in ids]
+                    if modified < len(moved):
+                        # bulk_write no da el resultado por operación: solo si alguno escapó
+                        # (en la práctica, sin transacción) se lee quién llegó al destino
+                        cursor = coll.find(
+                            {"_id": {"$in": moved}, "current_dimension": body.target_dimension},
+                            {"_id": 1},
+                            session=session,
+                        )
+                        arrived = {doc["_id"] async for doc in cursor}
+                        moved = [oid for oid in moved if oid in arrived]
+                deltas = move_deltas(
+                    (source_dimensions[oid], body.target_dimension) for oid in moved
+                )
+            else:
+                result = await coll.update_many(
+                    filter_query,
+                    {"$set": {"current_dimension": body.target_dimension}},
+                    session=session,
+                )
+                matched, modified = result.matched_count, result.modified_count
+                deltas = move_deltas([(body.source_dimension, body.target_dimension)])
+                for dimension in deltas:
+                    deltas[dimension] *= modified
+            await apply_dimension_deltas(deltas, session=session)
+    except PyMongoError as e:
+        logger.exception("Error en movimiento masivo: %s", e)
+        raise HTTPException(status_code=500, detail="Error al mover personajes") from e
+    if modified:
+        if body.source_dimension is not None:
+            invalidate_character_lists([body.source_dimension, body.target_dimension])
+            invalidate_all_characters()
+            publish(batch_move_event(body.source_dimension, body.target_dimension, modified))
+        else:
+            invalidate_character_lists([*source_dimensions.values(), body.target_dimension])
+            invalidate_characters(source_dimensions)
+            publish(
+                *(
+                    character_event(
+                        EVENT_CHARACTER_MOVED,
+                        character_id=str(oid),
+                        from_dimension=source_dimensions[oid],
+                        to_dimension=body.target_dimension,
+                    )
+                    for oid in moved
+                )
+            )
+    logger.info(
+        "Movimiento masivo -> dimension=%s: matched=%d modified=%d rechazados=%d",
+        body.target_dimension,
+        matched,
+        modified,
+        len(rejected_ids),
+    )
+    return BatchMoveResponse(
+        matched=matched,
+        modified=modified,
+        rejected_ids=rejected_ids,
+    )
+
+
 @router.put("/characters/{id}", response_model=CharacterResponse)
 async def update_character(id: str, body: CharacterUpdate) -> CharacterResponse:
     """Actualiza un personaje (p. ej. cambiar dimensión u otros campos)."""
@@ -98,15 +536,37 @@ async def update_character(id: str, body: CharacterUpdate) -> CharacterResponse:
     if not update_data:
         raise HTTPException(status_code=400, detail="No hay campos a actualizar")
     try:
-        coll = get_characters_collection()
-        result = await coll.find_one_and_update(
-            {"_id": oid, **_character_filter()},
-            {"$set": update_data},
-            return_document=ReturnDocument.AFTER,
+        coll = get_characters_repository()
+        # Se pide el documento anterior para saber de qué dimensión sale; el resultado
+        # es el mismo $set aplicado en memoria (sin segunda ida y vuelta)
+        async with transaction_session() as session:
+            update = {"$set": update_data}
+            if "current_dimension" in update_data:
+                update = with_random_key(update, update_data["current_dimension"])
+            before = await coll.find_one_and_update(
+                {"_id": oid, **character_filter()},
+                update,
+                return_document=ReturnDocument.BEFORE,
+                session=session,
+            )
+            if before is None:
+                logger.warning("Personaje no encontrado para actualizar: id=%s", id)
+                raise HTTPException(status_code=404, detail="Personaje no encontrado")
+            result = {**before, **update_data}
+            await apply_dimension_deltas(
+                move_deltas([(before.get("current_dimension"), result.get("current_dimension"))]),
+                session=session,
+            )
+        invalidate_character_lists([before.get("current_dimension"), result.get("current_dimension")])
+        invalidate_characters([oid])
+        moved = before.get("current_dimension") != result.get("current_dimension")
+        publish(
+            character_event(
+                EVENT_CHARACTER_MOVED if moved else EVENT_CHARACTER_UPDATED,
+                result,
+                from_dimension=before.get("current_dimension"),
+            )
         )
-        if result is None:
-            logger.warning("Personaje no encontrado para actualizar: id=%s", id)
-            raise HTTPException(status_code=404, detail="Personaje no encontrado")
         logger.info("Personaje actualizado: id=%s", id)
         return doc_to_character_response(result)
     except HTTPException:
@@ -121,11 +581,28 @@ async def delete_character(id: str) -> None:
     """Elimina un personaje."""
     oid = _validate_object_id(id)
     try:
-        coll = get_characters_collection()
-        result = await coll.delete_one({"_id": oid, **_character_filter()})
-        if result.deleted_count == 0:
-            logger.warning("Personaje no encontrado para eliminar: id=%s", id)
-            raise HTTPException(status_code=404, detail="Personaje no encontrado")
+        coll = get_characters_repository()
+        async with transaction_session() as session:
+            deleted = await coll.find_one_and_delete(
+                {"_id": oid, **character_filter()},
+                projection={"current_dimension": 1},
+                session=session,
+            )
+            if deleted is None:
+                logger.warning("Personaje no encontrado para eliminar: id=%s", id)
+                raise HTTPException(status_code=404, detail="Personaje no encontrado")
+            await apply_dimension_deltas(
+                move_deltas([(deleted.get("current_dimension"), None)]), session=session
+            )
+        invalidate_character_lists([deleted.get("current_dimension")])
+        invalidate_characters([oid])
+        publish(
+            character_event(
+                EVENT_CHARACTER_DELETED,
+                character_id=id,
+                from_dimension=deleted.get("current_dimension"),
+            )
+        )
         logger.info("Personaje eliminado: id=%s", id)
     except HTTPException:
         raise
@@ -137,27 +614,40 @@ async def delete_character(id: str) -> None:
 @router.post("/characters/{id}/move", response_model=CharacterResponse)
 async def move_character(id: str, body: MoveCharacterRequest) -> CharacterResponse:
     """Mueve un personaje a otra dimensión. No permite mover desde/hacia la bóveda de Rick Prime."""
-    if body.target_dimension == RICK_PRIME_DIMENSION:
-        raise HTTPException(
-            status_code=400,
-            detail="Solo Rick Prime puede poner personajes en su bóveda. Usa el botón Rick Prime Attack.",
-        )
+    _reject_prime_target(body.target_dimension)
     oid = _validate_object_id(id)
     try:
-        coll = get_characters_collection()
-        current = await coll.find_one({"_id": oid, **_character_filter()})
-        if current is None:
-            logger.warning("Personaje no encontrado para mover: id=%s", id)
-            raise HTTPException(status_code=404, detail="Personaje no encontrado")
-        if current.get("current_dimension") == RICK_PRIME_DIMENSION:
+        coll = get_characters_repository()
+        # Una sola ida y vuelta: el filtro excluye los trofeos, así un robo
+        # concurrente de Rick Prime no puede colarse entre la lectura y la escritura.
+        async with transaction_session() as session:
+            before = await coll.find_one_and_update(
+                {"_id": oid, **_movable_filter()},
+                {"$set": {"current_dimension": body.target_dimension}},
+                return_document=ReturnDocument.BEFORE,
+                session=session,
+            )
+            if before is not None:
+                await apply_dimension_deltas(
+                    move_deltas([(before.get("current_dimension"), body.target_dimension)]),
+                    session=session,
+                )
+        if before is None:
+            current = await coll.find_one({"_id": oid, **character_filter()}, {"_id": 1})
+            if current is None:
+                logger.warning("Personaje no encontrado para mover: id=%s", id)
+                raise HTTPException(status_code=404, detail="Personaje no encontrado")
             raise HTTPException(
                 status_code=400,
                 detail="Los trofeos de Rick Prime no se pueden mover",
             )
-        result = await coll.find_one_and_update(
-            {"_id": oid, **_character_filter()},
-            {"$set": {"current_dimension": body.target_dimension}},
-            return_document=ReturnDocument.AFTER,
+        result = {**before, "current_dimension": body.target_dimension}
+        invalidate_character_lists([before.get("current_dimension"), body.target_dimension])
+        invalidate_characters([oid])
+        publish(
+            character_event(
+                EVENT_CHARACTER_MOVED, result, from_dimension=before.get("current_dimension")
+            )
         )
         logger.info(
             "Personaje movido: id=%s -> dimension=%s",
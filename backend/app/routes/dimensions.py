@@ -0,0 +1,40 @@
+"""
+Endpoints de dimensiones: estadísticas agregadas y conteo por dimensión.
+"""
+import logging
+
+from fastapi import APIRouter, HTTPException
+from pymongo.errors import PyMongoError
+
+from app.schemas import DimensionCountResponse, DimensionStatsResponse
+from app.services.counters_service import get_dimension_count
+from app.services.stats_service import compute_dimension_stats
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["dimensions"])
+
+
+@router.get("/dimensions/stats", response_model=DimensionStatsResponse)
+async def dimension_stats() -> DimensionStatsResponse:
+    """
+    Personajes por dimensión (con desglose por estado y especie), piedras por dimensión
+    y trofeos en la bóveda de Rick Prime, calculados con agregaciones en MongoDB.
+    """
+    try:
+        stats = await compute_dimension_stats()
+        return DimensionStatsResponse(**stats)
+    except PyMongoError as e:
+        logger.exception("Error calculando estadísticas de dimensiones: %s", e)
+        raise HTTPException(status_code=500, detail="Error al calcular estadísticas") from e
+
+
+@router.get("/dimensions/{dimension}/count", response_model=DimensionCountResponse)
+async def dimension_count(dimension: str) -> DimensionCountResponse:
+    """Personajes en la dimensión leídos del contador incremental (un único documento)."""
+    try:
+        count = await get_dimension_count(dimension)
+        return DimensionCountResponse(dimension=dimension, characters=count)
+    except PyMongoError as e:
+        logger.exception("Error leyendo el contador de la dimensión %s: %s", dimension, e)
+        raise HTTPException(status_code=500, detail="Error al leer el contador") from e
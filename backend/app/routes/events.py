@@ -0,0 +1,138 @@
+"""
+Feed de cambios en tiempo real: Server-Sent Events (todo) y WebSocket (por dimensión).
+"""
+import asyncio
+import logging
+from typing import AsyncIterator, Optional
+
+import orjson
+from fastapi import APIRouter, Header, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from app.events import EVENT_RESYNC, Subscription, event_bus, event_deltas
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["events"])
+
+# Comentario periódico para que proxies y navegadores no cierren la conexión inactiva
+KEEPALIVE_SECONDS = 15.0
+# Tiempo que el navegador espera antes de reconectar (campo `retry` de SSE)
+RECONNECT_DELAY_MS = 3000
+# Máximo de dimensiones por suscripción WebSocket
+MAX_WS_DIMENSIONS = 50
+# Código de cierre WebSocket para peticiones inválidas (policy violation)
+WS_POLICY_VIOLATION = 1008
+
+
+def format_sse(event: dict) -> bytes:
+    """Codifica un evento como mensaje SSE (id, event, data en JSON)."""
+    data = orjson.dumps(event)
+    return b"id: %s\nevent: %s\ndata: %s\n\n" % (
+        event["id"].encode(),
+        event["type"].encode(),
+        data,
+    )
+
+
+async def _event_stream(request: Request, subscription: Subscription) -> AsyncIterator[bytes]:
+    try:
+        yield b"retry: %d\n\n" % RECONNECT_DELAY_MS
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(subscription.get(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            yield format_sse(event)
+    finally:
+        event_bus.unsubscribe(subscription)
+        if subscription.dropped:
+            logger.warning("Cliente SSE lento: %d eventos descartados", subscription.dropped)
+
+
+@router.get("/events")
+async def events(
+    request: Request,
+    last_event_id: Optional[str] = Header(default=None, alias="Last-Event-ID"),
+) -> StreamingResponse:
+    """
+    Cambios de personajes y piedras (altas, movimientos, bajas, robos) en tiempo real.
+    Al reconectar, el navegador envía Last-Event-ID y se reenvían los eventos perdidos;
+    si ya no están en el histórico llega un evento `resync` y el cliente debe recargar.
+    """
+    subscription = event_bus.subscribe(last_event_id)
+    return StreamingResponse(
+        _event_stream(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _parse_dimensions(raw) -> frozenset[str]:
+    """Normaliza la lista de dimensiones; ValueError si está vacía, no es válida o es demasiado larga."""
+    if isinstance(raw, str):
+        raw = raw.split(",")
+    if not isinstance(raw, list) or not all(isinstance(d, str) for d in raw):
+        raise ValueError("`dimensions` debe ser una lista de dimensiones")
+    dimensions = frozenset(d.strip() for d in raw if d.strip())
+    if not dimensions:
+        raise ValueError("Indica al menos una dimensión")
+    if len(dimensions) > MAX_WS_DIMENSIONS:
+        raise ValueError(f"Máximo {MAX_WS_DIMENSIONS} dimensiones por suscripción")
+    return dimensions
+
+
+def _ws_json(payload: dict) -> str:
+    # Mensajes de texto: en el navegador llegan como string y no como Blob
+    return orjson.dumps(payload).decode()
+
+
+async def _send_deltas(websocket: WebSocket, subscription: Subscription) -> None:
+    """Único emisor del socket: vacía la cola de la suscripción y avisa si hubo descartes."""
+    reported_drops = 0
+    while True:
+        event = await subscription.get()
+        if subscription.dropped > reported_drops:
+            # El cliente iba lento y se perdieron deltas: debe recargar sus dimensiones
+            await websocket.send_text(
+                _ws_json({"type": EVENT_RESYNC, "dropped": subscription.dropped - reported_drops})
+            )
+            reported_drops = subscription.dropped
+        if event["type"] in (EVENT_RESYNC, "error"):
+            await websocket.send_text(_ws_json(event))
+            continue
+        for delta in event_deltas(event, subscription.dimensions or frozenset()):
+            await websocket.send_text(_ws_json(delta))
+
+
+@router.websocket("/ws/dimensions")
+async def dimension_updates(websocket: WebSocket, dimensions: str = Query("")) -> None:
+    """
+    Deltas (created, updated, deleted, moved_in, moved_out, stolen, stone_created) de las
+    dimensiones suscritas (?dimensions=C-137,C-131). El cliente puede cambiar la
+    suscripción enviando {"dimensions": [...]}. Cada conexión tiene una cola acotada:
+    si no consume a tiempo se descartan los deltas más antiguos y recibe un `resync`.
+    """
+    try:
+        initial = _parse_dimensions(dimensions)
+    except ValueError as e:
+        await websocket.close(code=WS_POLICY_VIOLATION, reason=str(e))
+        return
+    await websocket.accept()
+    subscription = event_bus.subscribe(dimensions=initial)
+    sender = asyncio.create_task(_send_deltas(websocket, subscription))
+    try:
+        while True:
+            try:
+                message = orjson.loads(await websocket.receive_text())
+                event_bus.set_dimensions(subscription, _parse_dimensions(message.get("dimensions")))
+            except (orjson.JSONDecodeError, AttributeError, ValueError) as e:
+                subscription.put({"type": "error", "detail": str(e)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        event_bus.unsubscribe(subscription)
+        if subscription.dropped:
+            logger.warning("Suscriptor WebSocket lento: %d eventos descartados", subscription.dropped)
@@ -0,0 +1,62 @@
+"""
+Administración del perfilado por muestreo (ver app/profiling.py). Solo responde con
+PROFILING=on; si no, 404. Todas las rutas /admin exigen la cabecera X-Admin-Token
+igual a ADMIN_TOKEN; sin ADMIN_TOKEN definido no existen (404).
+"""
+import os
+import secrets
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+
+from app import profiling
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    """Guarda de las rutas de administración."""
+    expected = os.getenv("ADMIN_TOKEN", "")
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not found")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=401, detail="X-Admin-Token no válido")
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+def _require_profiler() -> profiling.Profiler:
+    if profiling.profiler is None:
+        raise HTTPException(status_code=404, detail="Perfilado desactivado (PROFILING=on)")
+    return profiling.profiler
+
+
+@router.get("/profiling")
+def profiling_status() -> dict[str, Any]:
+    """
+    Fracción muestreada, directorio de salida, peticiones perfiladas y muestras por handler.
+    Las muestras son tiempo de CPU en el bucle de eventos mientras corre la tarea de una
+    petición perfilada: el tiempo esperando a MongoDB no aparece (ver las fases de /metrics),
+    ni los handlers síncronos ni las tareas hijas de la petición.
+    """
+    profiler = _require_profiler()
+    return {
+        "sample_rate": profiler.sample_rate,
+        "output_dir": profiler.output_dir,
+        "profiled_requests": profiler.profiled_requests,
+        "samples": profiler.samples(),
+    }
+
+
+@router.put("/profiling")
+def set_profiling_sample_rate(
+    sample_rate: float = Query(..., ge=0, le=1, description="Fracción de peticiones a perfilar"),
+) -> dict[str, Any]:
+    """Cambia en caliente la fracción de peticiones perfiladas (X-Profile: 1 sigue funcionando)."""
+    _require_profiler().sample_rate = sample_rate
+    return profiling_status()
+
+
+@router.post("/profiling/flush")
+def flush_profiles() -> dict[str, list[str]]:
+    """Escribe ya los ficheros collapsed (uno por handler) y devuelve sus rutas."""
+    return {"files": _require_profiler().flush()}
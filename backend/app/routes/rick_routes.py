@@ -3,17 +3,33 @@ Endpoints para insultos y Rick Prime.
 Delegan en los servicios de negocio.
 """
 import logging
-from typing import Any
+from typing import Any, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query, Response
 
 from pymongo.errors import PyMongoError
 
-from app.database import get_characters_collection
+from app.cache import stone_revisions
+from app.database import get_characters_repository, get_stones_repository
 from app.schemas import CharacterResponse, StoneResponse
 from app.services.insult_service import get_random_insult
-from app.services.rick_prime_service import DOC_TYPE_DIMENSIONAL_STONE, steal_character
-from app.utils import doc_to_character_response, doc_to_stone_response
+from app.services.rick_prime_service import (
+    DOC_TYPE_DIMENSIONAL_STONE,
+    MAX_RAID_SIZE,
+    VictimsEscaped,
+    legacy_stones_in_characters,
+    steal_character,
+    steal_characters,
+)
+from app.utils import (
+    STONE_LIST_PROJECTION,
+    doc_to_character_response,
+    doc_to_stone_response,
+    etag_headers,
+    etag_matches,
+    make_etag,
+    stones_to_json,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -28,14 +44,49 @@ async def get_random_insult_endpoint() -> dict:
     return {"insult": insult}
 
 
+def _steal_to_response(character_doc: dict, stone_doc: dict) -> dict[str, Any]:
+    """Formatea un robo (personaje + piedra) para la respuesta."""
+    character_resp = doc_to_character_response(character_doc)
+    stone_resp = doc_to_stone_response(stone_doc)
+    if character_resp is None or stone_resp is None:
+        raise HTTPException(
+            status_code=500,
+            detail="Error al formatear respuesta del robo",
+        )
+    return {"character": character_resp.model_dump(), "stone": stone_resp.model_dump()}
+
+
 @router.post("/rick-prime/steal")
-async def rick_prime_steal_endpoint() -> dict[str, Any]:
+async def rick_prime_steal_endpoint(
+    count: Optional[int] = Query(
+        default=None,
+        ge=1,
+        le=MAX_RAID_SIZE,
+        description="Número de personajes a robar en una incursión (robo múltiple)",
+    ),
+) -> dict[str, Any]:
     """
     Rick Prime roba un personaje aleatorio de dimensiones regulares:
     lo mueve a la bóveda Prime, deja una piedra dimensional en su lugar,
     y devuelve el personaje y la piedra creada.
+
+    Con `count`, roba hasta ese número de personajes en una sola incursión y
+    devuelve {"stolen": [{"character", "stone"}, ...]}.
+
+    Responde 404 si no hay a quién robar y 409 si todas las víctimas elegidas escaparon
+    por movimientos concurrentes (se puede reintentar).
     """
     try:
+        if count is not None:
+            results = await steal_characters(count)
+            if not results:
+                raise HTTPException(
+                    status_code=404,
+                    detail="No hay personajes para que Rick Prime robe",
+                )
+            logger.info("Rick Prime robó %d personajes (pedidos %d)", len(results), count)
+            return {"stolen": [_steal_to_response(char, stone) for char, stone in results]}
+
         result = await steal_character()
         if result is None:
             raise HTTPException(
@@ -43,21 +94,20 @@ async def rick_prime_steal_endpoint() -> dict[str, Any]:
                 detail="No hay personajes para que Rick Prime robe",
             )
         character_doc, stone_doc = result
-        character_resp = doc_to_character_response(character_doc)
-        stone_resp = doc_to_stone_response(stone_doc)
-        if character_resp is None or stone_resp is None:
-            raise HTTPException(
-                status_code=500,
-                detail="Error al formatear respuesta del robo",
-            )
+        response = _steal_to_response(character_doc, stone_doc)
         logger.info(
             "Rick Prime robó personaje: id=%s name=%s",
             character_doc["_id"],
             character_doc.get("name"),
         )
-        return {"character": character_resp.model_dump(), "stone": stone_resp.model_dump()}
+        return response
     except HTTPException:
         raise
+    except VictimsEscaped as e:
+        raise HTTPException(
+            status_code=409,
+            detail="Las víctimas de Rick Prime escaparon: inténtalo de nuevo",
+        ) from e
     except PyMongoError as e:
         logger.exception("Error en rick-prime/steal: %s", e)
         raise HTTPException(
@@ -67,18 +117,27 @@ async def rick_prime_steal_endpoint() -> dict[str, Any]:
 
 
 @router.get("/stones", response_model=list[StoneResponse])
-async def list_stones() -> list[StoneResponse]:
-    """Lista todas las piedras dimensionales (dejadas por Rick Prime)."""
+async def list_stones(if_none_match: Optional[str] = Header(default=None)) -> Response:
+    """
+    Lista todas las piedras dimensionales (dejadas por Rick Prime).
+    Con If-None-Match igual al ETag actual responde 304 sin consultar la base de datos.
+    """
+    etag = make_etag(stone_revisions.revision(), "stones")
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=etag_headers(etag))
     try:
-        coll = get_characters_collection()
-        cursor = coll.find({"type": DOC_TYPE_DIMENSIONAL_STONE}).sort("dimension", 1)
+        cursor = get_stones_repository().find({}, STONE_LIST_PROJECTION, sort=[("dimension", 1)])
         docs = await cursor.to_list(length=1000)
-        result = []
-        for doc in docs:
-            resp = doc_to_stone_response(doc)
-            if resp:
-                result.append(resp)
-        return result
+        if legacy_stones_in_characters():
+            # Compatibilidad: piedras aún no migradas a 'dimensional_stones'
+            legacy = get_characters_repository().find(
+                {"type": DOC_TYPE_DIMENSIONAL_STONE}, STONE_LIST_PROJECTION, sort=[("dimension", 1)]
+            )
+            docs.extend(await legacy.to_list(length=1000))
+            docs.sort(key=lambda d: d.get("dimension", ""))
     except PyMongoError as e:
         logger.exception("Error listando piedras: %s", e)
         raise HTTPException(status_code=500, detail="Error al listar piedras") from e
+    return Response(
+        content=stones_to_json(docs), media_type="application/json", headers=etag_headers(etag)
+    )
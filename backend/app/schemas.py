@@ -5,7 +5,7 @@ Validaciones y tipos para Character y Dimension.
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 # --- Enums / constantes para validación ---
@@ -13,6 +13,7 @@ from pydantic import BaseModel, Field, field_validator
 CHARACTER_STATUSES = {"alive", "dead", "unknown", "captured"}
 NAME_MAX_LENGTH = 200
 DESCRIPTION_MAX_LENGTH = 2000
+BATCH_MOVE_MAX_IDS = 50000
 
 
 def _strip_string(v: str) -> str:
@@ -173,6 +174,23 @@ class StoneResponse(BaseModel):
     previous_character_id: str = Field(..., description="ID del personaje que fue robado")
 
 
+class BulkCreateItemResult(BaseModel):
+    """Resultado de un elemento en la creación masiva de personajes."""
+
+    index: int = Field(..., description="Posición del elemento en la petición")
+    ok: bool
+    id: Optional[str] = Field(default=None, description="ID asignado si se insertó")
+    error: Optional[str] = Field(default=None, description="Motivo del fallo si no se insertó")
+
+
+class BulkCreateResponse(BaseModel):
+    """Resumen de la creación masiva de personajes."""
+
+    inserted: int
+    failed: int
+    results: list[BulkCreateItemResult]
+
+
 class MoveCharacterRequest(BaseModel):
     """Payload para mover un personaje a otra dimensión."""
 
@@ -182,3 +200,61 @@ class MoveCharacterRequest(BaseModel):
     @classmethod
     def strip_whitespace(cls, v: str) -> str:
         return _strip_string(v) if v else v
+
+
+class BatchMoveRequest(BaseModel):
+    """Payload para mover muchos personajes: por lista de IDs o por dimensión de origen."""
+
+    ids: Optional[list[str]] = Field(default=None, min_length=1, max_length=BATCH_MOVE_MAX_IDS)
+    source_dimension: Optional[str] = Field(default=None, min_length=1, max_length=NAME_MAX_LENGTH)
+    target_dimension: str = Field(..., min_length=1, max_length=NAME_MAX_LENGTH)
+
+    @field_validator("source_dimension", "target_dimension", mode="before")
+    @classmethod
+    def strip_whitespace(cls, v):
+        if v is None:
+            return v
+        return _strip_string(v) if v else v
+
+    @model_validator(mode="after")
+    def ids_or_source(self) -> "BatchMoveRequest":
+        if (self.ids is None) == (self.source_dimension is None):
+            raise ValueError("Indica exactamente uno de: ids o source_dimension")
+        return self
+
+
+class BatchMoveResponse(BaseModel):
+    """Resultado de un movimiento masivo."""
+
+    matched: int = Field(..., description="Personajes que cumplían el filtro")
+    modified: int = Field(..., description="Personajes que cambiaron de dimensión")
+    rejected_ids: list[str] = Field(
+        default_factory=list,
+        description="IDs no movidos: inválidos, inexistentes o trofeos de Rick Prime",
+    )
+
+
+class DimensionStats(BaseModel):
+    """Estadísticas de una dimensión."""
+
+    dimension: str
+    characters: int = Field(..., description="Personajes cuya dimensión actual es esta")
+    stones: int = Field(..., description="Piedras dimensionales dejadas en esta dimensión")
+    by_status: dict[str, int] = Field(default_factory=dict)
+    by_species: dict[str, int] = Field(default_factory=dict)
+
+
+class DimensionStatsResponse(BaseModel):
+    """Estadísticas agregadas por dimensión, calculadas en la base de datos."""
+
+    dimensions: list[DimensionStats]
+    total_characters: int
+    total_stones: int
+    trophies: int = Field(..., description="Personajes en la bóveda de Rick Prime")
+
+
+class DimensionCountResponse(BaseModel):
+    """Número de personajes en una dimensión (contador mantenido en cada escritura)."""
+
+    dimension: str
+    characters: int
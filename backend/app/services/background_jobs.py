@@ -0,0 +1,95 @@
+"""
+Tareas periódicas en segundo plano (mantenimiento de datos).
+Se arrancan y detienen desde el lifespan de la aplicación.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Coroutine
+
+from app.services.counters_service import recount_dimension_counters
+from app.services.rick_prime_service import reconcile_orphan_stones
+
+logger = logging.getLogger(__name__)
+
+# Intervalo de la reconciliación de piedras huérfanas (0 la desactiva)
+DEFAULT_STONE_RECONCILE_INTERVAL_SECONDS = 300.0
+# Intervalo del recuento completo de contadores por dimensión (0 lo desactiva)
+DEFAULT_COUNTERS_RECOUNT_INTERVAL_SECONDS = 3600.0
+
+_tasks: list[asyncio.Task] = []
+
+
+def _interval_from_env(var: str, default: float) -> float:
+    raw = os.getenv(var, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        logger.warning("Valor inválido en %s=%r, se usa %s", var, raw, default)
+        return default
+
+
+async def _run_periodically(
+    name: str,
+    job: Callable[[], Awaitable[object]],
+    interval_seconds: float,
+) -> None:
+    """Ejecuta `job` cada `interval_seconds`; un fallo se registra y no detiene el bucle."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await job()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception("Error en la tarea periódica %s: %s", name, e)
+
+
+def start_periodic_job(
+    name: str,
+    job: Callable[[], Awaitable[object]],
+    interval_seconds: float,
+) -> None:
+    """Programa una tarea periódica; con intervalo 0 no se programa."""
+    if interval_seconds <= 0:
+        logger.info("Tarea periódica %s desactivada", name)
+        return
+    task = asyncio.create_task(_run_periodically(name, job, interval_seconds), name=name)
+    _tasks.append(task)
+    logger.info("Tarea periódica %s programada cada %.0fs", name, interval_seconds)
+
+
+def start_background_task(name: str, coro: Coroutine[Any, Any, object]) -> None:
+    """Lanza una tarea de larga duración que se cancela junto con las periódicas."""
+    _tasks.append(asyncio.create_task(coro, name=name))
+    logger.info("Tarea en segundo plano %s iniciada", name)
+
+
+def start_background_jobs() -> None:
+    """Arranca las tareas de mantenimiento configuradas por entorno."""
+    start_periodic_job(
+        "reconcile_orphan_stones",
+        reconcile_orphan_stones,
+        _interval_from_env(
+            "STONE_RECONCILE_INTERVAL_SECONDS",
+            DEFAULT_STONE_RECONCILE_INTERVAL_SECONDS,
+        ),
+    )
+    start_periodic_job(
+        "recount_dimension_counters",
+        recount_dimension_counters,
+        _interval_from_env(
+            "COUNTERS_RECOUNT_INTERVAL_SECONDS",
+            DEFAULT_COUNTERS_RECOUNT_INTERVAL_SECONDS,
+        ),
+    )
+
+
+async def stop_background_jobs() -> None:
+    """Cancela las tareas en curso y espera a que terminen."""
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
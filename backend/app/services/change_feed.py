@@ -0,0 +1,233 @@
+"""
+Alimenta el bus de eventos con un único change stream de MongoDB compartido por todos
+los clientes (personajes y piedras). Si el despliegue no tiene change streams
+(mongod standalone) los eventos se publican desde las rutas (bus en memoria).
+"""
+import asyncio
+import logging
+import os
+from typing import Optional
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.cache import (
+    invalidate_all_character_lists,
+    invalidate_all_characters,
+    invalidate_character_lists,
+    invalidate_characters,
+    invalidate_stone_lists,
+    set_revision_expiry,
+)
+from app.database import (
+    COLLECTION_CHARACTERS,
+    COLLECTION_STONES,
+    RANDOM_KEY_FIELD,
+    get_database,
+    supports_transactions,
+    using_memory_storage,
+)
+from app.events import (
+    EVENT_CHARACTER_CREATED,
+    EVENT_CHARACTER_DELETED,
+    EVENT_CHARACTER_MOVED,
+    EVENT_CHARACTER_STOLEN,
+    EVENT_CHARACTER_UPDATED,
+    EVENT_RESYNC,
+    SOURCE_CHANGE_STREAM,
+    SOURCE_MEMORY,
+    character_event,
+    event_bus,
+    stone_event,
+)
+from app.services.background_jobs import start_background_task
+from app.services.rick_prime_service import (
+    DOC_TYPE_DIMENSIONAL_STONE,
+    RICK_PRIME_DIMENSION,
+    STONE_ID_FIELD,
+)
+
+logger = logging.getLogger(__name__)
+
+# Espera antes de reabrir el stream tras un error (se duplica hasta el máximo)
+RETRY_DELAY_SECONDS = 1.0
+MAX_RETRY_DELAY_SECONDS = 30.0
+
+# Errores del servidor cuando el resume token ya no sirve (InvalidResumeToken,
+# ChangeStreamFatalError, ChangeStreamHistoryLost): reintentar con él no avanza nunca
+RESUME_TOKEN_LOST_CODES = frozenset({260, 280, 286})
+
+
+def _only_random_key(change: dict) -> bool:
+    """Actualización que solo cambia la clave aleatoria (p. ej. al heredarla de un robado)."""
+    description = change.get("updateDescription", {})
+    return (
+        change.get("operationType") == "update"
+        and set(description.get("updatedFields", {})) == {RANDOM_KEY_FIELD}
+        and not description.get("removedFields")
+    )
+
+
+def change_to_events(change: dict) -> list[dict]:
+    """Traduce un evento de change stream a eventos del feed (con el resume token como id)."""
+    collection = change.get("ns", {}).get("coll")
+    operation = change.get("operationType")
+    full = change.get("fullDocument")
+    before = change.get("fullDocumentBeforeChange") or {}
+    events: list[dict] = []
+
+    if operation == "insert" and full is not None:
+        if collection == COLLECTION_STONES or full.get("type") == DOC_TYPE_DIMENSIONAL_STONE:
+            events.append(stone_event(full))
+        elif collection == COLLECTION_CHARACTERS:
+            events.append(character_event(EVENT_CHARACTER_CREATED, full))
+    elif (
+        collection != COLLECTION_CHARACTERS
+        or before.get("type") == DOC_TYPE_DIMENSIONAL_STONE
+        or _only_random_key(change)
+    ):
+        pass
+    elif operation in ("update", "replace") and full is not None:
+        updated = change.get("updateDescription", {}).get("updatedFields", {})
+        if operation == "replace" or "current_dimension" in updated:
+            # Cada robo escribe el _id de su piedra; stolen_by_rick_prime puede no cambiar
+            # (ya era True si lo robaron antes) y entonces no figura en updatedFields
+            if full.get("current_dimension") == RICK_PRIME_DIMENSION and STONE_ID_FIELD in updated:
+                event_type = EVENT_CHARACTER_STOLEN
+                from_dimension = full.get("original_dimension")
+            else:
+                event_type = EVENT_CHARACTER_MOVED
+                # Solo con pre-imágenes habilitadas se conoce la dimensión de origen
+                from_dimension = before.get("current_dimension")
+            events.append(character_event(event_type, full, from_dimension=from_dimension))
+        else:
+            events.append(
+                character_event(
+                    EVENT_CHARACTER_UPDATED, full, from_dimension=full.get("current_dimension")
+                )
+            )
+    elif operation == "delete":
+        events.append(
+            character_event(
+                EVENT_CHARACTER_DELETED,
+                character_id=str(change["documentKey"]["_id"]),
+                from_dimension=before.get("current_dimension"),
+            )
+        )
+
+    token = change["_id"]["_data"]
+    for index, event in enumerate(events):
+        event["id"] = token if index == len(events) - 1 else f"{token}.{index}"
+    return events
+
+
+def _invalidate_local_caches(change: dict) -> None:
+    """
+    Invalida caché y revisiones (ETags) de este worker con cambios que pueden venir de
+    otros workers. Sin pre-imagen no se conoce el origen de un movimiento o baja: se
+    invalidan todos los listados.
+    """
+    if _only_random_key(change):
+        return
+    full = change.get("fullDocument") or {}
+    before = change.get("fullDocumentBeforeChange") or {}
+    if change.get("ns", {}).get("coll") == COLLECTION_STONES or (
+        full.get("type") or before.get("type")
+    ) == DOC_TYPE_DIMENSIONAL_STONE:
+        invalidate_stone_lists()
+        return
+    if "documentKey" in change:
+        invalidate_characters([change["documentKey"]["_id"]])
+    updated = change.get("updateDescription", {}).get("updatedFields", {})
+    operation = change.get("operationType")
+    if operation == "insert" or (operation == "update" and "current_dimension" not in updated):
+        invalidate_character_lists([full.get("current_dimension")])
+    elif before:
+        invalidate_character_lists([before.get("current_dimension"), full.get("current_dimension")])
+    else:
+        invalidate_all_character_lists()
+
+
+async def _enable_pre_images() -> None:
+    """Pide a MongoDB (6.0+) pre-imágenes en 'characters' para conocer el origen de movimientos y bajas."""
+    try:
+        await get_database().command(
+            "collMod", COLLECTION_CHARACTERS, changeStreamPreAndPostImages={"enabled": True}
+        )
+    except PyMongoError as e:
+        logger.info("Sin pre-imágenes en change streams (from_dimension puede faltar): %s", e)
+
+
+def _resume_token_lost(error: PyMongoError) -> bool:
+    return isinstance(error, OperationFailure) and error.code in RESUME_TOKEN_LOST_CODES
+
+
+def _resync_after_history_lost() -> None:
+    """
+    Los cambios entre el último token y ahora ya no se pueden leer: se descartan todas
+    las cachés y revisiones de este worker y se pide a los clientes que recarguen.
+    """
+    invalidate_all_character_lists()
+    invalidate_all_characters()
+    invalidate_stone_lists()
+    event_bus.dispatch({"type": EVENT_RESYNC})
+
+
+async def watch_changes() -> None:
+    """
+    Consume el change stream y reparte los eventos. Tras un error lo reabre desde el
+    último resume token, así no se pierde ningún cambio mientras dure el oplog. Si el
+    servidor ya no tiene ese historial se reabre desde ahora y se envía un `resync`.
+    """
+    pipeline = [{"$match": {"ns.coll": {"$in": [COLLECTION_CHARACTERS, COLLECTION_STONES]}}}]
+    resume_token: Optional[dict] = None
+    delay = RETRY_DELAY_SECONDS
+    while True:
+        try:
+            async with get_database().watch(
+                pipeline,
+                full_document="updateLookup",
+                full_document_before_change="whenAvailable",
+                resume_after=resume_token,
+            ) as stream:
+                logger.info("Change stream de eventos abierto")
+                delay = RETRY_DELAY_SECONDS
+                async for change in stream:
+                    resume_token = change["_id"]
+                    _invalidate_local_caches(change)
+                    for event in change_to_events(change):
+                        event_bus.dispatch(event)
+        except asyncio.CancelledError:
+            raise
+        except PyMongoError as e:
+            if resume_token is not None and _resume_token_lost(e):
+                logger.warning("Historial del change stream perdido, se reabre desde ahora: %s", e)
+                resume_token = None
+                _resync_after_history_lost()
+                continue
+            logger.warning("Change stream interrumpido (reintento en %.0fs): %s", delay, e)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_DELAY_SECONDS)
+
+
+async def start_event_feed() -> str:
+    """
+    Elige el origen de eventos: EVENTS_SOURCE=change_stream|memory lo fuerza; por defecto
+    (auto) se usan change streams si el despliegue es replica set o mongos. Con el
+    almacenamiento en memoria siempre se usa el bus en memoria.
+    """
+    mode = os.getenv("EVENTS_SOURCE", "auto").strip().lower()
+    if using_memory_storage():
+        mode = SOURCE_MEMORY
+    use_stream = mode == SOURCE_CHANGE_STREAM or (
+        mode != SOURCE_MEMORY and await supports_transactions()
+    )
+    if use_stream:
+        await _enable_pre_images()
+        event_bus.source = SOURCE_CHANGE_STREAM
+        start_background_task("watch_changes", watch_changes())
+    else:
+        event_bus.source = SOURCE_MEMORY
+    # Sin change stream las revisiones (ETags) no ven escrituras de otros workers: caducan
+    set_revision_expiry(event_bus.source != SOURCE_CHANGE_STREAM)
+    logger.info("Feed de eventos: origen=%s", event_bus.source)
+    return event_bus.source
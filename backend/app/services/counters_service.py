@@ -0,0 +1,126 @@
+"""
+Contadores de personajes por dimensión mantenidos de forma incremental.
+Cada escritura aplica un $inc a los contadores de las dimensiones afectadas (en la
+misma transacción cuando el despliegue lo permite); un recuento periódico corrige
+cualquier deriva.
+"""
+import logging
+from collections import Counter
+from typing import Iterable, Mapping, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClientSession
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from app.database import get_characters_repository, get_counters_repository
+from app.storage.base import DeleteManyOp, UpdateOp
+
+logger = logging.getLogger(__name__)
+
+# Versión de cada contador: la sube cada $inc y condiciona las correcciones del recuento
+VERSION_FIELD = "version"
+
+
+def move_deltas(moves: Iterable[tuple[Optional[str], Optional[str]]]) -> Counter:
+    """Deltas de contadores para movimientos (origen, destino); None = alta o baja."""
+    deltas: Counter = Counter()
+    for source, target in moves:
+        if source == target:
+            continue
+        if source:
+            deltas[source] -= 1
+        if target:
+            deltas[target] += 1
+    return deltas
+
+
+async def apply_dimension_deltas(
+    deltas: Mapping[str, int],
+    session: Optional[AsyncIOMotorClientSession] = None,
+) -> None:
+    """
+    Aplica los deltas con un único bulk_write de $inc (upsert por dimensión).
+    Dentro de una transacción el error se propaga (se aborta también la escritura);
+    sin ella la escritura principal ya está hecha y solo se registra: el recuento corrige.
+    """
+    ops = [
+        UpdateOp(
+            {"_id": dimension}, {"$inc": {"characters": delta, VERSION_FIELD: 1}}, upsert=True
+        )
+        for dimension, delta in deltas.items()
+        if dimension and delta
+    ]
+    if not ops:
+        return
+    try:
+        await get_counters_repository().bulk_write(ops, ordered=False, session=session)
+    except PyMongoError as e:
+        if session is not None:
+            raise
+        logger.warning("No se pudieron actualizar los contadores por dimensión: %s", e)
+
+
+async def get_dimension_count(dimension: str) -> int:
+    """Número de personajes en una dimensión leyendo un único documento de contador."""
+    doc = await get_counters_repository().find_one({"_id": dimension}, {"characters": 1})
+    return doc["characters"] if doc else 0
+
+
+async def recount_dimension_counters() -> dict[str, int]:
+    """
+    Recalcula todos los contadores con un $group sobre 'characters' y corrige los que
+    difieren, eliminando los de dimensiones sin personajes. Cada corrección se condiciona
+    a la versión leída antes del recuento: si un $inc concurrente la cambió, ese contador
+    se deja para el siguiente recuento en lugar de pisar el incremento.
+    Devuelve los conteos reales.
+    """
+    counters = get_counters_repository()
+    snapshot = {doc["_id"]: doc async for doc in counters.find({}, {"characters": 1, VERSION_FIELD: 1})}
+    # Las piedras heredadas en 'characters' no tienen current_dimension: se descartan
+    grouped = await get_characters_repository().count_by(
+        ["current_dimension"], {"current_dimension": {"$exists": True}}
+    )
+    counts = {dimension: count for (dimension,), count in grouped.items() if dimension}
+
+    ops: list = []
+    for dimension, doc in snapshot.items():
+        guard = {"_id": dimension, VERSION_FIELD: doc.get(VERSION_FIELD)}
+        count = counts.get(dimension, 0)
+        if count == 0:
+            ops.append(DeleteManyOp(guard))
+        elif doc.get("characters") != count:
+            ops.append(
+                UpdateOp(guard, {"$set": {"characters": count}, "$inc": {VERSION_FIELD: 1}})
+            )
+    corrected = 0
+    if ops:
+        result = await counters.bulk_write(ops, ordered=False)
+        corrected += result.modified_count + result.deleted_count
+    missing = [
+        {"_id": dimension, "characters": count, VERSION_FIELD: 0}
+        for dimension, count in counts.items()
+        if dimension not in snapshot
+    ]
+    if missing:
+        try:
+            corrected += len((await counters.insert_many(missing, ordered=False)).inserted_ids)
+        except BulkWriteError as e:
+            # Un $inc concurrente ya creó el contador: se revisa en el siguiente recuento
+            corrected += e.details.get("nInserted", 0)
+    logger.info(
+        "Recuento de contadores por dimensión: %d dimensiones (%d corregidos)",
+        len(counts),
+        corrected,
+    )
+    return counts
+
+
+async def ensure_dimension_counters() -> None:
+    """Al arrancar: si no hay contadores pero sí personajes, hace el recuento inicial."""
+    if await get_counters_repository().find_one({}, {"_id": 1}) is not None:
+        return
+    if await get_characters_repository().find_one(
+        {"current_dimension": {"$exists": True}}, {"_id": 1}
+    ) is None:
+        return
+    logger.info("Contadores por dimensión vacíos: recuento inicial")
+    await recount_dimension_counters()
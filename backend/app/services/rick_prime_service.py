@@ -1,15 +1,28 @@
 """
 Lógica de negocio de Rick Prime: robo de personaje, piedra dimensional y bóveda Prime.
+Incluye la reconciliación de piedras huérfanas (robos interrumpidos).
 """
+import asyncio
 import logging
-from datetime import datetime
+import os
+import random
+from datetime import datetime, timedelta
 from typing import Optional, Tuple
 
 from bson import ObjectId
 from pymongo import ReturnDocument
 from pymongo.errors import PyMongoError
 
-from app.database import get_characters_collection
+from app.cache import invalidate_character_lists, invalidate_characters, invalidate_stone_lists
+from app.database import (
+    RANDOM_KEY_FIELD,
+    get_characters_repository,
+    get_stones_repository,
+    transaction_session,
+)
+from app.events import EVENT_CHARACTER_STOLEN, character_event, publish, stone_event
+from app.services.counters_service import apply_dimension_deltas, move_deltas
+from app.storage.base import Repository, UpdateOp
 
 logger = logging.getLogger(__name__)
 
@@ -20,30 +33,266 @@ DOC_TYPE_DIMENSIONAL_STONE = "dimensional_stone"
 # Dimensión especial donde Rick Prime guarda sus trofeos (no se puede arrastrar aquí)
 RICK_PRIME_DIMENSION = "RICK_PRIME_DIMENSION"
 
+# En el trofeo, _id de la piedra que dejó su robo: identifica qué robo lo movió a la bóveda
+STONE_ID_FIELD = "dimensional_stone_id"
 
-def _character_filter() -> dict:
-    """Filtro para obtener solo documentos que son personajes (no piedras)."""
-    return {"type": {"$ne": DOC_TYPE_DIMENSIONAL_STONE}}
+# Robo individual: víctimas elegidas como máximo si las anteriores escapan
+STEAL_ATTEMPTS = 3
 
+# Máximo de personajes por incursión (robo múltiple)
+MAX_RAID_SIZE = 1000
 
-async def select_random_character() -> Optional[dict]:
+# Reconciliación de piedras huérfanas: antigüedad mínima y tamaño de lote
+ORPHAN_STONE_GRACE_SECONDS = 60.0
+RECONCILE_BATCH_SIZE = 500
+
+
+class VictimsEscaped(Exception):
+    """Todas las víctimas de un robo escaparon por movimientos concurrentes (no falta a quién robar)."""
+
+
+# Las piedras antiguas vivían en 'characters'. Mientras queden (migración pendiente)
+# las lecturas las excluyen/incluyen explícitamente; hasta comprobarlo se asume que sí.
+_legacy_stones_in_characters = True
+
+
+async def detect_legacy_stones() -> bool:
     """
-    Selecciona un personaje aleatorio de dimensiones regulares (excluyendo Prime y piedras).
+    Decide si activar la compatibilidad con piedras heredadas en 'characters'.
+    STONES_LEGACY_COMPAT=on|off la fuerza; por defecto (auto) se comprueba si queda alguna.
+    """
+    global _legacy_stones_in_characters
+    mode = os.getenv("STONES_LEGACY_COMPAT", "auto").strip().lower()
+    if mode in ("on", "off"):
+        _legacy_stones_in_characters = mode == "on"
+    else:
+        legacy = await get_characters_repository().find_one(
+            {"type": DOC_TYPE_DIMENSIONAL_STONE}, {"_id": 1}
+        )
+        _legacy_stones_in_characters = legacy is not None
+    if _legacy_stones_in_characters:
+        logger.warning(
+            "Hay piedras dimensionales en 'characters': lecturas en modo compatibilidad "
+            "hasta ejecutar scripts/migrate_stones_collection.py"
+        )
+    return _legacy_stones_in_characters
+
+
+def legacy_stones_in_characters() -> bool:
+    """Indica si las lecturas deben tener en cuenta piedras heredadas en 'characters'."""
+    return _legacy_stones_in_characters
+
+
+def character_filter() -> dict:
     """
-    coll = get_characters_collection()
-    match = {
-        **_character_filter(),
+    Filtro para obtener solo documentos que son personajes (no piedras).
+    Tras la migración 'characters' solo contiene personajes y el filtro queda vacío.
+    """
+    if _legacy_stones_in_characters:
+        return {"type": {"$ne": DOC_TYPE_DIMENSIONAL_STONE}}
+    return {}
+
+
+def robbable_filter() -> dict:
+    """Personajes robables: fuera de la bóveda Prime y que no son piedras."""
+    return {
+        **character_filter(),
         "current_dimension": {"$ne": RICK_PRIME_DIMENSION},
     }
-    pipeline = [
-        {"$match": match},
-        {"$sample": {"size": 1}},
+
+
+def random_characters_pipeline(size: int) -> list[dict]:
+    """
+    Muestreo con $match + $sample de personajes robables: la selección anterior a la clave
+    aleatoria, que recorre todo el conjunto filtrado (se conserva para comparar en benchmarks).
+    """
+    return [
+        {"$match": robbable_filter()},
+        {"$sample": {"size": size}},
     ]
-    cursor = coll.aggregate(pipeline)
-    docs = await cursor.to_list(length=1)
+
+
+def new_random_key() -> float:
+    return random.random()
+
+
+def with_random_key(update: dict, dimension: Optional[str]) -> dict:
+    """
+    Añade a `update` el mantenimiento de la clave aleatoria de un personaje que queda en
+    `dimension`: en la bóveda Prime se retira (deja de ser robable); fuera, se renueva.
+    """
+    if dimension == RICK_PRIME_DIMENSION:
+        return {**update, "$unset": {**update.get("$unset", {}), RANDOM_KEY_FIELD: ""}}
+    return {**update, "$set": {**update.get("$set", {}), RANDOM_KEY_FIELD: new_random_key()}}
+
+
+def random_key_query(start: float, wrapped: bool = False) -> dict:
+    """Personajes robables con clave >= start (o < start al dar la vuelta al rango)."""
+    return {**robbable_filter(), RANDOM_KEY_FIELD: {"$lt" if wrapped else "$gte": start}}
+
+
+async def select_random_character(refresh_keys: bool = True) -> Optional[dict]:
+    """
+    Selecciona un personaje aleatorio de dimensiones regulares (excluyendo Prime y piedras).
+    """
+    docs = await select_random_characters(1, refresh_keys)
     return docs[0] if docs else None
 
 
+async def _seek_random_character(exclude: dict) -> Optional[dict]:
+    """Primer personaje robable con clave >= r para un r al azar; si no hay, el de menor clave."""
+    repo = get_characters_repository()
+    start = new_random_key()
+    for wrapped in (False, True):
+        cursor = repo.find(
+            {**random_key_query(start, wrapped), **exclude},
+            sort=[(RANDOM_KEY_FIELD, 1)],
+            limit=1,
+        )
+        docs = await cursor.to_list(length=1)
+        if docs:
+            return docs[0]
+    return None
+
+
+async def select_random_characters(count: int, refresh_keys: bool = True) -> list[dict]:
+    """
+    Selecciona hasta `count` personajes distintos de dimensiones regulares.
+    Cada víctima sale de una búsqueda independiente en el índice de claves aleatorias: se toma
+    r al azar y se lee el primer personaje con clave >= r, dando la vuelta al rango si no hay
+    ninguno (O(log n) por víctima, en lugar del $sample sobre todo el conjunto filtrado).
+    Las búsquedas de una ronda van en paralelo; las siguientes excluyen a los ya elegidos.
+
+    Cada personaje sale con probabilidad igual al hueco entre su clave y la anterior: es
+    uniforme mientras las claves sean independientes y uniformes. Elegir sesga al elegido
+    (los huecos grandes salen más), así que su clave no puede retirarse sin más:
+    - `refresh_keys` (selección sin robo) le da una clave nueva.
+    - El robo, que retira la clave del trofeo, la hereda otro personaje (`hand_over_keys`).
+    """
+    picked: dict[ObjectId, dict] = {}
+    while len(picked) < count:
+        exclude = {"_id": {"$nin": list(picked)}} if picked else {}
+        found = await asyncio.gather(
+            *(_seek_random_character(exclude) for _ in range(count - len(picked)))
+        )
+        if not any(found):
+            break
+        for doc in found:
+            if doc is not None:
+                picked.setdefault(doc["_id"], doc)
+    docs = list(picked.values())
+    if refresh_keys and docs:
+        # Condicionado a la clave leída: no devuelve la clave a un personaje robado entretanto
+        await get_characters_repository().bulk_write(
+            [
+                UpdateOp(
+                    {"_id": doc["_id"], RANDOM_KEY_FIELD: doc[RANDOM_KEY_FIELD]},
+                    {"$set": {RANDOM_KEY_FIELD: new_random_key()}},
+                )
+                for doc in docs
+            ],
+            ordered=False,
+        )
+    return docs
+
+
+def _heir_filter(exclude: list[ObjectId], id_range: Optional[dict] = None) -> dict:
+    """Personajes robables con clave que pueden heredar la de un robado (no otros robados)."""
+    return {
+        **robbable_filter(),
+        RANDOM_KEY_FIELD: {"$exists": True},
+        "_id": {"$nin": exclude, **(id_range or {})},
+    }
+
+
+async def _seek_heir(low: int, high: int, exclude: list[ObjectId]) -> Optional[dict]:
+    """Primer personaje con clave y _id >= un _id al azar entre `low` y `high` (con vuelta)."""
+    start = ObjectId(random.randint(low, high).to_bytes(12, "big"))
+    for bound in ("$gte", "$lt"):
+        docs = await get_characters_repository().find(
+            _heir_filter(exclude, {bound: start}),
+            {RANDOM_KEY_FIELD: 1},
+            sort=[("_id", 1)],
+            limit=1,
+        ).to_list(length=1)
+        if docs:
+            return docs[0]
+    return None
+
+
+async def hand_over_keys(stolen: list[dict]) -> int:
+    """
+    Tras un robo, la clave de cada trofeo pasa a otro personaje robable elegido por _id al
+    azar (independiente de las claves). Así sale del índice la clave de un personaje
+    cualquiera y no la del elegido: el conjunto de claves sigue siendo uniforme y el hueco
+    del robado no se acumula en su sucesor (que, robo tras robo, acapararía la selección).
+    Es un ajuste de la selección, no del robo: si falla solo se registra.
+    Devuelve cuántas claves se traspasaron.
+    """
+    if not stolen:
+        return 0
+    repo = get_characters_repository()
+    exclude = [doc["_id"] for doc in stolen]
+    try:
+        bounds = [
+            await repo.find(_heir_filter(exclude), {"_id": 1}, sort=[("_id", direction)], limit=1)
+            .to_list(length=1)
+            for direction in (1, -1)
+        ]
+        if not bounds[0]:
+            return 0
+        low, high = (int.from_bytes(docs[0]["_id"].binary, "big") for docs in bounds)
+        heirs = await asyncio.gather(*(_seek_heir(low, high, exclude) for _ in stolen))
+        ops = []
+        seen: set[ObjectId] = set()
+        for doc, heir in zip(stolen, heirs):
+            if heir is None or heir["_id"] in seen or RANDOM_KEY_FIELD not in doc:
+                continue
+            seen.add(heir["_id"])
+            # Condicionado a la clave leída: si el heredero cambió entretanto, se omite
+            ops.append(
+                UpdateOp(
+                    {"_id": heir["_id"], RANDOM_KEY_FIELD: heir[RANDOM_KEY_FIELD]},
+                    {"$set": {RANDOM_KEY_FIELD: doc[RANDOM_KEY_FIELD]}},
+                )
+            )
+        if not ops:
+            return 0
+        return (await repo.bulk_write(ops, ordered=False)).modified_count
+    except PyMongoError as e:
+        logger.warning("No se pudieron traspasar las claves aleatorias de los robados: %s", e)
+        return 0
+
+
+async def ensure_random_keys(batch_size: int = RECONCILE_BATCH_SIZE) -> int:
+    """
+    Al arrancar: asigna clave aleatoria a los personajes robables que no la tienen (datos
+    anteriores a la clave), por lotes. Sin ellos el muestreo no sería uniforme.
+    Devuelve cuántos personajes se actualizaron.
+    """
+    repo = get_characters_repository()
+    missing = {**robbable_filter(), RANDOM_KEY_FIELD: {"$exists": False}}
+    assigned = 0
+    while True:
+        batch = await repo.find(missing, {"_id": 1}, limit=batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+        await repo.bulk_write(
+            [
+                UpdateOp(
+                    {"_id": doc["_id"], RANDOM_KEY_FIELD: {"$exists": False}},
+                    {"$set": {RANDOM_KEY_FIELD: new_random_key()}},
+                )
+                for doc in batch
+            ],
+            ordered=False,
+        )
+        assigned += len(batch)
+    if assigned:
+        logger.info("Claves aleatorias asignadas a %d personajes", assigned)
+    return assigned
+
+
 def _new_stone_document(character_doc: dict) -> dict:
     """Construye el documento de piedra dimensional (nuevo _id) para dejar en la dimensión original."""
     dimension = character_doc.get("current_dimension", "unknown")
@@ -56,6 +305,16 @@ def _new_stone_document(character_doc: dict) -> dict:
     }
 
 
+def _stolen_fields(character_doc: dict, stone_doc: dict) -> dict:
+    """Campos que marcan a un personaje como trofeo de Rick Prime (robado dejando `stone_doc`)."""
+    return {
+        "current_dimension": RICK_PRIME_DIMENSION,
+        "stolen_by_rick_prime": True,
+        "original_dimension": character_doc.get("current_dimension", "unknown"),
+        STONE_ID_FIELD: stone_doc["_id"],
+    }
+
+
 async def steal_character() -> Optional[Tuple[dict, dict]]:
     """
     Lógica completa de robo de Rick Prime:
@@ -64,39 +323,79 @@ async def steal_character() -> Optional[Tuple[dict, dict]]:
     3. Mueve el personaje a RICK_PRIME_DIMENSION y marca stolen_by_rick_prime/original_dimension.
     4. Devuelve (personaje actualizado, piedra creada).
 
+    Si la víctima cambia de dimensión o la roba otra petición entre la selección y el robo,
+    escapa: su piedra se descarta y se elige otra, hasta STEAL_ATTEMPTS veces; si escapan
+    todas lanza VictimsEscaped.
     Devuelve (character_doc, stone_doc) o None si no hay personajes para robar.
     """
-    character_doc = await select_random_character()
-    if character_doc is None:
-        logger.warning("Rick Prime no pudo robar: no hay personajes disponibles")
-        return None
+    for _ in range(STEAL_ATTEMPTS):
+        # Sin renovar la clave: el robo la retira y la hereda otro personaje
+        character_doc = await select_random_character(refresh_keys=False)
+        if character_doc is None:
+            logger.warning("Rick Prime no pudo robar: no hay personajes disponibles")
+            return None
+        stolen = await _steal_selected(character_doc)
+        if stolen is not None:
+            return stolen
+    logger.warning("Rick Prime no pudo robar: escaparon %d víctimas seguidas", STEAL_ATTEMPTS)
+    raise VictimsEscaped()
+
 
-    coll = get_characters_collection()
+async def _steal_selected(character_doc: dict) -> Optional[Tuple[dict, dict]]:
+    """
+    Roba a `character_doc` si sigue en la dimensión en que se leyó y no es un trofeo.
+    Devuelve None si escapó (sin piedra: se elimina en la misma sesión).
+    """
+    coll = get_characters_repository()
     oid = character_doc["_id"]
-    old_dimension = character_doc.get("current_dimension", "unknown")
+    stone_doc = _new_stone_document(character_doc)
+    in_transaction = False
 
     try:
-        stone_doc = _new_stone_document(character_doc)
-        await coll.insert_one(stone_doc)
-        logger.info(
-            "Piedra dimensional creada: id=%s dimension=%s",
-            stone_doc["_id"],
-            stone_doc["dimension"],
-        )
+        async with transaction_session() as session:
+            in_transaction = session is not None
+            await get_stones_repository().insert_one(stone_doc, session=session)
+            logger.info(
+                "Piedra dimensional creada: id=%s dimension=%s",
+                stone_doc["_id"],
+                stone_doc["dimension"],
+            )
 
-        result = await coll.find_one_and_update(
-            {"_id": oid, **_character_filter()},
-            {
-                "$set": {
-                    "current_dimension": RICK_PRIME_DIMENSION,
-                    "stolen_by_rick_prime": True,
-                    "original_dimension": old_dimension,
-                }
-            },
-            return_document=ReturnDocument.AFTER,
+            # La dimensión leída va en el filtro, como en la incursión: si otra petición lo
+            # movió o lo robó entretanto, no coincide y la piedra no apuntaría a su dimensión
+            result = await coll.find_one_and_update(
+                {
+                    "_id": oid,
+                    **character_filter(),
+                    "current_dimension": character_doc["current_dimension"],
+                },
+                with_random_key(
+                    {"$set": _stolen_fields(character_doc, stone_doc)}, RICK_PRIME_DIMENSION
+                ),
+                return_document=ReturnDocument.AFTER,
+                session=session,
+            )
+            if result is None:
+                await get_stones_repository().delete_one({"_id": stone_doc["_id"]}, session=session)
+                invalidate_stone_lists()
+                logger.warning("Rick Prime: la víctima id=%s escapó antes del robo", oid)
+                return None
+            await apply_dimension_deltas(
+                move_deltas([(character_doc.get("current_dimension"), RICK_PRIME_DIMENSION)]),
+                session=session,
+            )
+        await hand_over_keys([character_doc])
+        invalidate_character_lists([character_doc.get("current_dimension"), RICK_PRIME_DIMENSION])
+        invalidate_characters([oid])
+        invalidate_stone_lists()
+        publish(
+            stone_event(stone_doc),
+            character_event(
+                EVENT_CHARACTER_STOLEN,
+                result,
+                from_dimension=character_doc.get("current_dimension"),
+            ),
         )
-        if result is None:
-            raise PyMongoError("No se pudo actualizar el personaje a Prime")
         logger.info(
             "Rick Prime robó personaje: id=%s name=%s -> %s",
             oid,
@@ -106,4 +405,203 @@ async def steal_character() -> Optional[Tuple[dict, dict]]:
         return (result, stone_doc)
     except PyMongoError as e:
         logger.exception("Error en steal_character: %s", e)
+        if not in_transaction:
+            # Sin transacción la piedra ya está escrita: se compensa para no dejarla huérfana
+            await _discard_stone(stone_doc["_id"])
         raise
+
+
+async def _discard_stone(stone_id: ObjectId) -> None:
+    """Elimina una piedra de un robo fallido; si tampoco se puede, la limpia la reconciliación."""
+    try:
+        await get_stones_repository().delete_one({"_id": stone_id})
+        invalidate_stone_lists()
+    except PyMongoError as e:
+        logger.warning("No se pudo eliminar la piedra huérfana id=%s: %s", stone_id, e)
+
+
+async def _raided_ids(stones: dict[ObjectId, dict], session=None) -> set[ObjectId]:
+    """Víctimas que movió a la bóveda la incursión que dejó `stones` (su piedra en STONE_ID_FIELD)."""
+    cursor = get_characters_repository().find(
+        {
+            "_id": {"$in": list(stones)},
+            STONE_ID_FIELD: {"$in": [stone["_id"] for stone in stones.values()]},
+        },
+        {"_id": 1},
+        session=session,
+    )
+    return {doc["_id"] async for doc in cursor}
+
+
+async def _discard_raid_stones(stones: dict[ObjectId, dict]) -> None:
+    """Elimina las piedras de una incursión fallida cuyas víctimas no llegaron a la bóveda."""
+    try:
+        raided = await _raided_ids(stones)
+        orphan_ids = [stone["_id"] for oid, stone in stones.items() if oid not in raided]
+        if orphan_ids:
+            await get_stones_repository().delete_many({"_id": {"$in": orphan_ids}})
+    except PyMongoError as e:
+        logger.warning("No se pudieron eliminar las piedras de la incursión fallida: %s", e)
+    invalidate_stone_lists()
+
+
+async def reconcile_orphan_stones(
+    grace_seconds: float = ORPHAN_STONE_GRACE_SECONDS,
+    batch_size: int = RECONCILE_BATCH_SIZE,
+) -> int:
+    """
+    Elimina piedras huérfanas: aquellas cuyo `previous_character_id` no está en la bóveda Prime
+    (robo interrumpido entre la inserción de la piedra y el movimiento del personaje).
+    Solo considera piedras con más de `grace_seconds` para no tocar robos en curso.
+    Recorre las piedras por lotes; devuelve el número de piedras eliminadas.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    stone_collections = [get_stones_repository()]
+    if _legacy_stones_in_characters:
+        stone_collections.append(get_characters_repository())
+    removed = 0
+    for stones_coll in stone_collections:
+        cursor = stones_coll.find(
+            {"type": DOC_TYPE_DIMENSIONAL_STONE, "created_at": {"$lt": cutoff}},
+            {"_id": 1, "previous_character_id": 1},
+            batch_size=batch_size,
+        )
+        batch: list[dict] = []
+        async for stone in cursor:
+            batch.append(stone)
+            if len(batch) >= batch_size:
+                removed += await _remove_orphans(stones_coll, batch)
+                batch = []
+        if batch:
+            removed += await _remove_orphans(stones_coll, batch)
+    if removed:
+        invalidate_stone_lists()
+        logger.warning("Reconciliación: %d piedras huérfanas eliminadas", removed)
+    else:
+        logger.debug("Reconciliación: sin piedras huérfanas")
+    return removed
+
+
+async def _remove_orphans(stones_coll: Repository, stones: list[dict]) -> int:
+    """Elimina de `stones_coll` las piedras del lote cuyo personaje no es un trofeo en la bóveda."""
+    owner_ids = {
+        ObjectId(s["previous_character_id"])
+        for s in stones
+        if ObjectId.is_valid(s.get("previous_character_id", ""))
+    }
+    cursor = get_characters_repository().find(
+        {
+            "_id": {"$in": list(owner_ids)},
+            **character_filter(),
+            "current_dimension": RICK_PRIME_DIMENSION,
+        },
+        {"_id": 1},
+    )
+    in_vault = {str(doc["_id"]) async for doc in cursor}
+    orphan_ids = [s["_id"] for s in stones if s.get("previous_character_id") not in in_vault]
+    if not orphan_ids:
+        return 0
+    result = await stones_coll.delete_many(
+        {"_id": {"$in": orphan_ids}, "type": DOC_TYPE_DIMENSIONAL_STONE}
+    )
+    return result.deleted_count
+
+
+async def steal_characters(count: int) -> list[Tuple[dict, dict]]:
+    """
+    Incursión de Rick Prime: roba hasta `count` personajes en lote.
+    1. Elige cada víctima con una búsqueda independiente en el índice de claves aleatorias.
+    2. Inserta todas las piedras con insert_many.
+    3. Mueve todas las víctimas a la bóveda con un único bulk_write.
+    4. Traspasa las claves aleatorias de los robados a otros personajes (hand_over_keys).
+
+    Con replica set todo ocurre en una transacción. Si alguna víctima cambió de dimensión
+    entre el muestreo y el robo (o la robó antes otra petición) esta incursión no la roba,
+    y su piedra se elimina en la misma sesión para no dejar piedras huérfanas.
+
+    Devuelve la lista de (character_doc, stone_doc) robados; vacía si no hay personajes.
+    Si escapan todas las víctimas lanza VictimsEscaped.
+    """
+    victims = await select_random_characters(count, refresh_keys=False)
+    if not victims:
+        logger.warning("Rick Prime no pudo robar: no hay personajes disponibles")
+        return []
+
+    coll = get_characters_repository()
+    stones = {victim["_id"]: _new_stone_document(victim) for victim in victims}
+    updates = [
+        UpdateOp(
+            {
+                "_id": victim["_id"],
+                **character_filter(),
+                "current_dimension": victim.get("current_dimension"),
+            },
+            with_random_key(
+                {"$set": _stolen_fields(victim, stones[victim["_id"]])}, RICK_PRIME_DIMENSION
+            ),
+        )
+        for victim in victims
+    ]
+    in_transaction = False
+    try:
+        async with transaction_session() as session:
+            in_transaction = session is not None
+            await get_stones_repository().insert_many(
+                list(stones.values()), ordered=False, session=session
+            )
+            result = await coll.bulk_write(updates, ordered=False, session=session)
+            stolen = victims
+            if result.modified_count < len(victims):
+                # Robadas son las víctimas que cambió esta incursión, no todas las que están
+                # en la bóveda: un robo concurrente también las deja allí, con su propia piedra
+                changed = await _raided_ids(stones, session)
+                escaped = [oid for oid in stones if oid not in changed]
+                await get_stones_repository().delete_many(
+                    {"_id": {"$in": [stones[oid]["_id"] for oid in escaped]}},
+                    session=session,
+                )
+                stolen = [victim for victim in victims if victim["_id"] not in escaped]
+                logger.warning(
+                    "Incursión de Rick Prime: %d víctimas escaparon, piedras eliminadas",
+                    len(escaped),
+                )
+            await apply_dimension_deltas(
+                move_deltas(
+                    (victim.get("current_dimension"), RICK_PRIME_DIMENSION) for victim in stolen
+                ),
+                session=session,
+            )
+    except PyMongoError as e:
+        logger.exception("Error en steal_characters: %s", e)
+        if not in_transaction:
+            # Sin transacción las piedras pueden estar escritas: se compensa como en el robo
+            # individual, salvo las de víctimas que el bulk_write sí llegó a mover
+            await _discard_raid_stones(stones)
+        raise
+
+    await hand_over_keys(stolen)
+    invalidate_character_lists(
+        [RICK_PRIME_DIMENSION, *(victim.get("current_dimension") for victim in stolen)]
+    )
+    invalidate_characters(victim["_id"] for victim in stolen)
+    invalidate_stone_lists()
+    if not stolen:
+        raise VictimsEscaped()
+    logger.info(
+        "Incursión de Rick Prime: %d/%d personajes robados -> %s",
+        len(stolen),
+        count,
+        RICK_PRIME_DIMENSION,
+    )
+    raided = [
+        ({**victim, **_stolen_fields(victim, stones[victim["_id"]])}, stones[victim["_id"]])
+        for victim in stolen
+    ]
+    for character, stone in raided:
+        publish(
+            stone_event(stone),
+            character_event(
+                EVENT_CHARACTER_STOLEN, character, from_dimension=character["original_dimension"]
+            ),
+        )
+    return raided
@@ -0,0 +1,75 @@
+"""
+Estadísticas por dimensión calculadas en el almacenamiento (sin descargar los personajes).
+"""
+import logging
+
+from app.database import get_characters_repository, get_stones_repository
+from app.services.rick_prime_service import (
+    DOC_TYPE_DIMENSIONAL_STONE,
+    RICK_PRIME_DIMENSION,
+    character_filter,
+    legacy_stones_in_characters,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def _count_characters() -> dict[tuple, int]:
+    """Un único $group por (dimensión, estado, especie)."""
+    return await get_characters_repository().count_by(
+        ["current_dimension", "status", "species"], character_filter()
+    )
+
+
+async def _count_stones() -> dict[str, int]:
+    """Piedras por dimensión (incluye las heredadas en 'characters' durante la migración)."""
+    counts: dict[str, int] = {}
+    sources = [(get_stones_repository(), None)]
+    if legacy_stones_in_characters():
+        sources.append((get_characters_repository(), {"type": DOC_TYPE_DIMENSIONAL_STONE}))
+    for repo, filter in sources:
+        for (dimension,), count in (await repo.count_by(["dimension"], filter)).items():
+            counts[dimension] = counts.get(dimension, 0) + count
+    return counts
+
+
+async def compute_dimension_stats() -> dict:
+    """
+    Devuelve totales por dimensión: personajes, piedras y desglose por estado y especie,
+    más los trofeos de la bóveda Prime. El trabajo pesado es del $group del almacenamiento;
+    aquí solo se pliegan O(dimensiones × estados × especies) filas.
+    """
+    rows = await _count_characters()
+    stones = await _count_stones()
+
+    per_dimension: dict[str, dict] = {}
+
+    def entry(dimension: str) -> dict:
+        return per_dimension.setdefault(
+            dimension,
+            {"dimension": dimension, "characters": 0, "stones": 0, "by_status": {}, "by_species": {}},
+        )
+
+    for (dimension, status, species), count in rows.items():
+        stats = entry(dimension or "unknown")
+        stats["characters"] += count
+        if status is not None:
+            stats["by_status"][status] = stats["by_status"].get(status, 0) + count
+        if species is not None:
+            stats["by_species"][species] = stats["by_species"].get(species, 0) + count
+    for dimension, count in stones.items():
+        entry(dimension or "unknown")["stones"] += count
+
+    dimensions = sorted(per_dimension.values(), key=lambda d: d["dimension"])
+    result = {
+        "dimensions": dimensions,
+        "total_characters": sum(d["characters"] for d in dimensions),
+        "total_stones": sum(d["stones"] for d in dimensions),
+        "trophies": per_dimension.get(RICK_PRIME_DIMENSION, {}).get("characters", 0),
+    }
+    logger.info(
+        "Estadísticas por dimensión: %d dimensiones, %d personajes",
+        len(dimensions),
+        result["total_characters"],
+    )
+    return result
@@ -0,0 +1,157 @@
+"""
+Arranque de la aplicación: conexión a MongoDB, índices y tareas en segundo plano.
+STARTUP_MODE=blocking (por defecto) lo hace todo antes de aceptar peticiones;
+STARTUP_MODE=background empieza a escuchar al instante, conecta en segundo plano
+(reintentando sin límite) y construye los índices sin bloquear la disponibilidad.
+El estado se expone en /health/ready (readiness) frente a /health (liveness).
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+
+from pymongo.errors import PyMongoError
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.database import close_storage, connect_storage, ensure_indexes
+from app.services.background_jobs import start_background_jobs, start_background_task
+from app.services.change_feed import start_event_feed
+from app.services.counters_service import ensure_dimension_counters
+from app.services.rick_prime_service import detect_legacy_stones, ensure_random_keys
+
+logger = logging.getLogger(__name__)
+
+STARTUP_BLOCKING = "blocking"
+STARTUP_BACKGROUND = "background"
+
+# Espera entre intentos de arranque en segundo plano (se duplica hasta el máximo)
+RETRY_DELAY_SECONDS = 1.0
+MAX_RETRY_DELAY_SECONDS = 30.0
+
+
+class StartupState:
+    """Progreso del arranque, consultado por /health/ready y por el middleware de la API."""
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.started_at = time.monotonic()
+        self.connected = False
+        self.indexes_ready = False
+        self.ready = False
+        self.attempts = 0
+        self.last_error: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "status": "ready" if self.ready else "starting",
+            "mongo_connected": self.connected,
+            "indexes_ready": self.indexes_ready,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "uptime_seconds": round(time.monotonic() - self.started_at, 3),
+        }
+
+
+startup_state = StartupState()
+
+
+class ReadinessMiddleware:
+    """
+    Middleware ASGI del arranque en segundo plano: responde 503 a /api hasta que la
+    aplicación está lista. Solo se instala con STARTUP_MODE=background.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and not startup_state.ready and scope["path"].startswith("/api"):
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Servicio iniciándose"},
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+def startup_mode() -> str:
+    mode = os.getenv("STARTUP_MODE", STARTUP_BLOCKING).strip().lower()
+    if mode not in (STARTUP_BLOCKING, STARTUP_BACKGROUND):
+        logger.warning("STARTUP_MODE=%r no válido, se usa %s", mode, STARTUP_BLOCKING)
+        return STARTUP_BLOCKING
+    return mode
+
+
+async def _build_indexes() -> None:
+    await ensure_indexes()
+    startup_state.indexes_ready = True
+
+
+async def _build_indexes_in_background() -> None:
+    """Construye los índices sin bloquear; reintenta tras un error."""
+    delay = RETRY_DELAY_SECONDS
+    while True:
+        try:
+            await _build_indexes()
+            logger.info("Índices listos (segundo plano)")
+            return
+        except PyMongoError as e:
+            logger.warning("Construcción de índices fallida (reintento en %.0fs): %s", delay, e)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_DELAY_SECONDS)
+
+
+async def initialize(background_indexes: bool = False) -> None:
+    """Conecta, prepara índices y datos derivados y arranca las tareas de mantenimiento."""
+    startup_state.attempts += 1
+    await connect_storage()
+    startup_state.connected = True
+    if not background_indexes:
+        await _build_indexes()
+    await detect_legacy_stones()
+    await ensure_random_keys()
+    await ensure_dimension_counters()
+    await start_event_feed()
+    # Las tareas periódicas solo cuando todo lo anterior ha ido bien: un reintento
+    # del arranque no las duplica
+    start_background_jobs()
+    if background_indexes:
+        start_background_task("ensure_indexes", _build_indexes_in_background())
+    startup_state.ready = True
+    startup_state.last_error = None
+    logger.info(
+        "Aplicación lista en %.2fs (índices %s)",
+        time.monotonic() - startup_state.started_at,
+        "en segundo plano" if background_indexes else "listos",
+    )
+
+
+async def _initialize_in_background() -> None:
+    delay = RETRY_DELAY_SECONDS
+    while True:
+        try:
+            await initialize(background_indexes=True)
+            return
+        except (PyMongoError, RuntimeError) as e:
+            startup_state.last_error = str(e)
+            startup_state.connected = False
+            await close_storage()
+            logger.warning("Arranque en segundo plano fallido (reintento en %.0fs): %s", delay, e)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_DELAY_SECONDS)
+
+
+async def start_application() -> None:
+    """Arranca según STARTUP_MODE; en modo background vuelve de inmediato."""
+    startup_state.reset()
+    if startup_mode() == STARTUP_BACKGROUND:
+        logger.info("Arranque en segundo plano: escuchando antes de conectar a MongoDB")
+        start_background_task("startup", _initialize_in_background())
+    else:
+        await initialize()
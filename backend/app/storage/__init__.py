@@ -0,0 +1 @@
+# Portal Gun Character Lab - Storage
@@ -0,0 +1,136 @@
+"""
+Interfaz de repositorio: las operaciones sobre colecciones que usan rutas y servicios.
+Filtros, proyecciones y actualizaciones usan el lenguaje de consultas de MongoDB (el
+subconjunto que implementa MemoryRepository); los resultados son los de pymongo.results
+y los errores los de pymongo.errors, sea cual sea el motor. Los parámetros `session`
+solo tienen efecto en MongoDB con transacciones (ver app.database.transaction_session).
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional, Protocol, Sequence, Union
+
+from pymongo import ReturnDocument
+from pymongo.results import (
+    BulkWriteResult,
+    DeleteResult,
+    InsertManyResult,
+    InsertOneResult,
+    UpdateResult,
+)
+
+# Orden como en pymongo: [("name", 1), ("_id", 1)]
+Sort = Sequence[tuple[str, int]]
+
+
+@dataclass(frozen=True)
+class UpdateOp:
+    """Actualización de un documento dentro de bulk_write."""
+
+    filter: dict
+    update: dict
+    upsert: bool = False
+
+
+@dataclass(frozen=True)
+class UpdateManyOp:
+    """Actualización de todos los documentos que cumplen el filtro dentro de bulk_write."""
+
+    filter: dict
+    update: dict
+
+
+@dataclass(frozen=True)
+class DeleteManyOp:
+    """Borrado de todos los documentos que cumplen el filtro dentro de bulk_write."""
+
+    filter: dict
+
+
+WriteOp = Union[UpdateOp, UpdateManyOp, DeleteManyOp]
+
+
+class Cursor(Protocol):
+    """Resultado de find(): se recorre con `async for` o se materializa con to_list."""
+
+    def __aiter__(self) -> AsyncIterator[dict]: ...
+
+    async def to_list(self, length: Optional[int] = None) -> list[dict]: ...
+
+    async def close(self) -> None: ...
+
+
+class Repository(ABC):
+    """Colección de documentos con _id."""
+
+    name: str
+
+    @abstractmethod
+    def find(
+        self,
+        filter: dict,
+        projection: Optional[dict] = None,
+        *,
+        sort: Optional[Sort] = None,
+        limit: int = 0,
+        batch_size: int = 0,
+        session: Any = None,
+    ) -> Cursor:
+        """Documentos que cumplen `filter`, opcionalmente ordenados y limitados."""
+
+    @abstractmethod
+    async def find_one(
+        self, filter: dict, projection: Optional[dict] = None, *, session: Any = None
+    ) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def count_by(self, fields: Sequence[str], filter: Optional[dict] = None) -> dict[tuple, int]:
+        """Número de documentos por combinación de valores de `fields` (un $group)."""
+
+    @abstractmethod
+    async def sample(self, filter: dict, size: int, projection: Optional[dict] = None) -> list[dict]:
+        """Hasta `size` documentos aleatorios (uniformes) de los que cumplen `filter`."""
+
+    @abstractmethod
+    async def insert_one(self, document: dict, *, session: Any = None) -> InsertOneResult:
+        """Inserta el documento; como en pymongo, le asigna `_id` si no lo tiene."""
+
+    @abstractmethod
+    async def insert_many(
+        self, documents: Sequence[dict], *, ordered: bool = True, session: Any = None
+    ) -> InsertManyResult:
+        """Inserta los documentos; los fallos se informan con BulkWriteError (writeErrors)."""
+
+    @abstractmethod
+    async def update_one(
+        self, filter: dict, update: dict, *, upsert: bool = False, session: Any = None
+    ) -> UpdateResult: ...
+
+    @abstractmethod
+    async def update_many(self, filter: dict, update: dict, *, session: Any = None) -> UpdateResult: ...
+
+    @abstractmethod
+    async def find_one_and_update(
+        self,
+        filter: dict,
+        update: dict,
+        *,
+        projection: Optional[dict] = None,
+        return_document: bool = ReturnDocument.BEFORE,
+        session: Any = None,
+    ) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def find_one_and_delete(
+        self, filter: dict, *, projection: Optional[dict] = None, session: Any = None
+    ) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def delete_one(self, filter: dict, *, session: Any = None) -> DeleteResult: ...
+
+    @abstractmethod
+    async def delete_many(self, filter: dict, *, session: Any = None) -> DeleteResult: ...
+
+    @abstractmethod
+    async def bulk_write(
+        self, operations: Sequence[WriteOp], *, ordered: bool = True, session: Any = None
+    ) -> BulkWriteResult: ...
@@ -0,0 +1,591 @@
+"""
+Motor de almacenamiento en memoria (STORAGE_BACKEND=memory) para tests, benchmarks y
+demos sin MongoDB. Cada colección es un dict por _id con índices secundarios de
+igualdad (por defecto `current_dimension` y `type`): las consultas parten del índice
+más selectivo de las igualdades del filtro y evalúan el resto documento a documento.
+Los campos numéricos declarados como `range_fields` tienen además un índice ordenado
+para find() con filtro de rango, orden ascendente por ese campo y límite.
+Implementa el subconjunto del lenguaje de consultas de MongoDB que usa la aplicación.
+Lo usa un solo hilo (el bucle de asyncio), así que cada operación es atómica; no hay
+transacciones ni change streams.
+"""
+import heapq
+import itertools
+import random
+from bisect import bisect_left, insort
+from copy import deepcopy
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Iterable, Optional, Sequence
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo.results import (
+    BulkWriteResult,
+    DeleteResult,
+    InsertManyResult,
+    InsertOneResult,
+    UpdateResult,
+)
+
+from app.storage.base import DeleteManyOp, Repository, Sort, UpdateManyOp, UpdateOp, WriteOp
+
+DEFAULT_INDEXED_FIELDS = ("current_dimension", "type")
+
+# Intentos de muestreo por rechazo antes de recorrer todos los candidatos
+SAMPLE_ATTEMPTS_PER_ITEM = 8
+
+_MISSING = object()
+
+
+# --- Valores y comparaciones (semántica de MongoDB) ---
+
+
+def _stored(value: Any) -> Any:
+    """Como lo guardaría MongoDB: fechas en UTC sin zona y con precisión de milisegundos."""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    if isinstance(value, (dict, list)):
+        return deepcopy(value)
+    return value
+
+
+def _type_rank(value: Any) -> int:
+    """Orden entre tipos de BSON: null < números < cadenas < objetos < ObjectId < bool < fecha."""
+    if value is None or value is _MISSING:
+        return 0
+    if isinstance(value, bool):
+        return 8
+    if isinstance(value, (int, float)):
+        return 1
+    if isinstance(value, str):
+        return 2
+    if isinstance(value, dict):
+        return 3
+    if isinstance(value, list):
+        return 4
+    if isinstance(value, ObjectId):
+        return 7
+    if isinstance(value, datetime):
+        return 9
+    return 10
+
+
+def _sort_key(value: Any) -> tuple:
+    rank = _type_rank(value)
+    if rank == 0:
+        return (0, 0)
+    if rank in (3, 4, 10):
+        return (rank, repr(value))
+    return (rank, value)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _equals(value: Any, expected: Any) -> bool:
+    if value is _MISSING:
+        return expected is None
+    if isinstance(value, bool) or isinstance(expected, bool):
+        return type(value) is type(expected) and value == expected
+    return value == expected
+
+
+def _compare(value: Any, operand: Any, test: Callable[[Any, Any], bool]) -> bool:
+    """$gt/$lt...: solo comparan valores del mismo tipo de BSON (un campo ausente no cumple)."""
+    if value is _MISSING or _type_rank(value) != _type_rank(operand):
+        return False
+    return test(_sort_key(value), _sort_key(operand))
+
+
+_COMPARISONS = {
+    "$gt": lambda a, b: a > b,
+    "$gte": lambda a, b: a >= b,
+    "$lt": lambda a, b: a < b,
+    "$lte": lambda a, b: a <= b,
+}
+
+
+def _match_operators(value: Any, conditions: dict) -> bool:
+    for op, operand in conditions.items():
+        if op == "$eq":
+            ok = _equals(value, operand)
+        elif op == "$ne":
+            ok = not _equals(value, operand)
+        elif op == "$in":
+            ok = any(_equals(value, item) for item in operand)
+        elif op == "$nin":
+            ok = not any(_equals(value, item) for item in operand)
+        elif op == "$exists":
+            ok = (value is not _MISSING) == bool(operand)
+        elif op in _COMPARISONS:
+            ok = _compare(value, operand, _COMPARISONS[op])
+        else:
+            raise OperationFailure(f"Operador de consulta no soportado en memoria: {op}")
+        if not ok:
+            return False
+    return True
+
+
+def _is_operator_dict(condition: Any) -> bool:
+    return isinstance(condition, dict) and bool(condition) and next(iter(condition)).startswith("$")
+
+
+def matches(doc: dict, filter: dict) -> bool:
+    """Indica si el documento cumple el filtro."""
+    for key, condition in filter.items():
+        if key == "$or":
+            ok = any(matches(doc, sub) for sub in condition)
+        elif key == "$and":
+            ok = all(matches(doc, sub) for sub in condition)
+        elif key == "$nor":
+            ok = not any(matches(doc, sub) for sub in condition)
+        elif _is_operator_dict(condition):
+            ok = _match_operators(doc.get(key, _MISSING), condition)
+        else:
+            ok = _equals(doc.get(key, _MISSING), condition)
+        if not ok:
+            return False
+    return True
+
+
+def project(doc: dict, projection: Optional[dict]) -> dict:
+    """Copia del documento con la proyección aplicada (inclusión o exclusión)."""
+    if not projection:
+        return dict(doc)
+    fields = [f for f in projection if f != "_id"]
+    include_id = bool(projection.get("_id", 1))
+    if fields and all(projection[f] for f in fields):
+        result = {f: doc[f] for f in fields if f in doc}
+    elif not fields:
+        result = {}
+    else:
+        result = {k: v for k, v in doc.items() if projection.get(k, 1) and k != "_id"}
+    if include_id and "_id" in doc:
+        result["_id"] = doc["_id"]
+    return result
+
+
+def _sorted(docs: list[dict], sort: Sort, limit: int) -> list[dict]:
+    def key(doc: dict) -> tuple:
+        return tuple(_sort_key(doc.get(field, _MISSING)) for field, _ in sort)
+
+    if limit and all(direction > 0 for _, direction in sort):
+        return heapq.nsmallest(limit, docs, key=key)
+    # Ordenación estable por campos de menor a mayor prioridad
+    for field, direction in reversed(sort):
+        docs.sort(key=lambda doc: _sort_key(doc.get(field, _MISSING)), reverse=direction < 0)
+    return docs[:limit] if limit else docs
+
+
+def _apply_update(doc: dict, update: dict, inserting: bool = False) -> bool:
+    """Aplica $set/$unset/$inc (y $setOnInsert al insertar) sobre `doc`; indica si cambió."""
+    modified = False
+    for op, fields in update.items():
+        if op == "$setOnInsert" and not inserting:
+            continue
+        for field, value in fields.items():
+            if field == "_id" and op != "$setOnInsert":
+                raise OperationFailure("No se puede modificar el campo inmutable '_id'")
+            current = doc.get(field, _MISSING)
+            if op in ("$set", "$setOnInsert"):
+                new = _stored(value)
+            elif op == "$inc":
+                new = (0 if current is _MISSING else current) + value
+            elif op == "$unset":
+                if current is not _MISSING:
+                    del doc[field]
+                    modified = True
+                continue
+            else:
+                raise OperationFailure(f"Operador de actualización no soportado en memoria: {op}")
+            if current is _MISSING or not (type(current) is type(new) and current == new):
+                doc[field] = new
+                modified = True
+    return modified
+
+
+def _update_result(matched: int, modified: int, upserted_id: Any = None) -> UpdateResult:
+    raw: dict[str, Any] = {"n": matched, "nModified": modified}
+    if upserted_id is not None:
+        raw["n"] = 1
+        raw["upserted"] = upserted_id
+    return UpdateResult(raw, acknowledged=True)
+
+
+class MemoryCursor:
+    """Resultado ya materializado de un find() (instantánea en el momento de la consulta)."""
+
+    def __init__(self, docs: list[dict]) -> None:
+        self._docs = docs
+
+    async def __aiter__(self) -> AsyncIterator[dict]:
+        for doc in self._docs:
+            yield doc
+
+    async def to_list(self, length: Optional[int] = None) -> list[dict]:
+        return self._docs[:length] if length else list(self._docs)
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryRepository(Repository):
+    """Colección en memoria: dict por _id, lista para muestreo O(1) e índices de igualdad y rango."""
+
+    def __init__(
+        self,
+        name: str,
+        indexed_fields: Iterable[str] = DEFAULT_INDEXED_FIELDS,
+        range_fields: Iterable[str] = (),
+    ) -> None:
+        self.name = name
+        self._docs: dict[Any, dict] = {}
+        # Ids en una lista (con su posición) para elegir uno al azar en O(1)
+        self._ids: list[Any] = []
+        self._positions: dict[Any, int] = {}
+        self._indexes: dict[str, dict[Any, set]] = {field: {} for field in indexed_fields}
+        # Índices ordenados: lista de (valor, secuencia, _id); la secuencia desempata sin comparar ids
+        self._ranges: dict[str, list[tuple]] = {field: [] for field in range_fields}
+        self._range_entries: dict[str, dict[Any, tuple]] = {field: {} for field in range_fields}
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # --- Mantenimiento del almacén e índices ---
+
+    def _add(self, doc: dict) -> None:
+        oid = doc["_id"]
+        self._docs[oid] = doc
+        self._positions[oid] = len(self._ids)
+        self._ids.append(oid)
+        self._index(doc)
+
+    def _remove(self, oid: Any) -> dict:
+        doc = self._docs.pop(oid)
+        position = self._positions.pop(oid)
+        last = self._ids.pop()
+        if last != oid:
+            self._ids[position] = last
+            self._positions[last] = position
+        self._unindex(doc)
+        return doc
+
+    def _replace(self, old: dict, new: dict) -> None:
+        self._docs[new["_id"]] = new
+        for field in (*self._indexes, *self._ranges):
+            if old.get(field, _MISSING) != new.get(field, _MISSING):
+                self._unindex(old, [field])
+                self._index(new, [field])
+
+    def _index(self, doc: dict, fields: Optional[Iterable[str]] = None) -> None:
+        oid = doc["_id"]
+        for field in self._indexes if fields is None else fields:
+            if field in self._indexes:
+                self._indexes[field].setdefault(doc.get(field), set()).add(oid)
+        for field in self._ranges if fields is None else fields:
+            value = doc.get(field)
+            if field in self._ranges and _is_number(value):
+                entry = (value, next(self._sequence), oid)
+                insort(self._ranges[field], entry)
+                self._range_entries[field][oid] = entry
+
+    def _unindex(self, doc: dict, fields: Optional[Iterable[str]] = None) -> None:
+        oid = doc["_id"]
+        for field in self._indexes if fields is None else fields:
+            bucket = self._indexes.get(field, {}).get(doc.get(field))
+            if bucket is not None:
+                bucket.discard(oid)
+                if not bucket:
+                    del self._indexes[field][doc.get(field)]
+        for field in self._ranges if fields is None else fields:
+            entry = self._range_entries.get(field, {}).pop(oid, None)
+            if entry is not None:
+                entries = self._ranges[field]
+                del entries[bisect_left(entries, entry)]
+
+    def _range_scan(self, filter: dict, sort: Sort, limit: int) -> Optional[list[dict]]:
+        """
+        Recorre el índice ordenado si se ordena ascendente por un campo con índice de rango
+        y el filtro lo acota con comparaciones numéricas ($gt/$gte/$lt/$lte): O(log n + k).
+        Devuelve None si la consulta no tiene esa forma.
+        """
+        if len(sort) != 1 or sort[0][1] != 1 or sort[0][0] not in self._ranges:
+            return None
+        field = sort[0][0]
+        condition = filter.get(field)
+        if (
+            not _is_operator_dict(condition)
+            or not set(condition) <= set(_COMPARISONS)
+            or not all(_is_number(value) for value in condition.values())
+        ):
+            return None
+        entries = self._ranges[field]
+        low = max((condition[op] for op in ("$gt", "$gte") if op in condition), default=None)
+        upper = {op: value for op, value in condition.items() if op in ("$lt", "$lte")}
+        docs: list[dict] = []
+        for position in range(0 if low is None else bisect_left(entries, (low,)), len(entries)):
+            value, _, oid = entries[position]
+            if upper and not _match_operators(value, upper):
+                break
+            doc = self._docs[oid]
+            if matches(doc, filter):
+                docs.append(doc)
+                if len(docs) >= limit:
+                    break
+        return docs
+
+    def _candidate_ids(self, filter: dict) -> Iterable[Any]:
+        """Ids a evaluar: por _id o por el índice de igualdad más selectivo; si no, todos."""
+        condition = filter.get("_id", _MISSING)
+        if condition is not _MISSING:
+            if not _is_operator_dict(condition):
+                return [condition]
+            if "$in" in condition:
+                return list(dict.fromkeys(condition["$in"]))
+        best: Optional[set] = None
+        for field, index in self._indexes.items():
+            condition = filter.get(field, _MISSING)
+            if condition is _MISSING:
+                continue
+            if not _is_operator_dict(condition):
+                bucket = index.get(condition, set())
+            elif set(condition) == {"$in"}:
+                bucket = set().union(*(index.get(value, set()) for value in condition["$in"]))
+            else:
+                continue
+            if best is None or len(bucket) < len(best):
+                best = bucket
+        return list(best) if best is not None else list(self._ids)
+
+    def _matching(self, filter: dict) -> list[dict]:
+        docs = []
+        for oid in self._candidate_ids(filter):
+            doc = self._docs.get(oid)
+            if doc is not None and matches(doc, filter):
+                docs.append(doc)
+        return docs
+
+    def _first(self, filter: dict) -> Optional[dict]:
+        for oid in self._candidate_ids(filter):
+            doc = self._docs.get(oid)
+            if doc is not None and matches(doc, filter):
+                return doc
+        return None
+
+    def _insert(self, document: dict) -> Any:
+        if "_id" not in document:
+            document["_id"] = ObjectId()
+        if document["_id"] in self._docs:
+            raise DuplicateKeyError(
+                f"E11000 duplicate key error collection: {self.name} index: _id_ "
+                f"dup key: {{ _id: {document['_id']!r} }}",
+                code=11000,
+            )
+        self._add({key: _stored(value) for key, value in document.items()})
+        return document["_id"]
+
+    def _update(self, doc: dict, update: dict) -> tuple[dict, bool]:
+        new = dict(doc)
+        modified = _apply_update(new, update)
+        if modified:
+            self._replace(doc, new)
+        return new, modified
+
+    def _upsert(self, filter: dict, update: dict) -> Any:
+        doc = {
+            key: _stored(value)
+            for key, value in filter.items()
+            if not key.startswith("$") and not _is_operator_dict(value)
+        }
+        _apply_update(doc, update, inserting=True)
+        return self._insert(doc)
+
+    # --- Lecturas ---
+
+    def find(
+        self,
+        filter: dict,
+        projection: Optional[dict] = None,
+        *,
+        sort: Optional[Sort] = None,
+        limit: int = 0,
+        batch_size: int = 0,
+        session: Any = None,
+    ) -> MemoryCursor:
+        docs = self._range_scan(filter, sort, limit) if sort and limit else None
+        if docs is None:
+            docs = self._matching(filter)
+            if sort:
+                docs = _sorted(docs, sort, limit)
+            elif limit:
+                docs = docs[:limit]
+        return MemoryCursor([project(doc, projection) for doc in docs])
+
+    async def find_one(
+        self, filter: dict, projection: Optional[dict] = None, *, session: Any = None
+    ) -> Optional[dict]:
+        doc = self._first(filter)
+        return project(doc, projection) if doc is not None else None
+
+    async def count_by(self, fields: Sequence[str], filter: Optional[dict] = None) -> dict[tuple, int]:
+        counts: dict[tuple, int] = {}
+        for doc in self._matching(filter or {}):
+            key = tuple(doc.get(field) for field in fields)
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    async def sample(self, filter: dict, size: int, projection: Optional[dict] = None) -> list[dict]:
+        """
+        Muestreo uniforme sin reemplazo: por rechazo sobre la lista de ids (O(1) por intento
+        si el filtro deja pasar a la mayoría); si no basta, se completa con los candidatos.
+        """
+        chosen: dict[Any, dict] = {}
+        if self._ids and not any(
+            field in filter and not _is_operator_dict(filter[field])
+            for field in ("_id", *self._indexes)
+        ):
+            for _ in range(size * SAMPLE_ATTEMPTS_PER_ITEM):
+                if len(chosen) >= size:
+                    break
+                doc = self._docs[random.choice(self._ids)]
+                if doc["_id"] not in chosen and matches(doc, filter):
+                    chosen[doc["_id"]] = doc
+        if len(chosen) < size:
+            rest = [doc for doc in self._matching(filter) if doc["_id"] not in chosen]
+            for doc in random.sample(rest, min(size - len(chosen), len(rest))):
+                chosen[doc["_id"]] = doc
+        return [project(doc, projection) for doc in chosen.values()]
+
+    # --- Escrituras ---
+
+    async def insert_one(self, document: dict, *, session: Any = None) -> InsertOneResult:
+        return InsertOneResult(self._insert(document), acknowledged=True)
+
+    async def insert_many(
+        self, documents: Sequence[dict], *, ordered: bool = True, session: Any = None
+    ) -> InsertManyResult:
+        inserted: list[Any] = []
+        errors: list[dict] = []
+        for index, document in enumerate(documents):
+            try:
+                inserted.append(self._insert(document))
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": e.code, "errmsg": str(e), "op": document})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError(
+                {
+                    "writeErrors": errors,
+                    "writeConcernErrors": [],
+                    "nInserted": len(inserted),
+                    "nUpserted": 0,
+                    "nMatched": 0,
+                    "nModified": 0,
+                    "nRemoved": 0,
+                    "upserted": [],
+                }
+            )
+        return InsertManyResult(inserted, acknowledged=True)
+
+    async def update_one(
+        self, filter: dict, update: dict, *, upsert: bool = False, session: Any = None
+    ) -> UpdateResult:
+        doc = self._first(filter)
+        if doc is None:
+            return _update_result(0, 0, self._upsert(filter, update) if upsert else None)
+        _, modified = self._update(doc, update)
+        return _update_result(1, int(modified))
+
+    async def update_many(self, filter: dict, update: dict, *, session: Any = None) -> UpdateResult:
+        docs = self._matching(filter)
+        modified = sum(self._update(doc, update)[1] for doc in docs)
+        return _update_result(len(docs), modified)
+
+    async def find_one_and_update(
+        self,
+        filter: dict,
+        update: dict,
+        *,
+        projection: Optional[dict] = None,
+        return_document: bool = ReturnDocument.BEFORE,
+        session: Any = None,
+    ) -> Optional[dict]:
+        doc = self._first(filter)
+        if doc is None:
+            return None
+        new, _ = self._update(doc, update)
+        return project(new if return_document == ReturnDocument.AFTER else doc, projection)
+
+    async def find_one_and_delete(
+        self, filter: dict, *, projection: Optional[dict] = None, session: Any = None
+    ) -> Optional[dict]:
+        doc = self._first(filter)
+        if doc is None:
+            return None
+        return project(self._remove(doc["_id"]), projection)
+
+    async def delete_one(self, filter: dict, *, session: Any = None) -> DeleteResult:
+        doc = self._first(filter)
+        if doc is not None:
+            self._remove(doc["_id"])
+        return DeleteResult({"n": int(doc is not None)}, acknowledged=True)
+
+    async def delete_many(self, filter: dict, *, session: Any = None) -> DeleteResult:
+        docs = self._matching(filter)
+        for doc in docs:
+            self._remove(doc["_id"])
+        return DeleteResult({"n": len(docs)}, acknowledged=True)
+
+    async def bulk_write(
+        self, operations: Sequence[WriteOp], *, ordered: bool = True, session: Any = None
+    ) -> BulkWriteResult:
+        summary: dict[str, Any] = {
+            "nInserted": 0,
+            "nMatched": 0,
+            "nModified": 0,
+            "nRemoved": 0,
+            "nUpserted": 0,
+            "upserted": [],
+        }
+        for index, op in enumerate(operations):
+            if isinstance(op, UpdateOp):
+                result = await self.update_one(op.filter, op.update, upsert=op.upsert)
+                if result.upserted_id is not None:
+                    summary["nUpserted"] += 1
+                    summary["upserted"].append({"index": index, "_id": result.upserted_id})
+                summary["nMatched"] += result.matched_count
+                summary["nModified"] += result.modified_count
+            elif isinstance(op, UpdateManyOp):
+                result = await self.update_many(op.filter, op.update)
+                summary["nMatched"] += result.matched_count
+                summary["nModified"] += result.modified_count
+            elif isinstance(op, DeleteManyOp):
+                summary["nRemoved"] += (await self.delete_many(op.filter)).deleted_count
+            else:
+                raise TypeError(f"Operación de bulk_write no soportada: {op!r}")
+        return BulkWriteResult(summary, acknowledged=True)
+
+
+class MemoryStore:
+    """Colecciones en memoria por nombre (el equivalente a una base de datos)."""
+
+    def __init__(
+        self, indexed_fields: Iterable[str] = DEFAULT_INDEXED_FIELDS, range_fields: Iterable[str] = ()
+    ) -> None:
+        self.indexed_fields = tuple(indexed_fields)
+        self.range_fields = tuple(range_fields)
+        self._collections: dict[str, MemoryRepository] = {}
+
+    def __getitem__(self, name: str) -> MemoryRepository:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = MemoryRepository(
+                name, self.indexed_fields, self.range_fields
+            )
+        return collection
@@ -0,0 +1,136 @@
+"""
+Repositorio sobre una colección de MongoDB (Motor). Traduce count_by y sample a
+pipelines de agregación y las operaciones de bulk_write a las de pymongo.
+"""
+from typing import Any, Optional, Sequence
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import DeleteMany, ReturnDocument, UpdateMany, UpdateOne
+from pymongo.results import (
+    BulkWriteResult,
+    DeleteResult,
+    InsertManyResult,
+    InsertOneResult,
+    UpdateResult,
+)
+
+from app.storage.base import (
+    Cursor,
+    DeleteManyOp,
+    Repository,
+    Sort,
+    UpdateManyOp,
+    UpdateOp,
+    WriteOp,
+)
+
+
+def sample_pipeline(filter: dict, size: int, projection: Optional[dict] = None) -> list[dict]:
+    """$match + $sample (+ $project): muestreo aleatorio de los documentos que cumplen el filtro."""
+    pipeline: list[dict] = [{"$match": filter}, {"$sample": {"size": size}}]
+    if projection:
+        pipeline.append({"$project": projection})
+    return pipeline
+
+
+def count_by_pipeline(fields: Sequence[str], filter: Optional[dict] = None) -> list[dict]:
+    pipeline: list[dict] = [{"$match": filter}] if filter else []
+    pipeline.append({"$group": {"_id": {f: f"${f}" for f in fields}, "count": {"$sum": 1}}})
+    return pipeline
+
+
+def _pymongo_op(op: WriteOp):
+    if isinstance(op, UpdateOp):
+        return UpdateOne(op.filter, op.update, upsert=op.upsert)
+    if isinstance(op, UpdateManyOp):
+        return UpdateMany(op.filter, op.update)
+    if isinstance(op, DeleteManyOp):
+        return DeleteMany(op.filter)
+    raise TypeError(f"Operación de bulk_write no soportada: {op!r}")
+
+
+class MongoRepository(Repository):
+    def __init__(self, collection: AsyncIOMotorCollection) -> None:
+        self.collection = collection
+        self.name = collection.name
+
+    def find(
+        self,
+        filter: dict,
+        projection: Optional[dict] = None,
+        *,
+        sort: Optional[Sort] = None,
+        limit: int = 0,
+        batch_size: int = 0,
+        session: Any = None,
+    ) -> Cursor:
+        cursor = self.collection.find(filter, projection, session=session)
+        if sort:
+            cursor = cursor.sort(list(sort))
+        if limit:
+            cursor = cursor.limit(limit)
+        if batch_size:
+            cursor = cursor.batch_size(batch_size)
+        return cursor
+
+    async def find_one(
+        self, filter: dict, projection: Optional[dict] = None, *, session: Any = None
+    ) -> Optional[dict]:
+        return await self.collection.find_one(filter, projection, session=session)
+
+    async def count_by(self, fields: Sequence[str], filter: Optional[dict] = None) -> dict[tuple, int]:
+        return {
+            tuple(row["_id"].get(f) for f in fields): row["count"]
+            async for row in self.collection.aggregate(count_by_pipeline(fields, filter))
+        }
+
+    async def sample(self, filter: dict, size: int, projection: Optional[dict] = None) -> list[dict]:
+        cursor = self.collection.aggregate(sample_pipeline(filter, size, projection))
+        return await cursor.to_list(length=size)
+
+    async def insert_one(self, document: dict, *, session: Any = None) -> InsertOneResult:
+        return await self.collection.insert_one(document, session=session)
+
+    async def insert_many(
+        self, documents: Sequence[dict], *, ordered: bool = True, session: Any = None
+    ) -> InsertManyResult:
+        return await self.collection.insert_many(documents, ordered=ordered, session=session)
+
+    async def update_one(
+        self, filter: dict, update: dict, *, upsert: bool = False, session: Any = None
+    ) -> UpdateResult:
+        return await self.collection.update_one(filter, update, upsert=upsert, session=session)
+
+    async def update_many(self, filter: dict, update: dict, *, session: Any = None) -> UpdateResult:
+        return await self.collection.update_many(filter, update, session=session)
+
+    async def find_one_and_update(
+        self,
+        filter: dict,
+        update: dict,
+        *,
+        projection: Optional[dict] = None,
+        return_document: bool = ReturnDocument.BEFORE,
+        session: Any = None,
+    ) -> Optional[dict]:
+        return await self.collection.find_one_and_update(
+            filter, update, projection=projection, return_document=return_document, session=session
+        )
+
+    async def find_one_and_delete(
+        self, filter: dict, *, projection: Optional[dict] = None, session: Any = None
+    ) -> Optional[dict]:
+        return await self.collection.find_one_and_delete(filter, projection=projection, session=session)
+
+    async def delete_one(self, filter: dict, *, session: Any = None) -> DeleteResult:
+        return await self.collection.delete_one(filter, session=session)
+
+    async def delete_many(self, filter: dict, *, session: Any = None) -> DeleteResult:
+        return await self.collection.delete_many(filter, session=session)
+
+    async def bulk_write(
+        self, operations: Sequence[WriteOp], *, ordered: bool = True, session: Any = None
+    ) -> BulkWriteResult:
+        return await self.collection.bulk_write(
+            [_pymongo_op(op) for op in operations], ordered=ordered, session=session
+        )
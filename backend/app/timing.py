@@ -0,0 +1,76 @@
+"""
+Desglose del tiempo de cada petición por fases: comandos de MongoDB, conversión de
+documentos (modelos Pydantic / dicts de respuesta) y serialización JSON.
+El middleware de métricas abre un RequestTiming por petición (ContextVar); los helpers
+de app/utils.py y el listener de comandos de Mongo suman su tiempo a la petición en
+curso. Fuera de una petición (tareas en segundo plano) no registran nada.
+"""
+import threading
+from contextvars import ContextVar, Token
+from time import perf_counter
+from typing import Optional
+
+PHASE_MONGO = "mongo"
+PHASE_CONVERSION = "conversion"
+PHASE_SERIALIZATION = "serialization"
+PHASES = (PHASE_MONGO, PHASE_CONVERSION, PHASE_SERIALIZATION)
+
+
+class RequestTiming:
+    """Segundos acumulados por fase en una petición."""
+
+    __slots__ = ("started", "phases", "_lock")
+
+    def __init__(self) -> None:
+        self.started = perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        # Motor ejecuta pymongo en un pool de hilos: el listener suma desde otros hilos
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[phase] += seconds
+
+    def elapsed(self) -> float:
+        return perf_counter() - self.started
+
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+def start_request_timing() -> tuple[RequestTiming, Token]:
+    timing = RequestTiming()
+    return timing, _current.set(timing)
+
+
+def finish_request_timing(token: Token) -> None:
+    _current.reset(token)
+
+
+def record_phase(phase: str, seconds: float) -> None:
+    """Suma `seconds` a la fase de la petición en curso (si la hay)."""
+    timing = _current.get()
+    if timing is not None:
+        timing.add(phase, seconds)
+
+
+class _PhaseTimer:
+    __slots__ = ("phase", "timing", "start")
+
+    def __init__(self, phase: str) -> None:
+        self.phase = phase
+
+    def __enter__(self) -> "_PhaseTimer":
+        self.timing = _current.get()
+        if self.timing is not None:
+            self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.timing is not None:
+            self.timing.add(self.phase, perf_counter() - self.start)
+
+
+def timed(phase: str) -> _PhaseTimer:
+    """Context manager que suma la duración del bloque a `phase` de la petición en curso."""
+    return _PhaseTimer(phase)
@@ -1,35 +1,211 @@
 """
-Utilidades compartidas (conversión de documentos a esquemas, etc.).
+Utilidades compartidas (conversión de documentos a esquemas, cursores de paginación, etc.).
 """
-from typing import Optional
+import base64
+import binascii
+import json
+import secrets
+import zlib
+from operator import itemgetter
+from typing import Hashable, Iterable, Optional, Tuple
+
+import orjson
+from bson import ObjectId
 
 from app.schemas import CharacterResponse, StoneResponse
+from app.timing import PHASE_CONVERSION, PHASE_SERIALIZATION, timed
 
 
 def doc_to_character_response(doc: Optional[dict]) -> Optional[CharacterResponse]:
     """Convierte un documento MongoDB de personaje a CharacterResponse."""
     if not doc or doc.get("type") == "dimensional_stone":
         return None
-    return CharacterResponse(
-        id=str(doc["_id"]),
-        name=doc["name"],
-        status=doc["status"],
-        species=doc["species"],
-        origin_dimension=doc["origin_dimension"],
-        current_dimension=doc["current_dimension"],
-        image_url=doc.get("image_url"),
-        captured_at=doc["captured_at"],
-        stolen_by_rick_prime=doc.get("stolen_by_rick_prime", False),
-        original_dimension=doc.get("original_dimension"),
-    )
+    with timed(PHASE_CONVERSION):
+        return CharacterResponse(
+            id=str(doc["_id"]),
+            name=doc["name"],
+            status=doc["status"],
+            species=doc["species"],
+            origin_dimension=doc["origin_dimension"],
+            current_dimension=doc["current_dimension"],
+            image_url=doc.get("image_url"),
+            captured_at=doc["captured_at"],
+            stolen_by_rick_prime=doc.get("stolen_by_rick_prime", False),
+            original_dimension=doc.get("original_dimension"),
+        )
 
 
 def doc_to_stone_response(doc: Optional[dict]) -> Optional[StoneResponse]:
     """Convierte un documento MongoDB de piedra dimensional a StoneResponse."""
     if not doc or doc.get("type") != "dimensional_stone":
         return None
-    return StoneResponse(
-        id=str(doc["_id"]),
-        dimension=doc.get("dimension", ""),
-        previous_character_id=doc.get("previous_character_id", ""),
-    )
+    with timed(PHASE_CONVERSION):
+        return StoneResponse(
+            id=str(doc["_id"]),
+            dimension=doc.get("dimension", ""),
+            previous_character_id=doc.get("previous_character_id", ""),
+        )
+
+
+# --- Serialización rápida de listados ---
+# Los documentos se validan al escribir (CharacterCreate/CharacterUpdate), así que los
+# listados se serializan directamente a JSON sin reconstruir modelos Pydantic. El formato
+# es el mismo que el de list[CharacterResponse] / list[StoneResponse].
+
+CHARACTER_LIST_PROJECTION = {
+    "name": 1,
+    "status": 1,
+    "species": 1,
+    "origin_dimension": 1,
+    "current_dimension": 1,
+    "image_url": 1,
+    "captured_at": 1,
+    "stolen_by_rick_prime": 1,
+    "original_dimension": 1,
+}
+
+STONE_LIST_PROJECTION = {"dimension": 1, "previous_character_id": 1}
+
+
+# Campos seleccionables con ?fields= (orden de CharacterResponse); `id` siempre se incluye
+CHARACTER_FIELDS = tuple(CharacterResponse.model_fields)
+
+
+def parse_character_fields(raw: Optional[str]) -> Optional[tuple[str, ...]]:
+    """
+    Convierte "name,status" en la tupla de campos a devolver (en orden de CharacterResponse,
+    con `id`). None o vacío = todos. Lanza ValueError si hay campos desconocidos.
+    """
+    if raw is None or not raw.strip():
+        return None
+    requested = {f.strip() for f in raw.split(",") if f.strip()}
+    unknown = requested - set(CHARACTER_FIELDS)
+    if unknown:
+        raise ValueError(f"Campos desconocidos: {', '.join(sorted(unknown))}")
+    requested.add("id")
+    return tuple(f for f in CHARACTER_FIELDS if f in requested)
+
+
+def character_list_projection(fields: Optional[tuple[str, ...]] = None) -> dict:
+    """Proyección de Mongo para un listado; `name` se pide siempre (clave del cursor)."""
+    if fields is None:
+        return CHARACTER_LIST_PROJECTION
+    projection = {f: 1 for f in fields if f != "id"}
+    projection["name"] = 1
+    return projection
+
+
+def character_row(doc: dict) -> dict:
+    """Documento de personaje como dict con el formato de CharacterResponse (sin validar)."""
+    return {
+        "name": doc["name"],
+        "status": doc["status"],
+        "species": doc["species"],
+        "origin_dimension": doc["origin_dimension"],
+        "current_dimension": doc["current_dimension"],
+        "image_url": doc.get("image_url"),
+        "captured_at": doc["captured_at"],
+        "id": str(doc["_id"]),
+        "stolen_by_rick_prime": doc.get("stolen_by_rick_prime", False),
+        "original_dimension": doc.get("original_dimension"),
+    }
+
+
+# Lectura de cada campo seleccionable desde el documento proyectado
+_FIELD_GETTERS = {
+    "name": itemgetter("name"),
+    "status": itemgetter("status"),
+    "species": itemgetter("species"),
+    "origin_dimension": itemgetter("origin_dimension"),
+    "current_dimension": itemgetter("current_dimension"),
+    "image_url": lambda doc: doc.get("image_url"),
+    "captured_at": itemgetter("captured_at"),
+    "id": lambda doc: str(doc["_id"]),
+    "stolen_by_rick_prime": lambda doc: doc.get("stolen_by_rick_prime", False),
+    "original_dimension": lambda doc: doc.get("original_dimension"),
+}
+
+
+def characters_to_json(docs: Iterable[dict], fields: Optional[tuple[str, ...]] = None) -> bytes:
+    """
+    Serializa documentos de personaje (con character_list_projection) a un array JSON.
+    Con `fields` solo se incluyen esos campos.
+    """
+    with timed(PHASE_CONVERSION):
+        if fields is None:
+            rows = [character_row(doc) for doc in docs]
+        else:
+            getters = [(f, _FIELD_GETTERS[f]) for f in fields]
+            rows = [{f: get(doc) for f, get in getters} for doc in docs]
+    with timed(PHASE_SERIALIZATION):
+        return orjson.dumps(rows)
+
+
+def character_to_json(doc: dict) -> bytes:
+    """Serializa un documento de personaje (con CHARACTER_LIST_PROJECTION) a JSON."""
+    with timed(PHASE_CONVERSION):
+        row = character_row(doc)
+    with timed(PHASE_SERIALIZATION):
+        return orjson.dumps(row)
+
+
+def stone_row(doc: dict) -> dict:
+    """Documento de piedra como dict con el formato de StoneResponse."""
+    return {
+        "id": str(doc["_id"]),
+        "dimension": doc.get("dimension", ""),
+        "previous_character_id": doc.get("previous_character_id", ""),
+    }
+
+
+def stones_to_json(docs: Iterable[dict]) -> bytes:
+    """Serializa documentos de piedra (con STONE_LIST_PROJECTION) a un array JSON."""
+    with timed(PHASE_CONVERSION):
+        rows = [stone_row(doc) for doc in docs]
+    with timed(PHASE_SERIALIZATION):
+        return orjson.dumps(rows)
+
+
+# --- ETags (GET condicional) ---
+
+# Distingue arranques: las revisiones en memoria vuelven a 0 al reiniciar el proceso
+_ETAG_BOOT_ID = secrets.token_hex(4)
+
+
+def make_etag(revision: int, variant: Hashable = None) -> str:
+    """ETag fuerte a partir de una revisión y de la variante de la petición (filtros, página...)."""
+    return f'"{_ETAG_BOOT_ID}-{revision}-{zlib.crc32(repr(variant).encode()):08x}"'
+
+
+def etag_headers(etag: str) -> dict[str, str]:
+    """Cabeceras de una respuesta con ETag: el cliente debe revalidar siempre (no-cache)."""
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comprueba la cabecera If-None-Match (lista de ETags, W/ o `*`) contra `etag`."""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+# --- Cursores de paginación (keyset sobre (name, _id)) ---
+
+
+def encode_cursor(name: str, oid: ObjectId) -> str:
+    """Codifica la clave (name, _id) del último elemento de una página como cursor opaco."""
+    raw = json.dumps([name, str(oid)], ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, ObjectId]:
+    """Decodifica un cursor opaco a (name, _id). Lanza ValueError si no es válido."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        name, oid = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError, TypeError) as e:
+        raise ValueError("Cursor inválido") from e
+    if not isinstance(name, str) or not isinstance(oid, str) or not ObjectId.is_valid(oid):
+        raise ValueError("Cursor inválido")
+    return name, ObjectId(oid)
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga de la API REST (rutas de characters.py y rick_routes.py).
+Siembra N personajes repartidos en D dimensiones, lanza cada escenario con un cliente
+HTTP asíncrono (httpx) contra la app ASGI en proceso y mide p50/p95/p99 y peticiones
+por segundo. Los resultados se guardan en JSON; con --baseline se comparan contra una
+ejecución anterior y se sale con código 1 si algún escenario empeora más de --tolerance.
+
+Requiere MongoDB en ejecución y una base de datos *_bench (se vacía), o
+STORAGE_BACKEND=memory para medir la API sin base de datos. Uso (desde backend/):
+    MONGO_DB_NAME=portal_gun_lab_bench python -m benchmarks.api_load --scale 1k \\
+        --output benchmarks/results/api_1k.json
+    MONGO_DB_NAME=portal_gun_lab_bench python -m benchmarks.api_load --scale 1k \\
+        --baseline benchmarks/results/api_1k.json
+    STORAGE_BACKEND=memory python -m benchmarks.api_load --scale 100k
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from itertools import count
+from typing import Awaitable, Callable, Optional
+
+os.environ.setdefault("MONGO_DB_NAME", "portal_gun_lab_bench")
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+SEED_BATCH_SIZE = 10_000
+DEFAULT_TOLERANCE = 0.20
+
+# Escenario: función que recibe (cliente, índice de petición) y hace una petición
+Request = Callable[["httpx.AsyncClient", int], Awaitable["httpx.Response"]]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _character(i: int, dimension: str) -> dict:
+    return {
+        "name": f"Bench {i:07d}",
+        "status": ("alive", "dead", "unknown")[i % 3],
+        "species": ("Human", "Alien", "Robot")[i % 3],
+        "origin_dimension": dimension,
+        "current_dimension": dimension,
+        "image_url": None,
+        "captured_at": datetime.utcnow(),
+    }
+
+
+async def seed(characters: int, dimensions: list[str]) -> list[str]:
+    """Vacía la base de datos de benchmark e inserta los personajes por lotes."""
+    from app.cache import invalidate_all_character_lists, invalidate_all_characters
+    from app.database import (
+        RANDOM_KEY_FIELD,
+        get_characters_repository,
+        get_counters_repository,
+        get_stones_repository,
+    )
+    from app.services.counters_service import recount_dimension_counters
+
+    coll = get_characters_repository()
+    for repo in (coll, get_stones_repository(), get_counters_repository()):
+        await repo.delete_many({})
+    ids: list[str] = []
+    started = time.perf_counter()
+    for start in range(0, characters, SEED_BATCH_SIZE):
+        batch = [
+            {**_character(i, dimensions[i % len(dimensions)]), RANDOM_KEY_FIELD: random.random()}
+            for i in range(start, min(start + SEED_BATCH_SIZE, characters))
+        ]
+        result = await coll.insert_many(batch, ordered=False)
+        ids.extend(str(oid) for oid in result.inserted_ids)
+    await recount_dimension_counters()
+    invalidate_all_character_lists()
+    invalidate_all_characters()
+    print(f"Sembrados {characters} personajes en {len(dimensions)} dimensiones "
+          f"({time.perf_counter() - started:.1f}s)", file=sys.stderr)
+    return ids
+
+
+def scenarios(ids: list[str], dimensions: list[str], rng: random.Random) -> dict[str, Request]:
+    """Escenarios en orden de ejecución: lecturas, escrituras y por último los robos."""
+    created: list[str] = []
+
+    def payload(i: int) -> dict:
+        return {
+            "name": f"Load {i}",
+            "status": "alive",
+            "species": "Human",
+            "origin_dimension": dimensions[0],
+            "current_dimension": rng.choice(dimensions),
+        }
+
+    async def create(client, i):
+        r = await client.post("/api/characters", json=payload(i))
+        if r.status_code == 201:
+            created.append(r.json()["id"])
+        return r
+
+    async def delete(client, i):
+        if not created:
+            return await client.delete(f"/api/characters/{rng.choice(ids)}")
+        return await client.delete(f"/api/characters/{created.pop()}")
+
+    async def list_second_page(client, i):
+        # La misma dimensión en ambas páginas: el cursor solo vale para su listado
+        params = {"dimension": rng.choice(dimensions), "limit": 100}
+        first = await client.get("/api/characters", params=params)
+        cursor = first.headers.get("x-next-cursor")
+        if cursor is None:
+            return first
+        return await client.get("/api/characters", params={**params, "after": cursor})
+
+    async def export(client, i):
+        async with client.stream("GET", "/api/characters/export") as r:
+            async for _ in r.aiter_bytes():
+                pass
+            return r
+
+    return {
+        "list_all": lambda c, i: c.get("/api/characters"),
+        "list_dimension": lambda c, i: c.get(
+            "/api/characters", params={"dimension": rng.choice(dimensions)}
+        ),
+        "list_dimension_fields": lambda c, i: c.get(
+            "/api/characters",
+            params={"dimension": rng.choice(dimensions), "fields": "name,current_dimension"},
+        ),
+        "list_cursor_page": list_second_page,
+        "get_character": lambda c, i: c.get(f"/api/characters/{rng.choice(ids)}"),
+        "list_stones": lambda c, i: c.get("/api/stones"),
+        "random_insult": lambda c, i: c.get("/api/insults/random"),
+        "export": export,
+        "create": create,
+        "bulk_create": lambda c, i: c.post(
+            "/api/characters/bulk", json=[payload(i * 100 + j) for j in range(100)]
+        ),
+        "update": lambda c, i: c.put(
+            f"/api/characters/{rng.choice(ids)}", json={"status": rng.choice(["alive", "dead"])}
+        ),
+        "move": lambda c, i: c.post(
+            f"/api/characters/{rng.choice(ids)}/move",
+            json={"target_dimension": rng.choice(dimensions)},
+        ),
+        "batch_move": lambda c, i: c.post(
+            "/api/characters/move",
+            json={"ids": rng.sample(ids, min(50, len(ids))), "target_dimension": rng.choice(dimensions)},
+        ),
+        "delete": delete,
+        "steal": lambda c, i: c.post("/api/rick-prime/steal"),
+        "raid": lambda c, i: c.post("/api/rick-prime/steal", params={"count": 10}),
+    }
+
+
+# Escenarios pesados: menos peticiones (fracción del total)
+REQUEST_FRACTION = {"export": 0.01, "bulk_create": 0.1, "raid": 0.1}
+
+
+async def run_scenario(client, request: Request, requests: int, concurrency: int) -> dict:
+    """Lanza `requests` peticiones con `concurrency` trabajadores; devuelve latencias y RPS."""
+    samples: list[float] = []
+    errors = 0
+    next_index = count()
+
+    async def worker() -> None:
+        nonlocal errors
+        while (i := next(next_index)) < requests:
+            start = time.perf_counter()
+            try:
+                response = await request(client, i)
+                failed = response.status_code >= 500
+            except Exception:
+                failed = True
+            samples.append((time.perf_counter() - start) * 1000)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / elapsed, 1),
+        "mean_ms": round(statistics.mean(samples), 3),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list[str]:
+    """Regresiones de `current` frente a `baseline`: p95 o p99 más lentos o menos RPS."""
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if base[metric] > 0 and result[metric] > base[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {metric} {base[metric]:.3f} -> {result[metric]:.3f}"
+                )
+        if result["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {base['rps']:.1f} -> {result['rps']:.1f}")
+        if result["errors"] > base["errors"]:
+            regressions.append(f"{name}: errores {base['errors']} -> {result['errors']}")
+    return regressions
+
+
+async def main(args: argparse.Namespace) -> int:
+    import httpx
+
+    from app.database import DATABASE_NAME, STORAGE_MEMORY, storage_backend
+    from main import app
+
+    backend = storage_backend()
+    if backend != STORAGE_MEMORY and "bench" not in DATABASE_NAME:
+        raise SystemExit(
+            f"El benchmark vacía la base de datos: usa una *_bench (actual: {DATABASE_NAME})"
+        )
+    characters = SCALES[args.scale] if args.scale else args.characters
+    dimensions = [f"D-{i:03d}" for i in range(args.dimensions)]
+    rng = random.Random(args.seed)
+    selected = set(args.only.split(",")) if args.only else None
+
+    results: dict[str, dict] = {}
+    async with app.router.lifespan_context(app):
+        ids = await seed(characters, dimensions)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, request in scenarios(ids, dimensions, rng).items():
+                if selected and name not in selected:
+                    continue
+                requests = max(1, int(args.requests * REQUEST_FRACTION.get(name, 1.0)))
+                results[name] = await run_scenario(client, request, requests, args.concurrency)
+                r = results[name]
+                print(
+                    f"{name:<22} n={r['requests']:<6} rps={r['rps']:<9} p50={r['p50_ms']:.2f}ms "
+                    f"p95={r['p95_ms']:.2f}ms p99={r['p99_ms']:.2f}ms errores={r['errors']}",
+                    file=sys.stderr,
+                )
+
+    report = {
+        "meta": {
+            "characters": characters,
+            "dimensions": args.dimensions,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "storage": backend,
+            "python": platform.python_version(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados guardados en {args.output}", file=sys.stderr)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.tolerance)
+        for line in regressions:
+            print(f"REGRESIÓN {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"Sin regresiones frente a {args.baseline} (tolerancia {args.tolerance:.0%})", file=sys.stderr)
+    return 0
+
+
+def _parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--scale", choices=sorted(SCALES), help="Volumen predefinido (1k, 100k, 1m)")
+    parser.add_argument("--characters", type=int, default=1_000, help="Personajes a sembrar (sin --scale)")
+    parser.add_argument("--dimensions", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=500, help="Peticiones por escenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--only", help="Escenarios a ejecutar, separados por comas")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-cache", action="store_true", help="Desactiva las cachés en proceso")
+    parser.add_argument("--output", help="Fichero JSON donde guardar los resultados")
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior con el que comparar")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = _parse_args()
+    if arguments.no_cache:
+        # Antes de importar la app: las cachés leen su configuración al importarse
+        os.environ["LIST_CACHE_TTL_SECONDS"] = "0"
+        os.environ["CHARACTER_CACHE_TTL_SECONDS"] = "0"
+    sys.exit(asyncio.run(main(arguments)))
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Crea los índices declarados y comprueba con explain() que ninguna consulta caliente
+cae en COLLSCAN. Sale con código 1 si alguna lo hace.
+
+Requiere MongoDB en ejecución. Uso (desde backend/):
+    python -m benchmarks.check_query_plans
+"""
+import asyncio
+import sys
+
+from dotenv import load_dotenv
+
+from app.database import close_mongo_connection, connect_to_mongo, ensure_indexes
+from app.query_plans import explain_hot_queries
+from app.services.rick_prime_service import detect_legacy_stones
+
+
+async def main() -> int:
+    await connect_to_mongo()
+    try:
+        await ensure_indexes()
+        await detect_legacy_stones()
+        plans = await explain_hot_queries()
+    finally:
+        await close_mongo_connection()
+    failed = False
+    for name, stages in plans.items():
+        collscan = "COLLSCAN" in stages
+        failed = failed or collscan
+        print(f"{'COLLSCAN' if collscan else 'ok':<9} {name:<32} {' <- '.join(stages)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    sys.exit(asyncio.run(main()))
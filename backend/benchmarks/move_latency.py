@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Compara la latencia de mover un personaje:
+- legacy: find_one (regla de la bóveda Prime) + find_one_and_update (2 idas y vueltas)
+- condicional: un único find_one_and_update cuyo filtro excluye los trofeos
+
+Requiere MongoDB en ejecución. Uso (desde backend/):
+    MONGO_DB_NAME=portal_gun_lab_bench python -m benchmarks.move_latency --moves 2000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("MONGO_DB_NAME", "portal_gun_lab_bench")
+
+from pymongo import ReturnDocument
+
+from app.database import (
+    DATABASE_NAME,
+    close_mongo_connection,
+    connect_to_mongo,
+    get_characters_collection,
+)
+from app.services.rick_prime_service import DOC_TYPE_DIMENSIONAL_STONE, RICK_PRIME_DIMENSION
+
+DIMENSIONS = ["C-137", "C-131", "J19-Zeta-7"]
+
+
+def _character_filter() -> dict:
+    return {"type": {"$ne": DOC_TYPE_DIMENSIONAL_STONE}}
+
+
+async def _move_legacy(coll, oid, target: str) -> dict:
+    current = await coll.find_one({"_id": oid, **_character_filter()})
+    if current is None or current.get("current_dimension") == RICK_PRIME_DIMENSION:
+        raise RuntimeError("personaje no movible")
+    return await coll.find_one_and_update(
+        {"_id": oid, **_character_filter()},
+        {"$set": {"current_dimension": target}},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _move_conditional(coll, oid, target: str) -> dict:
+    result = await coll.find_one_and_update(
+        {
+            "_id": oid,
+            **_character_filter(),
+            "current_dimension": {"$ne": RICK_PRIME_DIMENSION},
+        },
+        {"$set": {"current_dimension": target}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if result is None:
+        raise RuntimeError("personaje no movible")
+    return result
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _run(name: str, move, coll, oids: list, moves: int) -> None:
+    samples = []
+    for i in range(moves):
+        oid = oids[i % len(oids)]
+        target = DIMENSIONS[i % len(DIMENSIONS)]
+        start = time.perf_counter()
+        await move(coll, oid, target)
+        samples.append((time.perf_counter() - start) * 1000)
+    print(
+        f"{name:<12} n={moves} mean={statistics.mean(samples):.3f}ms "
+        f"p50={_percentile(samples, 50):.3f}ms p95={_percentile(samples, 95):.3f}ms "
+        f"p99={_percentile(samples, 99):.3f}ms"
+    )
+
+
+async def main(characters: int, moves: int) -> None:
+    if "bench" not in DATABASE_NAME:
+        raise SystemExit(f"El benchmark vacía la colección: usa una base de datos *_bench (actual: {DATABASE_NAME})")
+    await connect_to_mongo()
+    try:
+        coll = get_characters_collection()
+        await coll.delete_many({})
+        docs = [
+            {
+                "type": "character",
+                "name": f"Morty {i}",
+                "status": "alive",
+                "species": "Human",
+                "origin_dimension": DIMENSIONS[i % len(DIMENSIONS)],
+                "current_dimension": DIMENSIONS[i % len(DIMENSIONS)],
+            }
+            for i in range(characters)
+        ]
+        result = await coll.insert_many(docs)
+        oids = result.inserted_ids
+        await _run("legacy", _move_legacy, coll, oids, moves)
+        await _run("condicional", _move_conditional, coll, oids, moves)
+        await coll.delete_many({})
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--characters", type=int, default=1000)
+    parser.add_argument("--moves", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.characters, args.moves))
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Compara la selección aleatoria de la víctima de Rick Prime:
+- sample: $match (no piedra, fuera de la bóveda) + $sample, que recorre el conjunto filtrado
+- random_key: búsqueda del primer personaje con clave aleatoria >= r en su índice y
+  renovación de la clave del elegido
+
+Siembra N personajes (una fracción --vault ya en la bóveda Prime) y mide la latencia de
+cada estrategia; en MongoDB muestra también los documentos examinados según explain.
+
+Requiere MongoDB en ejecución (o STORAGE_BACKEND=memory). Uso (desde backend/):
+    MONGO_DB_NAME=portal_gun_lab_bench python -m benchmarks.random_selection --characters 100000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+from typing import Any, Optional
+
+os.environ.setdefault("MONGO_DB_NAME", "portal_gun_lab_bench")
+
+from app.database import (
+    COLLECTION_CHARACTERS,
+    DATABASE_NAME,
+    RANDOM_KEY_FIELD,
+    close_storage,
+    connect_storage,
+    ensure_indexes,
+    get_characters_repository,
+    get_database,
+    using_memory_storage,
+)
+from app.services.rick_prime_service import (
+    RICK_PRIME_DIMENSION,
+    random_characters_pipeline,
+    random_key_query,
+    robbable_filter,
+    select_random_character,
+)
+
+DIMENSIONS = ["C-137", "C-131", "J19-Zeta-7"]
+SEED_BATCH_SIZE = 10_000
+
+
+async def _select_sample() -> Optional[dict]:
+    docs = await get_characters_repository().sample(robbable_filter(), 1)
+    return docs[0] if docs else None
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _docs_examined(explain: Any) -> Optional[int]:
+    """Primer totalDocsExamined de una salida de explain (find o aggregate)."""
+    if isinstance(explain, dict):
+        if "totalDocsExamined" in explain:
+            return explain["totalDocsExamined"]
+        values = explain.values()
+    elif isinstance(explain, list):
+        values = explain
+    else:
+        return None
+    for value in values:
+        found = _docs_examined(value)
+        if found is not None:
+            return found
+    return None
+
+
+async def _explain(command: dict) -> Optional[int]:
+    explain = await get_database().command({"explain": command, "verbosity": "executionStats"})
+    return _docs_examined(explain)
+
+
+async def _seed(characters: int, vault_fraction: float) -> None:
+    coll = get_characters_repository()
+    await coll.delete_many({})
+    for start in range(0, characters, SEED_BATCH_SIZE):
+        docs = []
+        for i in range(start, min(start + SEED_BATCH_SIZE, characters)):
+            doc = {
+                "type": "character",
+                "name": f"Morty {i}",
+                "status": "alive",
+                "species": "Human",
+                "origin_dimension": DIMENSIONS[i % len(DIMENSIONS)],
+                "current_dimension": DIMENSIONS[i % len(DIMENSIONS)],
+            }
+            if random.random() < vault_fraction:
+                doc.update(current_dimension=RICK_PRIME_DIMENSION, stolen_by_rick_prime=True)
+            else:
+                doc[RANDOM_KEY_FIELD] = random.random()
+            docs.append(doc)
+        await coll.insert_many(docs, ordered=False)
+
+
+async def _run(name: str, select, selections: int) -> None:
+    samples = []
+    for _ in range(selections):
+        start = time.perf_counter()
+        if await select() is None:
+            raise RuntimeError("no hay personajes robables")
+        samples.append((time.perf_counter() - start) * 1000)
+    print(
+        f"{name:<12} n={selections} mean={statistics.mean(samples):.3f}ms "
+        f"p50={_percentile(samples, 50):.3f}ms p95={_percentile(samples, 95):.3f}ms "
+        f"p99={_percentile(samples, 99):.3f}ms"
+    )
+
+
+async def main(characters: int, selections: int, vault_fraction: float) -> None:
+    await connect_storage()
+    try:
+        if not using_memory_storage() and "bench" not in DATABASE_NAME:
+            raise SystemExit(
+                f"El benchmark vacía la colección: usa una base de datos *_bench (actual: {DATABASE_NAME})"
+            )
+        await ensure_indexes()
+        await _seed(characters, vault_fraction)
+        print(f"{characters} personajes, {vault_fraction:.0%} en la bóveda Prime")
+        await _run("sample", _select_sample, selections)
+        await _run("random_key", select_random_character, selections)
+        if not using_memory_storage():
+            sample_docs = await _explain(
+                {"aggregate": COLLECTION_CHARACTERS, "pipeline": random_characters_pipeline(1), "cursor": {}}
+            )
+            key_docs = await _explain(
+                {
+                    "find": COLLECTION_CHARACTERS,
+                    "filter": random_key_query(random.random()),
+                    "sort": {RANDOM_KEY_FIELD: 1},
+                    "limit": 1,
+                }
+            )
+            print(f"Documentos examinados: sample={sample_docs} random_key={key_docs}")
+        await get_characters_repository().delete_many({})
+    finally:
+        await close_storage()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--characters", type=int, default=100_000)
+    parser.add_argument("--selections", type=int, default=1000)
+    parser.add_argument("--vault", type=float, default=0.1, help="Fracción de personajes ya robados")
+    args = parser.parse_args()
+    asyncio.run(main(args.characters, args.selections, args.vault))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de serialización de una página de listado (sin MongoDB):
+- pydantic: doc_to_character_response por documento + validación/serialización
+  de FastAPI con response_model=list[CharacterResponse] (camino anterior)
+- rápido: characters_to_json directamente desde los documentos proyectados
+
+Uso (desde backend/):
+    python -m benchmarks.serialization --docs 1000 --repeat 50
+"""
+import argparse
+import timeit
+from datetime import datetime
+
+from bson import ObjectId
+from pydantic import TypeAdapter
+
+from app.schemas import CharacterResponse
+from app.utils import characters_to_json, doc_to_character_response
+
+_LIST_ADAPTER = TypeAdapter(list[CharacterResponse])
+
+
+def _docs(n: int) -> list[dict]:
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"Morty {i}",
+            "status": "alive",
+            "species": "Human",
+            "origin_dimension": "C-137",
+            "current_dimension": "C-137",
+            "image_url": f"https://example.com/morty/{i}.png",
+            "captured_at": datetime.utcnow(),
+            "stolen_by_rick_prime": False,
+            "original_dimension": None,
+        }
+        for i in range(n)
+    ]
+
+
+def pydantic_path(docs: list[dict]) -> bytes:
+    models = [doc_to_character_response(doc) for doc in docs]
+    # FastAPI vuelve a validar el valor devuelto contra response_model antes de serializar
+    validated = _LIST_ADAPTER.validate_python([m.model_dump() for m in models])
+    return _LIST_ADAPTER.dump_json(validated)
+
+
+def fast_path(docs: list[dict]) -> bytes:
+    return characters_to_json(docs)
+
+
+def main(n_docs: int, repeat: int) -> None:
+    docs = _docs(n_docs)
+    results = {}
+    for name, fn in (("pydantic", pydantic_path), ("rápido", fast_path)):
+        best = min(timeit.repeat(lambda: fn(docs), number=1, repeat=repeat))
+        results[name] = best
+        print(f"{name:<9} {n_docs} docs: {best * 1000:.3f} ms/página")
+    print(f"speedup: x{results['pydantic'] / results['rápido']:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    main(args.docs, args.repeat)
@@ -8,15 +8,41 @@ from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from app.cache import (
+    invalidate_all_character_lists,
+    invalidate_all_characters,
+    invalidate_stone_lists,
+)
 from app.database import (
-    close_mongo_connection,
-    connect_to_mongo,
-    ensure_indexes,
-    get_characters_collection,
+    close_storage,
+    get_characters_repository,
+    get_counters_repository,
+    get_stones_repository,
+)
+from app.metrics import (
+    PROMETHEUS_CONTENT_TYPE,
+    RequestMetricsMiddleware,
+    render_metrics,
+    request_metrics_enabled,
+    server_timing_enabled,
 )
+from app.mongo_monitoring import mongo_stats
+from app.profiling import ProfilingMiddleware, profiler
 from app.routes import characters as characters_routes
+from app.routes import dimensions as dimensions_routes
+from app.routes import events as events_routes
+from app.routes import profiling as profiling_routes
 from app.routes import rick_routes
+from app.services.background_jobs import stop_background_jobs
+from app.startup import (
+    STARTUP_BACKGROUND,
+    ReadinessMiddleware,
+    start_application,
+    startup_mode,
+    startup_state,
+)
 
 load_dotenv()
 
@@ -41,11 +67,15 @@ def _cors_allow_credentials(origins: list[str]) -> bool:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Conexión a MongoDB al arrancar y cierre al apagar."""
-    await connect_to_mongo()
-    await ensure_indexes()
+    """Conexión a MongoDB y tareas de mantenimiento al arrancar (ver app/startup.py); cierre al apagar."""
+    await start_application()
     yield
-    await close_mongo_connection()
+    # Deja de anunciarse como lista mientras se apaga
+    startup_state.ready = False
+    await stop_background_jobs()
+    await close_storage()
+    if profiler is not None:
+        profiler.stop()
 
 
 app = FastAPI(
@@ -55,6 +85,11 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Antes que CORS (más interno): los 503 del arranque también llevan cabeceras CORS y el
+# frontend los ve como respuesta reintentable y no como error de red
+if startup_mode() == STARTUP_BACKGROUND:
+    app.add_middleware(ReadinessMiddleware)
+
 _cors_origins = _get_cors_origins()
 app.add_middleware(
     CORSMiddleware,
@@ -62,10 +97,21 @@ app.add_middleware(
     allow_credentials=_cors_allow_credentials(_cors_origins),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[characters_routes.NEXT_CURSOR_HEADER, "ETag", "Retry-After"],
 )
 
+if profiler is not None:
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+# Último middleware añadido = el más externo: mide la petición completa
+if request_metrics_enabled():
+    app.add_middleware(RequestMetricsMiddleware, server_timing=server_timing_enabled())
+
 app.include_router(characters_routes.router)
 app.include_router(rick_routes.router)
+app.include_router(dimensions_routes.router)
+app.include_router(events_routes.router)
+app.include_router(profiling_routes.router)
 
 
 @app.get("/")
@@ -75,14 +121,47 @@ def root():
 
 @app.get("/health")
 def health():
+    """Liveness: el proceso responde (no depende de MongoDB)."""
     return {"status": "healthy"}
 
 
+@app.get("/health/live")
+def liveness():
+    return {"status": "healthy"}
+
+
+@app.get("/health/ready")
+def readiness():
+    """Readiness: 200 cuando MongoDB está conectado y la API puede atender; si no, 503."""
+    return JSONResponse(
+        status_code=200 if startup_state.ready else 503,
+        content=startup_state.as_dict(),
+    )
+
+
+@app.get("/health/mongo")
+def mongo_health():
+    """Métricas del pool de MongoDB (conexiones abiertas/en uso, espera de checkout) y de comandos."""
+    return mongo_stats()
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Métricas en formato de texto de Prometheus (latencia por ruta y por fase, MongoDB)."""
+    return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 @app.delete("/api/test/clear-db")
 async def clear_test_db():
     """Solo disponible cuando MONGO_DB_NAME=portal_gun_lab_test (para tests)."""
     if os.getenv("MONGO_DB_NAME") != "portal_gun_lab_test":
         raise HTTPException(status_code=404, detail="Not found")
-    coll = get_characters_collection()
-    result = await coll.delete_many({})
-    return {"deleted": result.deleted_count}
+    deleted = 0
+    for coll in (get_characters_repository(), get_stones_repository()):
+        result = await coll.delete_many({})
+        deleted += result.deleted_count
+    await get_counters_repository().delete_many({})
+    invalidate_all_character_lists()
+    invalidate_all_characters()
+    invalidate_stone_lists()
+    return {"deleted": deleted}
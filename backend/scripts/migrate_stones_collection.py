@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Migra las piedras dimensionales de la colección 'characters' a 'dimensional_stones'.
+
+Es reanudable: cada lote se copia con upsert por _id (idempotente) y después se
+borra de 'characters', así que si se interrumpe basta con volver a ejecutarlo.
+Mientras queden piedras en 'characters' la API las lee en modo compatibilidad.
+
+Uso (desde backend/):
+    python -m scripts.migrate_stones_collection --batch-size 1000
+    python -m scripts.migrate_stones_collection --dry-run
+"""
+import argparse
+import asyncio
+import sys
+
+from dotenv import load_dotenv
+
+from app.database import (
+    close_mongo_connection,
+    connect_to_mongo,
+    ensure_indexes,
+    get_characters_repository,
+    get_stones_repository,
+)
+from app.services.rick_prime_service import DOC_TYPE_DIMENSIONAL_STONE
+from app.storage.base import UpdateOp
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+async def migrate_stones(batch_size: int = DEFAULT_BATCH_SIZE, dry_run: bool = False) -> int:
+    """Mueve las piedras por lotes ordenados por _id. Devuelve el número de piedras migradas."""
+    characters = get_characters_repository()
+    stones = get_stones_repository()
+    legacy_filter = {"type": DOC_TYPE_DIMENSIONAL_STONE}
+
+    if dry_run:
+        pending = sum((await characters.count_by([], legacy_filter)).values())
+        print(f"Piedras pendientes de migrar: {pending}")
+        return 0
+
+    migrated = 0
+    while True:
+        batch = await characters.find(legacy_filter, sort=[("_id", 1)], limit=batch_size).to_list(
+            length=batch_size
+        )
+        if not batch:
+            break
+        # Las piedras son documentos planos: $set de todos sus campos equivale a reemplazarlas
+        ops = [
+            UpdateOp({"_id": doc["_id"]}, {"$set": {k: v for k, v in doc.items() if k != "_id"}}, upsert=True)
+            for doc in batch
+        ]
+        await stones.bulk_write(ops, ordered=False)
+        ids = [doc["_id"] for doc in batch]
+        await characters.delete_many({"_id": {"$in": ids}, **legacy_filter})
+        migrated += len(batch)
+        print(f"  Migradas {migrated} piedras (último _id={ids[-1]})")
+    return migrated
+
+
+async def main(batch_size: int, dry_run: bool) -> None:
+    await connect_to_mongo()
+    try:
+        await ensure_indexes()
+        migrated = await migrate_stones(batch_size, dry_run)
+        if not dry_run:
+            print(f"\nListo. {migrated} piedras migradas a 'dimensional_stones'.")
+            print("Reinicia la API para desactivar el modo compatibilidad.")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="Solo cuenta las piedras pendientes")
+    args = parser.parse_args()
+    if args.batch_size < 1:
+        sys.exit("--batch-size debe ser >= 1")
+    asyncio.run(main(args.batch_size, args.dry_run))
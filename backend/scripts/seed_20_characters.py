@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-Añade 20 personajes a la base de datos usando la API local.
+Añade 20 personajes a la base de datos usando la API local (una sola petición masiva).
 """
 import json
 import sys
@@ -46,9 +46,8 @@ def post(url, data):
 def main():
     dimension = "C-137"
     print(f"Añadiendo {len(CHARACTERS)} personajes en dimensión {dimension}...")
-    created = 0
-    for name, species, status in CHARACTERS:
-        payload = {
+    payload = [
+        {
             "name": name,
             "status": status,
             "species": species,
@@ -56,14 +55,22 @@ def main():
             "current_dimension": dimension,
             "image_url": None,
         }
-        try:
-            post(f"{API_BASE}/characters", payload)
-            created += 1
+        for name, species, status in CHARACTERS
+    ]
+    try:
+        result = post(f"{API_BASE}/characters/bulk", payload)
+    except Exception as e:
+        print(f"  Error creando personajes: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    for item in result["results"]:
+        name = CHARACTERS[item["index"]][0]
+        if item["ok"]:
             print(f"  Creado: {name}")
-        except Exception as e:
-            print(f"  Error creando {name}: {e}", file=sys.stderr)
+        else:
+            print(f"  Error creando {name}: {item['error']}", file=sys.stderr)
 
-    print(f"\nListo. Creados {created} personajes.")
+    print(f"\nListo. Creados {result['inserted']} personajes.")
 
 
 if __name__ == "__main__":
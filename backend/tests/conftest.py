@@ -3,6 +3,8 @@ import pytest
 from fastapi.testclient import TestClient
 
 os.environ.setdefault("MONGO_DB_NAME", "portal_gun_lab_test")
+# Motor en memoria salvo que se pida MongoDB (STORAGE_BACKEND=mongo)
+os.environ.setdefault("STORAGE_BACKEND", "memory")
 
 from main import app
 
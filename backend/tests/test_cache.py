@@ -0,0 +1,163 @@
+"""
+Tests de la caché de listados de personajes (TTL + LRU e invalidación por dimensión)
+y de los ETags de los listados.
+"""
+from unittest.mock import patch
+
+from app.cache import TTLCache, character_list_cache
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_hit_and_miss_counters():
+    cache = TTLCache(max_entries=4, ttl_seconds=10)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_ttl_cache_expires_entries():
+    clock = _FakeClock()
+    cache = TTLCache(max_entries=4, ttl_seconds=5, clock=clock)
+    cache.set("a", 1)
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5.0
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, ttl_seconds=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_discards_values_read_before_invalidation():
+    cache = TTLCache(max_entries=4, ttl_seconds=10)
+    epoch = cache.epoch
+    cache.invalidate(lambda key: True)
+    cache.set("a", 1, epoch=epoch)
+    assert cache.get("a") is None
+
+
+def test_list_served_from_cache(client, two_characters):
+    client.get("/api/characters", params={"dimension": "C-137"})
+    hits = character_list_cache.hits
+    r = client.get("/api/characters", params={"dimension": "C-137"})
+    assert r.status_code == 200
+    assert [c["name"] for c in r.json()] == ["Rick A"]
+    assert character_list_cache.hits == hits + 1
+
+
+def test_move_invalidates_only_affected_dimensions(client, two_characters):
+    rick = two_characters[0]
+    for dim in ("C-137", "C-131", "C-500"):
+        client.get("/api/characters", params={"dimension": dim})
+    client.post(f"/api/characters/{rick['id']}/move", json={"target_dimension": "C-131"})
+
+    hits = character_list_cache.hits
+    assert client.get("/api/characters", params={"dimension": "C-500"}).json() == []
+    assert character_list_cache.hits == hits + 1
+
+    assert client.get("/api/characters", params={"dimension": "C-137"}).json() == []
+    c131 = client.get("/api/characters", params={"dimension": "C-131"}).json()
+    assert {c["id"] for c in c131} == {c["id"] for c in two_characters}
+    assert character_list_cache.hits == hits + 1
+
+
+def test_writes_invalidate_listing(client, sample_character):
+    assert len(client.get("/api/characters").json()) == 1
+    client.put(f"/api/characters/{sample_character['id']}", json={"name": "Renamed"})
+    assert client.get("/api/characters").json()[0]["name"] == "Renamed"
+    client.post("/api/rick-prime/steal")
+    assert client.get("/api/characters", params={"dimension": "C-137"}).json() == []
+    client.delete(f"/api/characters/{sample_character['id']}")
+    assert client.get("/api/characters").json() == []
+
+
+def test_revision_tracker_per_dimension():
+    from app.cache import RevisionTracker
+
+    revisions = RevisionTracker()
+    revisions.bump(["C-137"])
+    c137, c131, total = revisions.revision("C-137"), revisions.revision("C-131"), revisions.revision()
+    revisions.bump(["C-131"])
+    assert revisions.revision("C-137") == c137
+    assert revisions.revision("C-131") > c131
+    assert revisions.revision() > total
+    revisions.bump_all()
+    assert revisions.revision("C-137") > c137
+
+
+def test_revision_tracker_expires_without_writes():
+    from app.cache import RevisionTracker
+
+    now = [0.0]
+    revisions = RevisionTracker(ttl_seconds=5, clock=lambda: now[0])
+    c137, total = revisions.revision("C-137"), revisions.revision()
+    now[0] = 4.9
+    assert (revisions.revision("C-137"), revisions.revision()) == (c137, total)
+    # Sin escrituras locales en el TTL (pudo haberlas en otro worker) la revisión avanza
+    now[0] = 5.0
+    expired = revisions.revision("C-137")
+    assert expired > c137 and revisions.revision() > total
+    assert revisions.revision("C-137") == expired
+    # Con change streams no caducan
+    revisions.expires = False
+    now[0] = 60.0
+    assert revisions.revision("C-137") == expired
+
+
+def test_list_etag_not_modified(client, two_characters):
+    r = client.get("/api/characters", params={"dimension": "C-137"})
+    etag = r.headers["etag"]
+    assert r.headers["cache-control"] == "no-cache"
+
+    with patch("app.routes.characters.get_characters_repository") as coll:
+        r = client.get("/api/characters", params={"dimension": "C-137"}, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    coll.assert_not_called()
+
+    # Otra variante de la misma dimensión tiene su propio ETag
+    r = client.get("/api/characters", params={"dimension": "C-137", "limit": 1}, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+
+
+def test_list_etag_changes_only_for_touched_dimension(client, two_characters):
+    c137 = client.get("/api/characters", params={"dimension": "C-137"}).headers["etag"]
+    c131 = client.get("/api/characters", params={"dimension": "C-131"}).headers["etag"]
+    everything = client.get("/api/characters").headers["etag"]
+
+    client.put(f"/api/characters/{two_characters[1]['id']}", json={"status": "dead"})
+
+    r = client.get("/api/characters", params={"dimension": "C-137"}, headers={"If-None-Match": c137})
+    assert r.status_code == 304
+    r = client.get("/api/characters", params={"dimension": "C-131"}, headers={"If-None-Match": c131})
+    assert r.status_code == 200
+    assert r.json()[0]["status"] == "dead"
+    assert client.get("/api/characters", headers={"If-None-Match": everything}).status_code == 200
+
+
+def test_stones_etag_changes_after_steal(client, sample_character):
+    etag = client.get("/api/stones").headers["etag"]
+    assert client.get("/api/stones", headers={"If-None-Match": etag}).status_code == 304
+    client.post("/api/rick-prime/steal")
+    r = client.get("/api/stones", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert len(r.json()) == 1
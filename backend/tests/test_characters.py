@@ -1,6 +1,7 @@
 """
 Tests CRUD de personajes.
 """
+import json
 
 
 def test_list_characters_empty(client):
@@ -118,3 +119,199 @@ def test_delete_character_not_found(client):
 def test_delete_character_invalid_id(client):
     r = client.delete("/api/characters/not-valid")
     assert r.status_code == 400
+
+
+def _payload(name, dim="C-137"):
+    return {
+        "name": name,
+        "status": "alive",
+        "species": "Human",
+        "origin_dimension": dim,
+        "current_dimension": dim,
+    }
+
+
+def _create(client, name, dim="C-137"):
+    r = client.post("/api/characters", json=_payload(name, dim))
+    assert r.status_code == 201
+    return r.json()
+
+
+def test_list_characters_paginated_with_cursor(client):
+    for name in ["Dan", "Ann", "Cid", "Bob", "Ann"]:
+        _create(client, name)
+    seen = []
+    params = {"limit": 2}
+    pages = 0
+    while True:
+        r = client.get("/api/characters", params=params)
+        assert r.status_code == 200
+        seen.extend(x["name"] for x in r.json())
+        pages += 1
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        params = {"limit": 2, "after": cursor}
+    assert seen == ["Ann", "Ann", "Bob", "Cid", "Dan"]
+    assert pages == 3
+
+
+def test_list_characters_last_page_has_no_cursor(client, two_characters):
+    r = client.get("/api/characters", params={"limit": 2})
+    assert r.status_code == 200
+    assert len(r.json()) == 2
+    assert "X-Next-Cursor" not in r.headers
+
+
+def test_list_characters_cursor_with_dimension_filter(client):
+    for name in ["A", "B", "C"]:
+        _create(client, name, "C-137")
+    _create(client, "AA", "C-131")
+    r = client.get("/api/characters", params={"dimension": "C-137", "limit": 2})
+    assert [x["name"] for x in r.json()] == ["A", "B"]
+    r2 = client.get(
+        "/api/characters",
+        params={"dimension": "C-137", "limit": 2, "after": r.headers["X-Next-Cursor"]},
+    )
+    assert [x["name"] for x in r2.json()] == ["C"]
+
+
+def test_list_characters_invalid_cursor(client):
+    r = client.get("/api/characters", params={"after": "not-a-cursor"})
+    assert r.status_code == 400
+
+
+def test_list_characters_invalid_limit(client):
+    r = client.get("/api/characters", params={"limit": 0})
+    assert r.status_code == 422
+
+
+def test_export_characters_ndjson(client, two_characters):
+    steal = client.post("/api/rick-prime/steal")
+    assert steal.status_code == 200
+    r = client.get("/api/characters/export", params={"format": "ndjson"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    characters = [x for x in lines if x["type"] == "character"]
+    stones = [x for x in lines if x["type"] == "dimensional_stone"]
+    assert {c["id"] for c in characters} == {c["id"] for c in two_characters}
+    assert len(stones) == 1
+    assert stones[0]["previous_character_id"] == steal.json()["character"]["id"]
+
+
+def test_export_characters_empty(client):
+    r = client.get("/api/characters/export")
+    assert r.status_code == 200
+    assert r.text == ""
+
+
+def test_export_characters_invalid_format(client):
+    r = client.get("/api/characters/export", params={"format": "csv"})
+    assert r.status_code == 422
+
+
+def test_bulk_create_characters(client):
+    payload = [_payload(f"Morty {i}") for i in range(5)]
+    r = client.post("/api/characters/bulk", params={"chunk_size": 2}, json=payload)
+    assert r.status_code == 200
+    data = r.json()
+    assert data["inserted"] == 5
+    assert data["failed"] == 0
+    assert [x["index"] for x in data["results"]] == list(range(5))
+    assert all(x["ok"] and x["id"] for x in data["results"])
+    listed = client.get("/api/characters").json()
+    assert {c["id"] for c in listed} == {x["id"] for x in data["results"]}
+
+
+def test_bulk_create_characters_prime_rule(client):
+    from app.services.rick_prime_service import RICK_PRIME_DIMENSION
+
+    payload = [_payload("Trofeo", RICK_PRIME_DIMENSION), _payload("Libre")]
+    r = client.post("/api/characters/bulk", json=payload)
+    assert r.status_code == 200
+    by_name = {c["name"]: c for c in client.get("/api/characters").json()}
+    assert by_name["Trofeo"]["stolen_by_rick_prime"] is True
+    assert by_name["Libre"]["stolen_by_rick_prime"] is False
+
+
+def test_bulk_create_characters_empty(client):
+    r = client.post("/api/characters/bulk", json=[])
+    assert r.status_code == 400
+
+
+def test_bulk_create_characters_invalid_item(client):
+    payload = [_payload("Ok"), {**_payload("Bad"), "status": "invalid_status"}]
+    r = client.post("/api/characters/bulk", json=payload)
+    assert r.status_code == 422
+    assert client.get("/api/characters").json() == []
+
+
+def test_list_characters_fields_projection(client, sample_character):
+    r = client.get("/api/characters", params={"fields": "name,status,current_dimension"})
+    assert r.status_code == 200
+    assert r.json() == [
+        {
+            "name": sample_character["name"],
+            "status": sample_character["status"],
+            "current_dimension": sample_character["current_dimension"],
+            "id": sample_character["id"],
+        }
+    ]
+
+
+def test_list_characters_fields_cursor_without_name(client):
+    for name in ["B", "A", "C"]:
+        _create(client, name)
+    r = client.get("/api/characters", params={"fields": "status", "limit": 2})
+    assert [set(x) for x in r.json()] == [{"status", "id"}, {"status", "id"}]
+    r2 = client.get(
+        "/api/characters",
+        params={"fields": "status", "limit": 2, "after": r.headers["X-Next-Cursor"]},
+    )
+    assert len(r2.json()) == 1
+
+
+def test_list_characters_unknown_field(client):
+    r = client.get("/api/characters", params={"fields": "name,password"})
+    assert r.status_code == 400
+    assert "password" in r.json()["detail"]
+
+
+def test_get_character(client, sample_character):
+    r = client.get(f"/api/characters/{sample_character['id']}")
+    assert r.status_code == 200
+    data = r.json()
+    # MongoDB guarda las fechas con precisión de milisegundos
+    assert data.pop("captured_at")[:23] == sample_character.pop("captured_at")[:23]
+    assert data == sample_character
+
+
+def test_get_character_not_found(client):
+    assert client.get("/api/characters/507f1f77bcf86cd799439011").status_code == 404
+    assert client.get("/api/characters/not-valid").status_code == 400
+
+
+def test_get_character_served_from_cache(client, sample_character):
+    from unittest.mock import patch
+
+    url = f"/api/characters/{sample_character['id']}"
+    client.get(url)
+    with patch("app.routes.characters.get_characters_repository") as coll:
+        r = client.get(url)
+    assert r.status_code == 200
+    assert r.json()["name"] == "Morty Test"
+    coll.assert_not_called()
+
+
+def test_get_character_cache_invalidated_by_writes(client, sample_character):
+    url = f"/api/characters/{sample_character['id']}"
+    client.get(url)
+    client.put(url, json={"name": "Morty Renamed"})
+    assert client.get(url).json()["name"] == "Morty Renamed"
+    client.post(f"{url}/move", json={"target_dimension": "C-131"})
+    assert client.get(url).json()["current_dimension"] == "C-131"
+    client.post("/api/rick-prime/steal")
+    assert client.get(url).json()["stolen_by_rick_prime"] is True
+    client.delete(url)
+    assert client.get(url).status_code == 404
@@ -0,0 +1,169 @@
+"""
+Tests de estadísticas por dimensión.
+"""
+
+from app.services.rick_prime_service import RICK_PRIME_DIMENSION
+
+
+def test_dimension_stats_empty(client):
+    r = client.get("/api/dimensions/stats")
+    assert r.status_code == 200
+    assert r.json() == {"dimensions": [], "total_characters": 0, "total_stones": 0, "trophies": 0}
+
+
+def test_dimension_stats_counts(client, two_characters):
+    client.post(
+        "/api/characters",
+        json={
+            "name": "Birdperson",
+            "status": "dead",
+            "species": "Bird-Person",
+            "origin_dimension": "C-137",
+            "current_dimension": "C-137",
+        },
+    )
+    r = client.get("/api/dimensions/stats")
+    assert r.status_code == 200
+    data = r.json()
+    by_dim = {d["dimension"]: d for d in data["dimensions"]}
+    assert by_dim["C-137"]["characters"] == 2
+    assert by_dim["C-137"]["by_status"] == {"alive": 1, "dead": 1}
+    assert by_dim["C-137"]["by_species"] == {"Human": 1, "Bird-Person": 1}
+    assert by_dim["C-131"]["characters"] == 1
+    assert data["total_characters"] == 3
+    assert data["trophies"] == 0
+
+
+def test_dimension_stats_after_steal(client, sample_character):
+    client.post("/api/rick-prime/steal")
+    data = client.get("/api/dimensions/stats").json()
+    by_dim = {d["dimension"]: d for d in data["dimensions"]}
+    assert data["trophies"] == 1
+    assert by_dim[RICK_PRIME_DIMENSION]["characters"] == 1
+    assert by_dim["C-137"]["characters"] == 0
+    assert by_dim["C-137"]["stones"] == 1
+    assert data["total_stones"] == 1
+
+
+def _counts_by_dimension(client) -> dict[str, int]:
+    from app.database import get_characters_repository, get_counters_repository
+
+    async def _read():
+        real = {}
+        async for doc in get_characters_repository().find({}, {"current_dimension": 1}):
+            dim = doc.get("current_dimension")
+            real[dim] = real.get(dim, 0) + 1
+        counters = {
+            doc["_id"]: doc["characters"]
+            async for doc in get_counters_repository().find({})
+            if doc["characters"]
+        }
+        return real, counters
+
+    return client.portal.call(_read)
+
+
+def test_dimension_count_endpoint(client, two_characters):
+    r = client.get("/api/dimensions/C-137/count")
+    assert r.status_code == 200
+    assert r.json() == {"dimension": "C-137", "characters": 1}
+    assert client.get("/api/dimensions/unknown/count").json()["characters"] == 0
+
+
+def test_dimension_counters_match_after_random_writes(client):
+    import random
+
+    rng = random.Random(14)
+    dims = ["C-137", "C-131", "J19ζ7", "D-99"]
+    ids: list[str] = []
+    for step in range(80):
+        op = rng.choice(["create", "bulk", "move", "update", "delete", "batch", "steal"])
+        if op == "create" or not ids:
+            dim = rng.choice(dims)
+            r = client.post(
+                "/api/characters",
+                json={
+                    "name": f"Rick {step}",
+                    "status": "alive",
+                    "species": "Human",
+                    "origin_dimension": dim,
+                    "current_dimension": dim,
+                },
+            )
+            ids.append(r.json()["id"])
+        elif op == "bulk":
+            payload = [
+                {
+                    "name": f"Morty {step}-{i}",
+                    "status": "alive",
+                    "species": "Human",
+                    "origin_dimension": "C-137",
+                    "current_dimension": rng.choice(dims),
+                }
+                for i in range(3)
+            ]
+            ids.extend(item["id"] for item in client.post("/api/characters/bulk", json=payload).json()["results"])
+        elif op == "move":
+            client.post(f"/api/characters/{rng.choice(ids)}/move", json={"target_dimension": rng.choice(dims)})
+        elif op == "update":
+            client.put(f"/api/characters/{rng.choice(ids)}", json={"current_dimension": rng.choice(dims)})
+        elif op == "delete":
+            client.delete(f"/api/characters/{ids.pop(rng.randrange(len(ids)))}")
+        elif op == "batch":
+            if rng.random() < 0.5:
+                body = {"ids": rng.sample(ids, min(3, len(ids))), "target_dimension": rng.choice(dims)}
+            else:
+                body = {"source_dimension": rng.choice(dims), "target_dimension": rng.choice(dims)}
+            client.post("/api/characters/move", json=body)
+        else:
+            client.post("/api/rick-prime/steal", params={"count": 2} if rng.random() < 0.5 else None)
+
+    real, counters = _counts_by_dimension(client)
+    assert counters == real
+    for dim, count in real.items():
+        assert client.get(f"/api/dimensions/{dim}/count").json()["characters"] == count
+
+
+def test_recount_repairs_drift(client, two_characters):
+    from app.database import get_counters_repository
+    from app.services.counters_service import recount_dimension_counters
+
+    async def _corrupt():
+        await get_counters_repository().update_one({"_id": "C-137"}, {"$set": {"characters": 42}})
+        await get_counters_repository().insert_one({"_id": "ghost", "characters": 3})
+
+    client.portal.call(_corrupt)
+    assert client.portal.call(recount_dimension_counters) == {"C-137": 1, "C-131": 1}
+    real, counters = _counts_by_dimension(client)
+    assert counters == real
+
+
+def test_recount_keeps_increments_made_during_the_count(client, two_characters):
+    from unittest.mock import patch
+
+    from app.database import get_characters_repository, get_counters_repository
+    from app.services import counters_service
+
+    repo = get_characters_repository()
+
+    class _RacingRepository:
+        """Simula un alta en C-131 que llega justo después del $group del recuento."""
+
+        def __getattr__(self, name):
+            return getattr(repo, name)
+
+        async def count_by(self, fields, filter=None):
+            grouped = await repo.count_by(fields, filter)
+            await repo.insert_one({"name": "Summer", "current_dimension": "C-131"})
+            await counters_service.apply_dimension_deltas({"C-131": 1})
+            return grouped
+
+    async def _recount_with_drift():
+        await get_counters_repository().update_one({"_id": "C-137"}, {"$set": {"characters": 42}})
+        with patch.object(counters_service, "get_characters_repository", return_value=_RacingRepository()):
+            return await counters_service.recount_dimension_counters()
+
+    assert client.portal.call(_recount_with_drift) == {"C-137": 1, "C-131": 1}
+    # C-137 se corrige; el contador de C-131 cambió durante el recuento y conserva el $inc
+    real, counters = _counts_by_dimension(client)
+    assert counters == real == {"C-137": 1, "C-131": 2}
@@ -0,0 +1,334 @@
+"""
+Tests del feed de eventos (bus en memoria, traducción de change streams, SSE y WebSocket).
+"""
+from datetime import datetime
+
+import orjson
+import pytest
+from bson import ObjectId
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.events import (
+    DELTA_MOVED_IN,
+    DELTA_MOVED_OUT,
+    EVENT_CHARACTER_CREATED,
+    EVENT_CHARACTER_DELETED,
+    EVENT_CHARACTER_MOVED,
+    EVENT_CHARACTER_STOLEN,
+    EVENT_RESYNC,
+    EVENT_STONE_CREATED,
+    EventBus,
+    event_bus,
+    event_deltas,
+)
+from app.services import change_feed
+from app.services.change_feed import change_to_events
+from app.services.rick_prime_service import RICK_PRIME_DIMENSION
+
+
+@pytest.fixture
+def subscription():
+    sub = event_bus.subscribe()
+    yield sub
+    event_bus.unsubscribe(sub)
+
+
+def _next_events(client, sub, n):
+    return [client.portal.call(sub.get) for _ in range(n)]
+
+
+def test_bus_replays_missed_events():
+    bus = EventBus(history_size=10, queue_size=10)
+    for i in range(3):
+        bus.dispatch({"type": EVENT_CHARACTER_CREATED, "n": i})
+    sub = bus.subscribe(last_event_id=bus._history[0]["id"])
+    assert [e["n"] for e in sub._events] == [1, 2]
+
+
+def test_bus_sends_resync_for_ids_from_another_process():
+    other = EventBus(history_size=10, queue_size=10)
+    bus = EventBus(history_size=10, queue_size=10)
+    for b in (other, bus):
+        for i in range(3):
+            b.dispatch({"type": EVENT_CHARACTER_CREATED, "n": i})
+    # Mismo número de secuencia en otro worker (o antes de reiniciar): no se salta nada
+    assert other._history[0]["id"] != bus._history[0]["id"]
+    sub = bus.subscribe(last_event_id=other._history[0]["id"])
+    assert [e["type"] for e in sub._events] == [EVENT_RESYNC]
+    sub = bus.subscribe(last_event_id="1")
+    assert [e["type"] for e in sub._events] == [EVENT_RESYNC]
+
+
+def test_bus_sends_resync_when_history_lost():
+    bus = EventBus(history_size=2, queue_size=10)
+    for i in range(5):
+        bus.dispatch({"type": EVENT_CHARACTER_CREATED})
+    sub = bus.subscribe(last_event_id=f"{bus._boot_id}-1")
+    assert [e["type"] for e in sub._events] == [EVENT_RESYNC]
+
+
+def test_slow_subscriber_drops_oldest():
+    bus = EventBus(history_size=10, queue_size=2)
+    sub = bus.subscribe()
+    for i in range(5):
+        bus.dispatch({"type": EVENT_CHARACTER_CREATED, "n": i})
+    assert [e["n"] for e in sub._events] == [3, 4]
+    assert sub.dropped == 3
+
+
+def test_write_routes_publish_events(client, subscription, sample_character):
+    char_id = sample_character["id"]
+    (created,) = _next_events(client, subscription, 1)
+    assert created["type"] == EVENT_CHARACTER_CREATED
+    assert created["character"]["name"] == "Morty Test"
+
+    client.post(f"/api/characters/{char_id}/move", json={"target_dimension": "C-131"})
+    (moved,) = _next_events(client, subscription, 1)
+    assert moved["type"] == EVENT_CHARACTER_MOVED
+    assert (moved["from_dimension"], moved["to_dimension"]) == ("C-137", "C-131")
+
+    client.post("/api/rick-prime/steal")
+    stone, stolen = _next_events(client, subscription, 2)
+    assert stone["type"] == EVENT_STONE_CREATED
+    assert stone["stone"]["dimension"] == "C-131"
+    assert stolen["type"] == EVENT_CHARACTER_STOLEN
+    assert stolen["to_dimension"] == RICK_PRIME_DIMENSION
+
+    client.delete(f"/api/characters/{char_id}")
+    (deleted,) = _next_events(client, subscription, 1)
+    assert deleted["type"] == EVENT_CHARACTER_DELETED
+    assert deleted["from_dimension"] == RICK_PRIME_DIMENSION
+
+
+def test_change_stream_translation():
+    oid = ObjectId()
+    doc = {
+        "_id": oid,
+        "name": "Rick",
+        "status": "alive",
+        "species": "Human",
+        "origin_dimension": "C-137",
+        "current_dimension": RICK_PRIME_DIMENSION,
+        "captured_at": datetime.utcnow(),
+        "stolen_by_rick_prime": True,
+        "original_dimension": "C-137",
+    }
+    (stolen,) = change_to_events(
+        {
+            "_id": {"_data": "826A"},
+            "operationType": "update",
+            "ns": {"db": "portal_gun_lab", "coll": "characters"},
+            "documentKey": {"_id": oid},
+            "fullDocument": doc,
+            "updateDescription": {
+                # Robado de nuevo: stolen_by_rick_prime ya era True y no figura
+                "updatedFields": {
+                    "current_dimension": RICK_PRIME_DIMENSION,
+                    "original_dimension": "C-137",
+                    "dimensional_stone_id": ObjectId(),
+                }
+            },
+        }
+    )
+    assert stolen["id"] == "826A"
+    assert stolen["type"] == EVENT_CHARACTER_STOLEN
+    assert stolen["from_dimension"] == "C-137"
+
+    (deleted,) = change_to_events(
+        {
+            "_id": {"_data": "826B"},
+            "operationType": "delete",
+            "ns": {"db": "portal_gun_lab", "coll": "characters"},
+            "documentKey": {"_id": oid},
+            "fullDocumentBeforeChange": doc,
+        }
+    )
+    assert deleted["type"] == EVENT_CHARACTER_DELETED
+    assert deleted["character_id"] == str(oid)
+
+    # Heredar la clave aleatoria de un robado no es un cambio visible del personaje
+    assert change_to_events(
+        {
+            "_id": {"_data": "826C"},
+            "operationType": "update",
+            "ns": {"db": "portal_gun_lab", "coll": "characters"},
+            "documentKey": {"_id": oid},
+            "fullDocument": {**doc, "current_dimension": "C-137", "random_key": 0.5},
+            "updateDescription": {"updatedFields": {"random_key": 0.5}, "removedFields": []},
+        }
+    ) == []
+
+
+class _FakeStream:
+    def __init__(self, changes, error):
+        self._changes = changes
+        self._error = error
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._changes:
+            return self._changes.pop(0)
+        raise self._error
+
+
+class _FakeDatabase:
+    """Change stream simulado: cada apertura devuelve sus cambios y termina con su error."""
+
+    def __init__(self, streams):
+        self.streams = streams
+        self.resume_tokens = []
+
+    def watch(self, pipeline, resume_after=None, **kwargs):
+        self.resume_tokens.append(resume_after)
+        return _FakeStream(*self.streams.pop(0))
+
+
+def test_watch_changes_reopens_from_now_when_history_lost(client, subscription, monkeypatch):
+    oid = ObjectId()
+    change = {
+        "_id": {"_data": "826A"},
+        "operationType": "insert",
+        "ns": {"db": "portal_gun_lab", "coll": "characters"},
+        "documentKey": {"_id": oid},
+        "fullDocument": {
+            "_id": oid,
+            "name": "Morty",
+            "status": "alive",
+            "species": "Human",
+            "origin_dimension": "C-137",
+            "current_dimension": "C-137",
+            "captured_at": datetime.utcnow(),
+        },
+    }
+    database = _FakeDatabase(
+        [
+            ([change], PyMongoError("conexión perdida")),
+            ([], OperationFailure("resume point no longer in the oplog", code=286)),
+            # Un error ajeno a MongoDB termina el bucle del test
+            ([], RuntimeError("fin del test")),
+        ]
+    )
+    invalidated = []
+    monkeypatch.setattr(change_feed, "get_database", lambda: database)
+    monkeypatch.setattr(change_feed, "RETRY_DELAY_SECONDS", 0)
+    monkeypatch.setattr(
+        change_feed, "invalidate_all_character_lists", lambda: invalidated.append("lists")
+    )
+    monkeypatch.setattr(change_feed, "invalidate_stone_lists", lambda: invalidated.append("stones"))
+
+    with pytest.raises(RuntimeError):
+        client.portal.call(change_feed.watch_changes)
+    # Error transitorio: se reanuda con el token; historial perdido: se reabre sin él
+    assert database.resume_tokens == [None, {"_data": "826A"}, None]
+    assert "lists" in invalidated and "stones" in invalidated
+    events = _next_events(client, subscription, 2)
+    assert [e["type"] for e in events] == [EVENT_CHARACTER_CREATED, EVENT_RESYNC]
+
+
+class _ConnectedRequest:
+    async def is_disconnected(self):
+        return False
+
+
+def test_sse_stream_replays_from_last_event_id(client, sample_character):
+    from app.routes.events import _event_stream
+
+    last_id = event_bus._history[-1]["id"]
+    client.post(f"/api/characters/{sample_character['id']}/move", json={"target_dimension": "C-131"})
+
+    async def _read():
+        sub = event_bus.subscribe(last_id)
+        stream = _event_stream(_ConnectedRequest(), sub)
+        chunks = [await stream.__anext__() for _ in range(2)]
+        await stream.aclose()
+        return chunks
+
+    retry, message = client.portal.call(_read)
+    assert retry.startswith(b"retry:")
+    fields = dict(line.split(b": ", 1) for line in message.strip().split(b"\n"))
+    assert fields[b"event"] == EVENT_CHARACTER_MOVED.encode()
+    assert orjson.loads(fields[b"data"])["to_dimension"] == "C-131"
+    assert event_bus.subscriber_count == 0
+
+
+def test_events_endpoint_registered(client):
+    assert "/api/events" in client.get("/openapi.json").json()["paths"]
+
+
+def test_bus_routes_events_only_to_subscribed_dimensions():
+    bus = EventBus(history_size=10, queue_size=10)
+    c137 = bus.subscribe(dimensions=["C-137"])
+    c131 = bus.subscribe(dimensions=["C-131", "D-99"])
+    bus.dispatch({"type": EVENT_CHARACTER_CREATED, "to_dimension": "C-137"})
+    bus.dispatch({"type": EVENT_CHARACTER_MOVED, "from_dimension": "C-137", "to_dimension": "D-99"})
+    assert len(c137._events) == 2
+    assert [e["type"] for e in c131._events] == [EVENT_CHARACTER_MOVED]
+
+    bus.set_dimensions(c131, ["C-137"])
+    bus.unsubscribe(c137)
+    bus.dispatch({"type": EVENT_CHARACTER_CREATED, "to_dimension": "C-137"})
+    assert len(c131._events) == 2
+    assert len(c137._events) == 2
+    assert bus.subscriber_count == 1
+
+
+def test_event_deltas_split_moves():
+    event = {
+        "id": "7",
+        "type": EVENT_CHARACTER_MOVED,
+        "character_id": "abc",
+        "from_dimension": "C-137",
+        "to_dimension": "C-131",
+    }
+    both = event_deltas(event, frozenset({"C-137", "C-131"}))
+    assert [(d["type"], d["dimension"]) for d in both] == [
+        (DELTA_MOVED_OUT, "C-137"),
+        (DELTA_MOVED_IN, "C-131"),
+    ]
+    assert [d["type"] for d in event_deltas(event, frozenset({"C-131"}))] == [DELTA_MOVED_IN]
+    assert event_deltas(event, frozenset({"D-99"})) == []
+
+
+def test_websocket_receives_deltas_for_subscribed_dimensions(client, sample_character):
+    with client.websocket_connect("/api/ws/dimensions?dimensions=C-131") as ws:
+        client.post(
+            "/api/characters",
+            json={
+                "name": "Ignored",
+                "status": "alive",
+                "species": "Human",
+                "origin_dimension": "D-99",
+                "current_dimension": "D-99",
+            },
+        )
+        client.post(f"/api/characters/{sample_character['id']}/move", json={"target_dimension": "C-131"})
+        moved_in = ws.receive_json()
+        assert moved_in["type"] == DELTA_MOVED_IN
+        assert moved_in["dimension"] == "C-131"
+        assert moved_in["character_id"] == sample_character["id"]
+
+        ws.send_json({"dimensions": ["C-137"]})
+        ws.send_json({"dimensions": 137})
+        error = ws.receive_json()
+        assert error["type"] == "error"
+        client.post(f"/api/characters/{sample_character['id']}/move", json={"target_dimension": "C-137"})
+        moved_back = ws.receive_json()
+        assert (moved_back["type"], moved_back["dimension"]) == (DELTA_MOVED_IN, "C-137")
+    assert event_bus.subscriber_count == 0
+
+
+def test_websocket_requires_dimensions(client):
+    from starlette.websockets import WebSocketDisconnect
+
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect("/api/ws/dimensions"):
+            pass
+    assert exc.value.code == 1008
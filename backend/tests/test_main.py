@@ -1,5 +1,5 @@
 """
-Tests de endpoints raíz y health.
+Tests de endpoints raíz y health (liveness, readiness y arranque en segundo plano).
 """
 
 
@@ -21,3 +21,105 @@ def test_clear_db_returns_200_in_test_env(client):
     r = client.delete("/api/test/clear-db")
     assert r.status_code == 200
     assert "deleted" in r.json()
+
+
+def test_openapi_list_schemas(client):
+    paths = client.get("/openapi.json").json()["paths"]
+    characters = paths["/api/characters"]["get"]["responses"]["200"]["content"]["application/json"]
+    stones = paths["/api/stones"]["get"]["responses"]["200"]["content"]["application/json"]
+    assert characters["schema"]["items"]["$ref"].endswith("/CharacterResponse")
+    assert stones["schema"]["items"]["$ref"].endswith("/StoneResponse")
+
+
+def test_health_mongo_metrics(client):
+    r = client.get("/health/mongo")
+    assert r.status_code == 200
+    assert set(r.json()) == {"pools", "commands"}
+
+
+def test_health_live_and_ready(client):
+    assert client.get("/health/live").json() == {"status": "healthy"}
+    r = client.get("/health/ready")
+    assert r.status_code == 200
+    data = r.json()
+    assert data["status"] == "ready"
+    assert data["mongo_connected"] is True
+    assert data["indexes_ready"] is True
+
+
+def test_background_startup_serves_before_mongo(client, monkeypatch):
+    import asyncio
+
+    from fastapi.testclient import TestClient
+
+    from app import startup
+    from app.services.background_jobs import stop_background_jobs
+    from main import app
+
+    async def slow_initialize(background_indexes=False):
+        await asyncio.sleep(3600)
+
+    monkeypatch.setenv("STARTUP_MODE", "background")
+    monkeypatch.setattr(startup, "initialize", slow_initialize)
+    # El middleware solo se instala con STARTUP_MODE=background al importar main
+    background_client = TestClient(startup.ReadinessMiddleware(app))
+    try:
+        client.portal.call(startup.start_application)
+        assert background_client.get("/health").status_code == 200
+        r = background_client.get("/health/ready")
+        assert r.status_code == 503
+        assert r.json()["status"] == "starting"
+        r = background_client.get("/api/characters")
+        assert r.status_code == 503
+        assert r.headers["retry-after"] == "1"
+    finally:
+        client.portal.call(stop_background_jobs)
+        startup.startup_state.ready = True
+    assert background_client.get("/api/characters").status_code == 200
+
+
+def test_background_startup_503_has_cors_headers(monkeypatch):
+    import importlib.util
+    from pathlib import Path
+
+    from fastapi.testclient import TestClient
+
+    from app import startup
+
+    monkeypatch.setenv("STARTUP_MODE", "background")
+    monkeypatch.setenv("CORS_ORIGINS", "http://localhost:5173")
+    spec = importlib.util.spec_from_file_location(
+        "main_background", Path(__file__).resolve().parent.parent / "main.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setattr(startup.startup_state, "ready", False)
+    # Sin lifespan: solo se comprueba la pila de middlewares
+    r = TestClient(module.app).get("/api/characters", headers={"Origin": "http://localhost:5173"})
+    assert r.status_code == 503
+    assert r.headers["access-control-allow-origin"] == "http://localhost:5173"
+    assert "Retry-After" in r.headers["access-control-expose-headers"]
+
+
+def test_background_startup_retry_does_not_duplicate_jobs(client, monkeypatch):
+    from pymongo.errors import PyMongoError
+
+    from app import startup
+    from app.services import background_jobs
+
+    attempts = []
+
+    async def flaky_event_feed():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise PyMongoError("replica set no disponible")
+        return "memory"
+
+    monkeypatch.setattr(startup, "start_event_feed", flaky_event_feed)
+    monkeypatch.setattr(startup, "RETRY_DELAY_SECONDS", 0)
+    client.portal.call(background_jobs.stop_background_jobs)
+    client.portal.call(startup._initialize_in_background)
+    assert len(attempts) == 2 and startup.startup_state.ready
+    names = [task.get_name() for task in background_jobs._tasks]
+    assert names.count("reconcile_orphan_stones") == 1
+    assert names.count("recount_dimension_counters") == 1
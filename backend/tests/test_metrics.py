@@ -0,0 +1,80 @@
+"""
+Tests de las métricas por petición: desglose por fases, histogramas, /metrics
+(formato Prometheus) y cabecera Server-Timing.
+"""
+import re
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.metrics import Histogram, RequestMetricsMiddleware, request_duration
+from app.mongo_monitoring import CommandMetrics
+from app.timing import (
+    PHASE_CONVERSION,
+    PHASE_MONGO,
+    finish_request_timing,
+    record_phase,
+    start_request_timing,
+    timed,
+)
+
+
+def test_phases_recorded_only_inside_request():
+    record_phase(PHASE_MONGO, 1.0)  # sin petición en curso: no hace nada
+    timing, token = start_request_timing()
+    try:
+        CommandMetrics()._record("find", 5000, failed=False)
+        with timed(PHASE_CONVERSION):
+            pass
+    finally:
+        finish_request_timing(token)
+    assert timing.phases[PHASE_MONGO] == 0.005
+    assert timing.phases[PHASE_CONVERSION] > 0
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(('/a"b',), 0.05)
+    histogram.observe(('/a"b',), 0.1)
+    histogram.observe(('/a"b',), 5.0)
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{route="/a\\"b",le="0.1"} 2' in lines
+    assert 'demo_seconds_bucket{route="/a\\"b",le="1.0"} 2' in lines
+    assert 'demo_seconds_bucket{route="/a\\"b",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{route="/a\\"b"} 3' in lines
+
+
+def test_metrics_endpoint_uses_route_templates(client, sample_character):
+    labels = ("GET", "/api/characters/{id}", "200")
+    before = request_duration.count(labels)
+    client.get(f"/api/characters/{sample_character['id']}")
+    client.get("/api/characters")
+    assert request_duration.count(labels) == before + 1
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert sample_character["id"] not in r.text
+    assert "# TYPE http_request_duration_seconds histogram" in r.text
+    assert "mongodb_commands_total" in r.text
+    conversion = re.search(
+        r'http_request_phase_seconds_sum\{method="GET",route="/api/characters",phase="conversion"\} (\S+)',
+        r.text,
+    )
+    assert conversion is not None and float(conversion.group(1)) > 0
+
+
+def test_server_timing_header():
+    app = FastAPI()
+
+    @app.get("/slow")
+    def slow():
+        with timed(PHASE_CONVERSION):
+            pass
+        return {"ok": True}
+
+    app.add_middleware(RequestMetricsMiddleware, server_timing=True)
+    r = TestClient(app).get("/slow")
+    header = r.headers["server-timing"]
+    for phase in ("mongo", "conversion", "serialization", "app", "total"):
+        assert f"{phase};dur=" in header
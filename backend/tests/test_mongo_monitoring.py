@@ -0,0 +1,83 @@
+"""
+Tests de la configuración del pool de MongoDB y de sus métricas.
+"""
+from pymongo import ReadPreference, monitoring
+
+from app.database import client_options_from_env
+from app.mongo_monitoring import CommandMetrics, PoolMetrics
+
+ADDRESS = ("mongo", 27017)
+
+
+def test_client_options_defaults(monkeypatch):
+    for var in (
+        "MONGO_MAX_POOL_SIZE",
+        "MONGO_MIN_POOL_SIZE",
+        "MONGO_MAX_IDLE_TIME_MS",
+        "MONGO_WAIT_QUEUE_TIMEOUT_MS",
+        "MONGO_COMPRESSORS",
+        "MONGO_READ_PREFERENCE",
+    ):
+        monkeypatch.delenv(var, raising=False)
+    options = client_options_from_env()
+    assert options["maxPoolSize"] == 100
+    assert options["minPoolSize"] == 5
+    assert "maxIdleTimeMS" not in options
+    assert "compressors" not in options
+    assert "read_preference" not in options
+    assert len(options["event_listeners"]) == 2
+
+
+def test_client_options_from_env(monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "20")
+    monkeypatch.setenv("MONGO_MIN_POOL_SIZE", "50")
+    monkeypatch.setenv("MONGO_MAX_IDLE_TIME_MS", "60000")
+    monkeypatch.setenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000")
+    monkeypatch.setenv("MONGO_COMPRESSORS", "zlib,lz4")
+    monkeypatch.setenv("MONGO_READ_PREFERENCE", "secondaryPreferred")
+    options = client_options_from_env()
+    assert options["maxPoolSize"] == 20
+    assert options["minPoolSize"] == 20
+    assert options["maxIdleTimeMS"] == 60000
+    assert options["waitQueueTimeoutMS"] == 2000
+    assert options["compressors"] == "zlib"
+    assert options["read_preference"] == ReadPreference.SECONDARY_PREFERRED
+
+
+def test_client_options_invalid_values(monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "many")
+    monkeypatch.setenv("MONGO_READ_PREFERENCE", "fastest")
+    options = client_options_from_env()
+    assert options["maxPoolSize"] == 100
+    assert "read_preference" not in options
+
+
+def test_pool_metrics_tracks_checkouts():
+    metrics = PoolMetrics()
+    metrics.pool_created(monitoring.PoolCreatedEvent(ADDRESS, {}))
+    for conn_id in (1, 2):
+        metrics.connection_created(monitoring.ConnectionCreatedEvent(ADDRESS, conn_id))
+    metrics.connection_checked_out(monitoring.ConnectionCheckedOutEvent(ADDRESS, 1, 0.25))
+    metrics.connection_checked_out(monitoring.ConnectionCheckedOutEvent(ADDRESS, 2, 0.05))
+    metrics.connection_checked_in(monitoring.ConnectionCheckedInEvent(ADDRESS, 2))
+    metrics.connection_check_out_failed(
+        monitoring.ConnectionCheckOutFailedEvent(ADDRESS, monitoring.ConnectionCheckOutFailedReason.TIMEOUT, 1.0)
+    )
+
+    pool = metrics.snapshot()["mongo:27017"]
+    assert pool["size"] == 2
+    assert pool["in_use"] == 1
+    assert pool["checkouts"] == 2
+    assert pool["checkout_failures"] == 1
+    assert pool["checkout_wait_seconds_max"] == 1.0
+    assert round(pool["checkout_wait_seconds_total"], 2) == 1.3
+
+
+def test_command_metrics():
+    metrics = CommandMetrics()
+    metrics._record("find", 2000, failed=False)
+    metrics._record("find", 8000, failed=True)
+    find = metrics.snapshot()["find"]
+    assert find["count"] == 2
+    assert find["failures"] == 1
+    assert find["seconds_max"] == 0.008
@@ -1,6 +1,9 @@
 """
 Tests de movimiento de personajes entre dimensiones.
 """
+from unittest.mock import patch
+
+from app.services.rick_prime_service import RICK_PRIME_DIMENSION
 
 
 def test_move_character(client, sample_character):
@@ -58,3 +61,159 @@ def test_move_then_list_filter(client, two_characters):
     assert len(items) == 2
     dims = {x["current_dimension"] for x in items}
     assert dims == {"C-131"}
+
+
+def test_batch_move_by_ids(client, two_characters):
+    ids = [c["id"] for c in two_characters]
+    r = client.post(
+        "/api/characters/move",
+        json={"ids": ids, "target_dimension": "C-500"},
+    )
+    assert r.status_code == 200
+    data = r.json()
+    assert data["matched"] == 2
+    assert data["modified"] == 2
+    assert data["rejected_ids"] == []
+    moved = client.get("/api/characters", params={"dimension": "C-500"}).json()
+    assert {c["id"] for c in moved} == set(ids)
+
+
+def test_batch_move_counters_follow_documents_actually_moved(client, two_characters):
+    from bson import ObjectId
+
+    from app.database import get_characters_repository
+    from app.services.counters_service import apply_dimension_deltas, get_dimension_count
+
+    repo = get_characters_repository()
+    escaped = two_characters[0]
+
+    class _RacingRepository:
+        """Otra petición mueve un personaje entre la lectura de orígenes y el bulk_write."""
+
+        raced = False
+
+        def __getattr__(self, name):
+            return getattr(repo, name)
+
+        async def bulk_write(self, *args, **kwargs):
+            if not self.raced:
+                self.raced = True
+                await repo.update_one(
+                    {"_id": ObjectId(escaped["id"])}, {"$set": {"current_dimension": "J19-Zeta-7"}}
+                )
+                await apply_dimension_deltas({escaped["current_dimension"]: -1, "J19-Zeta-7": 1})
+            return await repo.bulk_write(*args, **kwargs)
+
+    with patch("app.routes.characters.get_characters_repository", return_value=_RacingRepository()):
+        r = client.post(
+            "/api/characters/move",
+            json={"ids": [c["id"] for c in two_characters], "target_dimension": "C-500"},
+        )
+    assert r.status_code == 200
+    assert r.json()["modified"] == 1
+    for dimension, expected in [("C-137", 0), ("C-131", 0), ("J19-Zeta-7", 1), ("C-500", 1)]:
+        assert client.portal.call(get_dimension_count, dimension) == expected
+
+
+def test_batch_move_by_source_dimension(client, two_characters):
+    r = client.post(
+        "/api/characters/move",
+        json={"source_dimension": "C-137", "target_dimension": "C-131"},
+    )
+    assert r.status_code == 200
+    assert r.json()["modified"] == 1
+    items = client.get("/api/characters", params={"dimension": "C-131"}).json()
+    assert len(items) == 2
+
+
+def test_batch_move_rejects_trophies_and_unknown_ids(client, two_characters):
+    steal = client.post("/api/rick-prime/steal")
+    assert steal.status_code == 200
+    trophy_id = steal.json()["character"]["id"]
+    free_id = next(c["id"] for c in two_characters if c["id"] != trophy_id)
+    missing_id = "507f1f77bcf86cd799439011"
+    r = client.post(
+        "/api/characters/move",
+        json={"ids": [free_id, trophy_id, missing_id, "bad-id"], "target_dimension": "C-500"},
+    )
+    assert r.status_code == 200
+    data = r.json()
+    assert data["matched"] == 1
+    assert data["modified"] == 1
+    assert set(data["rejected_ids"]) == {trophy_id, missing_id, "bad-id"}
+
+
+def test_batch_move_to_prime_rejected(client, two_characters):
+    r = client.post(
+        "/api/characters/move",
+        json={"source_dimension": "C-137", "target_dimension": RICK_PRIME_DIMENSION},
+    )
+    assert r.status_code == 400
+
+
+def test_batch_move_from_prime_rejected(client):
+    r = client.post(
+        "/api/characters/move",
+        json={"source_dimension": RICK_PRIME_DIMENSION, "target_dimension": "C-137"},
+    )
+    assert r.status_code == 400
+
+
+def test_batch_move_requires_exactly_one_selector(client):
+    r = client.post("/api/characters/move", json={"target_dimension": "C-137"})
+    assert r.status_code == 422
+    r2 = client.post(
+        "/api/characters/move",
+        json={
+            "ids": ["507f1f77bcf86cd799439011"],
+            "source_dimension": "C-131",
+            "target_dimension": "C-137",
+        },
+    )
+    assert r2.status_code == 422
+
+
+class _CountingRepository:
+    """Envuelve el repositorio y cuenta las operaciones enviadas al almacenamiento."""
+
+    def __init__(self, repo):
+        self._repo = repo
+        self.calls = []
+
+    def __getattr__(self, name):
+        attr = getattr(self._repo, name)
+        if callable(attr):
+            self.calls.append(name)
+        return attr
+
+
+def test_move_character_single_round_trip(client, sample_character):
+    from app.database import get_characters_repository
+
+    counting = _CountingRepository(get_characters_repository())
+    with patch("app.routes.characters.get_characters_repository", return_value=counting):
+        r = client.post(
+            f"/api/characters/{sample_character['id']}/move",
+            json={"target_dimension": "C-131"},
+        )
+    assert r.status_code == 200
+    assert counting.calls == ["find_one_and_update"]
+
+
+def test_move_stolen_character_rejected(client, sample_character):
+    steal = client.post("/api/rick-prime/steal")
+    assert steal.status_code == 200
+    r = client.post(
+        f"/api/characters/{sample_character['id']}/move",
+        json={"target_dimension": "C-137"},
+    )
+    assert r.status_code == 400
+    assert "trofeos" in r.json()["detail"]
+
+
+def test_move_to_prime_rejected(client, sample_character):
+    r = client.post(
+        f"/api/characters/{sample_character['id']}/move",
+        json={"target_dimension": RICK_PRIME_DIMENSION},
+    )
+    assert r.status_code == 400
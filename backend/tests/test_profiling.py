@@ -0,0 +1,104 @@
+"""
+Tests del perfilado por muestreo: selección de peticiones (X-Profile / fracción),
+pilas collapsed por handler y endpoints /admin/profiling.
+"""
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import profiling
+from app.profiling import Profiler, ProfilingMiddleware
+from app.routes import rick_routes
+
+
+def _busy(seconds: float) -> int:
+    total = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+def test_profiled_request_writes_collapsed_stacks(tmp_path, monkeypatch):
+    monkeypatch.setattr(rick_routes, "get_random_insult", lambda: str(_busy(0.2)))
+    app = FastAPI()
+    app.include_router(rick_routes.router)
+    profiler = Profiler(str(tmp_path), sample_rate=0.0, interval_seconds=0.001)
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+    client = TestClient(app)
+    try:
+        client.get("/api/insults/random")
+        assert profiler.profiled_requests == 0
+        client.get("/api/insults/random", headers={"X-Profile": "1"})
+    finally:
+        profiler.stop()
+
+    assert profiler.profiled_requests == 1
+    lines = (tmp_path / "rick_routes.get_random_insult_endpoint.collapsed").read_text().splitlines()
+    stacks = [line.rsplit(" ", 1) for line in lines]
+    assert stacks and all(int(count) > 0 for _, count in stacks)
+    # Cada pila empieza en el handler de la ruta e incluye lo que llama
+    assert all(stack.startswith("app.routes.rick_routes:") for stack, _ in stacks)
+    assert any(stack.endswith(":_busy") for stack, _ in stacks)
+
+
+def test_samples_only_count_the_profiled_request(tmp_path, monkeypatch):
+    # Mientras la petición perfilada espera, otra sin perfilar ocupa el bucle
+    monkeypatch.setattr(rick_routes, "get_random_insult", lambda: str(_busy(0.3)))
+    app = FastAPI()
+    app.include_router(rick_routes.router)
+    # Handler que solo espera, definido como si estuviera en app/routes
+    namespace = {"__name__": "app.routes.waiting", "asyncio": asyncio}
+    exec("async def waiting():\n    await asyncio.sleep(0.2)\n    return {}", namespace)
+    app.get("/waiting")(namespace["waiting"])
+
+    profiler = Profiler(str(tmp_path), sample_rate=0.0, interval_seconds=0.001)
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+    async def _requests() -> None:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            profiled = asyncio.create_task(http.get("/waiting", headers={"X-Profile": "1"}))
+            await asyncio.sleep(0.05)
+            await http.get("/api/insults/random")
+            await profiled
+
+    try:
+        asyncio.run(_requests())
+    finally:
+        profiler.stop()
+    assert profiler.profiled_requests == 1
+    assert "app.routes.rick_routes:get_random_insult_endpoint" not in profiler.samples()
+
+
+ADMIN = {"X-Admin-Token": "rick-prime"}
+
+
+def test_admin_profiling_disabled_by_default(client, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "rick-prime")
+    assert client.get("/admin/profiling", headers=ADMIN).status_code == 404
+    assert client.post("/admin/profiling/flush", headers=ADMIN).status_code == 404
+
+
+def test_admin_profiling_requires_admin_token(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "profiler", Profiler(str(tmp_path), sample_rate=0.0))
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert client.get("/admin/profiling", headers=ADMIN).status_code == 404
+    monkeypatch.setenv("ADMIN_TOKEN", "rick-prime")
+    assert client.get("/admin/profiling").status_code == 401
+    r = client.put("/admin/profiling", params={"sample_rate": 1}, headers={"X-Admin-Token": "morty"})
+    assert r.status_code == 401
+    assert client.get("/admin/profiling", headers=ADMIN).status_code == 200
+
+
+def test_admin_profiling_endpoints(client, tmp_path, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "rick-prime")
+    monkeypatch.setattr(profiling, "profiler", Profiler(str(tmp_path), sample_rate=0.0))
+    r = client.put("/admin/profiling", params={"sample_rate": 0.25}, headers=ADMIN)
+    assert r.status_code == 200
+    assert r.json()["sample_rate"] == 0.25
+    assert client.put("/admin/profiling", params={"sample_rate": 2}, headers=ADMIN).status_code == 422
+    assert client.post("/admin/profiling/flush", headers=ADMIN).json() == {"files": []}
@@ -0,0 +1,72 @@
+"""
+Tests de planes de consulta: las consultas calientes deben usar índices (sin COLLSCAN).
+"""
+import os
+
+import pytest
+
+from app.query_plans import find_collscans, hot_queries, winning_plan_stages
+
+# explain() solo existe en MongoDB
+requires_mongo = pytest.mark.skipif(
+    os.getenv("STORAGE_BACKEND") == "memory", reason="Requiere STORAGE_BACKEND=mongo"
+)
+
+
+def test_winning_plan_stages_classic():
+    explain = {
+        "queryPlanner": {
+            "winningPlan": {
+                "stage": "LIMIT",
+                "inputStage": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}},
+            },
+            "rejectedPlans": [{"stage": "COLLSCAN"}],
+        }
+    }
+    assert winning_plan_stages(explain) == ["LIMIT", "FETCH", "IXSCAN"]
+
+
+def test_winning_plan_stages_aggregate_cursor():
+    explain = {
+        "stages": [
+            {"$cursor": {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}},
+            {"$sample": {"size": 1}},
+        ]
+    }
+    assert winning_plan_stages(explain) == ["COLLSCAN"]
+
+
+def test_winning_plan_stages_sbe():
+    explain = {
+        "queryPlanner": {
+            "winningPlan": {
+                "queryPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}},
+                "slotBasedPlan": {"slots": "..."},
+            }
+        }
+    }
+    assert winning_plan_stages(explain) == ["FETCH", "IXSCAN"]
+
+
+def test_hot_queries_cover_routes():
+    names = set(hot_queries())
+    assert {
+        "list_characters",
+        "list_characters_by_dimension",
+        "select_random_character",
+        "list_stones",
+    } <= names
+
+
+@requires_mongo
+def test_hot_queries_use_indexes(client):
+    collscans = client.portal.call(find_collscans)
+    assert collscans == []
+
+
+@requires_mongo
+def test_ensure_indexes_skips_existing(client):
+    from app.database import ensure_indexes
+
+    # El arranque ya los creó: un segundo ensure_indexes no envía create_index
+    assert client.portal.call(ensure_indexes) == 0
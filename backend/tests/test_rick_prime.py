@@ -3,7 +3,22 @@ Tests del robo de personajes por Rick Prime.
 El robo mueve el personaje a RICK_PRIME_DIMENSION y deja una piedra en su lugar.
 """
 
-from app.services.rick_prime_service import RICK_PRIME_DIMENSION
+from collections import Counter
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+
+from app.database import RANDOM_KEY_FIELD, get_characters_repository, get_stones_repository
+from app.services.rick_prime_service import (
+    RICK_PRIME_DIMENSION,
+    detect_legacy_stones,
+    ensure_random_keys,
+    reconcile_orphan_stones,
+    select_random_character,
+    select_random_characters,
+)
 
 
 def test_rick_prime_steal_empty(client):
@@ -59,3 +74,335 @@ def test_rick_prime_steal_twice_second_404(client, sample_character):
     assert r1.status_code == 200
     r2 = client.post("/api/rick-prime/steal")
     assert r2.status_code == 404
+
+
+def test_rick_prime_raid_steals_many(client, two_characters):
+    r = client.post("/api/rick-prime/steal", params={"count": 5})
+    assert r.status_code == 200
+    stolen = r.json()["stolen"]
+    assert len(stolen) == 2
+    assert {s["character"]["id"] for s in stolen} == {c["id"] for c in two_characters}
+    for item in stolen:
+        assert item["character"]["current_dimension"] == RICK_PRIME_DIMENSION
+        assert item["character"]["stolen_by_rick_prime"] is True
+        assert item["stone"]["previous_character_id"] == item["character"]["id"]
+    stones = client.get("/api/stones").json()
+    assert len(stones) == 2
+    assert {s["dimension"] for s in stones} == {"C-137", "C-131"}
+
+
+def test_rick_prime_raid_partial_count(client, two_characters):
+    r = client.post("/api/rick-prime/steal", params={"count": 1})
+    assert r.status_code == 200
+    assert len(r.json()["stolen"]) == 1
+    assert len(client.get("/api/stones").json()) == 1
+
+
+def test_rick_prime_raid_empty(client):
+    r = client.post("/api/rick-prime/steal", params={"count": 3})
+    assert r.status_code == 404
+
+
+def test_rick_prime_raid_invalid_count(client):
+    r = client.post("/api/rick-prime/steal", params={"count": 0})
+    assert r.status_code == 422
+
+
+def test_rick_prime_raid_ignores_victims_stolen_concurrently(client, two_characters):
+    from app.services import rick_prime_service
+    from app.services.counters_service import get_dimension_count
+
+    victims = [
+        client.portal.call(get_characters_repository().find_one, {"_id": ObjectId(c["id"])})
+        for c in two_characters
+    ]
+
+    async def _raid(selected: list[dict]) -> list:
+        async def _select(count, refresh_keys=True):
+            return selected
+
+        with patch.object(rick_prime_service, "select_random_characters", _select):
+            return await rick_prime_service.steal_characters(len(selected))
+
+    # Otra petición roba a la primera víctima entre el muestreo y la escritura de la incursión
+    assert len(client.portal.call(_raid, victims[:1])) == 1
+    raided = client.portal.call(_raid, victims)
+    assert [str(character["_id"]) for character, _ in raided] == [two_characters[1]["id"]]
+    stones = client.get("/api/stones").json()
+    assert sorted(s["previous_character_id"] for s in stones) == sorted(c["id"] for c in two_characters)
+    assert client.portal.call(get_dimension_count, "C-137") == 0
+    assert client.portal.call(get_dimension_count, RICK_PRIME_DIMENSION) == 2
+
+
+def test_rick_prime_steal_skips_victim_moved_concurrently(client, two_characters):
+    from app.services import rick_prime_service
+
+    moved, other = two_characters
+    stale, fresh = [
+        client.portal.call(get_characters_repository().find_one, {"_id": ObjectId(c["id"])})
+        for c in two_characters
+    ]
+    client.post(f"/api/characters/{moved['id']}/move", json={"target_dimension": "J19-Zeta-7"})
+    picks = [fresh, stale]
+
+    async def _select(refresh_keys=True):
+        return picks.pop()
+
+    # La primera víctima ya no está en la dimensión leída: escapa y se roba a otra
+    with patch.object(rick_prime_service, "select_random_character", _select):
+        r = client.post("/api/rick-prime/steal")
+    assert r.status_code == 200
+    assert r.json()["character"]["id"] == other["id"]
+    stones = client.get("/api/stones").json()
+    assert [(s["previous_character_id"], s["dimension"]) for s in stones] == [(other["id"], "C-131")]
+    character = client.get(f"/api/characters/{moved['id']}").json()
+    assert character["current_dimension"] == "J19-Zeta-7"
+
+
+def test_rick_prime_steal_conflict_when_every_victim_escapes(client, two_characters):
+    from app.services import rick_prime_service
+
+    stale = [
+        client.portal.call(get_characters_repository().find_one, {"_id": ObjectId(c["id"])})
+        for c in two_characters
+    ]
+    for c in two_characters:
+        client.post(f"/api/characters/{c['id']}/move", json={"target_dimension": "J19-Zeta-7"})
+
+    async def _select(refresh_keys=True):
+        return stale[0]
+
+    async def _select_many(count, refresh_keys=True):
+        return stale
+
+    # Hay personajes robables, pero todas las víctimas leídas se movieron: no es un 404
+    with patch.object(rick_prime_service, "select_random_character", _select):
+        r = client.post("/api/rick-prime/steal")
+    assert r.status_code == 409
+    with patch.object(rick_prime_service, "select_random_characters", _select_many):
+        r = client.post("/api/rick-prime/steal", params={"count": 2})
+    assert r.status_code == 409
+    assert client.get("/api/stones").json() == []
+
+
+class _FailingUpdateRepository:
+    """Repositorio cuyo find_one_and_update falla, para simular un robo interrumpido."""
+
+    def __init__(self, repo):
+        self._repo = repo
+
+    def __getattr__(self, name):
+        return getattr(self._repo, name)
+
+    async def find_one_and_update(self, *args, **kwargs):
+        raise PyMongoError("fallo simulado")
+
+
+def test_rick_prime_steal_failure_leaves_no_stone(client, sample_character):
+    failing = _FailingUpdateRepository(get_characters_repository())
+    with patch("app.services.rick_prime_service.get_characters_repository", return_value=failing):
+        r = client.post("/api/rick-prime/steal")
+    assert r.status_code == 500
+    assert client.get("/api/stones").json() == []
+    chars = client.get("/api/characters").json()
+    assert chars[0]["current_dimension"] == sample_character["current_dimension"]
+
+
+class _PartialBulkWriteRepository(_FailingUpdateRepository):
+    """Repositorio cuyo bulk_write aplica solo la primera operación y falla, sin transacción."""
+
+    async def bulk_write(self, ops, **kwargs):
+        await self._repo.bulk_write(ops[:1], **kwargs)
+        raise PyMongoError("fallo simulado")
+
+
+def test_rick_prime_raid_failure_leaves_no_orphan_stones(client, two_characters):
+    failing = _PartialBulkWriteRepository(get_characters_repository())
+    with patch("app.services.rick_prime_service.get_characters_repository", return_value=failing):
+        r = client.post("/api/rick-prime/steal", params={"count": 2})
+    assert r.status_code == 500
+    # Solo conserva su piedra la víctima que llegó a la bóveda antes del fallo
+    chars = client.get("/api/characters").json()
+    in_vault = [c["id"] for c in chars if c["current_dimension"] == RICK_PRIME_DIMENSION]
+    assert len(in_vault) == 1
+    stones = client.get("/api/stones").json()
+    assert [s["previous_character_id"] for s in stones] == in_vault
+
+
+def test_reconcile_orphan_stones(client, two_characters):
+    steal = client.post("/api/rick-prime/steal")
+    assert steal.status_code == 200
+    stolen_id = steal.json()["character"]["id"]
+    free_id = next(c["id"] for c in two_characters if c["id"] != stolen_id)
+    orphan = {
+        "_id": ObjectId(),
+        "type": "dimensional_stone",
+        "previous_character_id": free_id,
+        "dimension": "C-137",
+        "created_at": datetime.utcnow() - timedelta(hours=1),
+    }
+    client.portal.call(get_stones_repository().insert_one, orphan)
+    assert len(client.get("/api/stones").json()) == 2
+
+    removed = client.portal.call(reconcile_orphan_stones, 0)
+    assert removed == 1
+    stones = client.get("/api/stones").json()
+    assert [s["previous_character_id"] for s in stones] == [stolen_id]
+
+
+def test_reconcile_orphan_stones_respects_grace_period(client, sample_character):
+    recent = {
+        "_id": ObjectId(),
+        "type": "dimensional_stone",
+        "previous_character_id": sample_character["id"],
+        "dimension": "C-137",
+        "created_at": datetime.utcnow(),
+    }
+    client.portal.call(get_stones_repository().insert_one, recent)
+    assert client.portal.call(reconcile_orphan_stones, 60) == 0
+    assert len(client.get("/api/stones").json()) == 1
+
+
+def test_legacy_stones_compat_and_migration(client, sample_character):
+    from scripts.migrate_stones_collection import migrate_stones
+
+    legacy = {
+        "_id": ObjectId(),
+        "type": "dimensional_stone",
+        "previous_character_id": sample_character["id"],
+        "dimension": "C-131",
+        "created_at": datetime.utcnow(),
+    }
+    client.portal.call(get_characters_repository().insert_one, legacy)
+    try:
+        assert client.portal.call(detect_legacy_stones) is True
+        chars = client.get("/api/characters").json()
+        assert [c["id"] for c in chars] == [sample_character["id"]]
+        stones = client.get("/api/stones").json()
+        assert [s["id"] for s in stones] == [str(legacy["_id"])]
+
+        assert client.portal.call(migrate_stones, 10) == 1
+        assert client.portal.call(migrate_stones, 10) == 0
+        assert client.portal.call(detect_legacy_stones) is False
+        stones = client.get("/api/stones").json()
+        assert [s["id"] for s in stones] == [str(legacy["_id"])]
+    finally:
+        client.portal.call(get_characters_repository().delete_many, {"type": "dimensional_stone"})
+        client.portal.call(detect_legacy_stones)
+
+
+def _random_key(client, character_id: str):
+    doc = client.portal.call(
+        get_characters_repository().find_one, {"_id": ObjectId(character_id)}, {RANDOM_KEY_FIELD: 1}
+    )
+    return doc.get(RANDOM_KEY_FIELD)
+
+
+def test_random_key_follows_robbable_state(client, sample_character):
+    key = _random_key(client, sample_character["id"])
+    assert 0 <= key < 1
+    assert client.post("/api/rick-prime/steal").status_code == 200
+    # Los trofeos no tienen clave: no pueden volver a ser elegidos
+    assert _random_key(client, sample_character["id"]) is None
+    client.put(f"/api/characters/{sample_character['id']}", json={"current_dimension": "C-131"})
+    assert _random_key(client, sample_character["id"]) is not None
+
+
+def test_random_selection_is_uniform_with_fixed_keys(client):
+    ids = []
+    for i in range(21):
+        r = client.post(
+            "/api/characters",
+            json={
+                "name": f"Morty {i}",
+                "status": "alive",
+                "species": "Human",
+                "origin_dimension": "C-137",
+                "current_dimension": RICK_PRIME_DIMENSION if i == 0 else "C-137",
+            },
+        )
+        ids.append(r.json()["id"])
+    candidates = ids[1:]
+
+    async def _pick_counts(picks: int) -> Counter:
+        # Claves fijas muy sesgadas: sin renovarlas al elegir, los últimos acapararían casi todo
+        repo = get_characters_repository()
+        for i, character_id in enumerate(candidates):
+            key = (i / len(candidates)) ** 4
+            await repo.update_one({"_id": ObjectId(character_id)}, {"$set": {RANDOM_KEY_FIELD: key}})
+        counts: Counter = Counter()
+        for _ in range(picks):
+            doc = await select_random_character()
+            counts[str(doc["_id"])] += 1
+        return counts
+
+    counts = client.portal.call(_pick_counts, 4000)
+    assert set(counts) == set(candidates)
+    # 200 esperadas por personaje
+    assert all(120 <= n <= 280 for n in counts.values()), counts
+
+    async def _raid_sets(raids: int) -> set[frozenset]:
+        sets = set()
+        for _ in range(raids):
+            docs = await select_random_characters(5)
+            assert len({doc["_id"] for doc in docs}) == 5
+            sets.add(frozenset(str(doc["_id"]) for doc in docs))
+        return sets
+
+    # C(20, 5) = 15504 conjuntos posibles: 300 incursiones apenas deberían repetir
+    assert len(client.portal.call(_raid_sets, 300)) > 280
+
+    # Una incursión mayor que los candidatos los devuelve todos sin repetir
+    docs = client.portal.call(select_random_characters, 30)
+    assert sorted(str(d["_id"]) for d in docs) == sorted(candidates)
+
+
+def test_repeated_steals_stay_uniform(client):
+    ids = []
+    for i in range(10):
+        r = client.post(
+            "/api/characters",
+            json={
+                "name": f"Morty {i}",
+                "status": "alive",
+                "species": "Human",
+                "origin_dimension": "C-137",
+                "current_dimension": "C-137",
+            },
+        )
+        ids.append(r.json()["id"])
+
+    async def _keys() -> dict[str, float]:
+        docs = await get_characters_repository().find({}, {RANDOM_KEY_FIELD: 1}).to_list()
+        return {str(d["_id"]): d[RANDOM_KEY_FIELD] for d in docs if RANDOM_KEY_FIELD in d}
+
+    counts: Counter = Counter()
+    successor_hits = 0
+    successor = None
+    steals = 1500
+    for _ in range(steals):
+        keys = client.portal.call(_keys)
+        victim = client.post("/api/rick-prime/steal").json()["character"]["id"]
+        counts[victim] += 1
+        successor_hits += victim == successor
+        # Sucesor en el índice de la víctima: el que heredaría su hueco si la clave desapareciera
+        later = sorted((k, i) for i, k in keys.items() if k > keys[victim])
+        successor = (later or sorted((k, i) for i, k in keys.items()))[0][1]
+        # La víctima vuelve para que el conjunto de candidatos no cambie
+        client.put(f"/api/characters/{victim}", json={"current_dimension": "C-137"})
+
+    assert set(counts) == set(ids)
+    # 150 robos esperados por personaje
+    assert all(90 <= n <= 210 for n in counts.values()), counts
+    # Uniforme: el sucesor de la víctima anterior sale un 10% de las veces
+    assert successor_hits / steals < 0.15, successor_hits / steals
+
+
+def test_ensure_random_keys_backfills_old_characters(client, two_characters):
+    oid = ObjectId(two_characters[0]["id"])
+    client.portal.call(
+        get_characters_repository().update_one, {"_id": oid}, {"$unset": {RANDOM_KEY_FIELD: ""}}
+    )
+    assert client.portal.call(ensure_random_keys) == 1
+    assert client.portal.call(ensure_random_keys) == 0
+    assert _random_key(client, two_characters[0]["id"]) is not None
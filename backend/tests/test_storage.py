@@ -0,0 +1,173 @@
+"""
+Tests del motor de almacenamiento en memoria (app/storage/memory.py): semántica de
+filtros y actualizaciones de MongoDB, índices secundarios, muestreo y escrituras en lote.
+"""
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from app.storage.base import DeleteManyOp, UpdateManyOp, UpdateOp
+from app.storage.memory import MemoryRepository
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def _repo_with(docs: list[dict]) -> MemoryRepository:
+    repo = MemoryRepository("characters")
+    _run(repo.insert_many(docs))
+    return repo
+
+
+def _names(repo: MemoryRepository, filter: dict, **kwargs) -> list[str]:
+    return [doc["name"] for doc in _run(repo.find(filter, {"name": 1}, **kwargs).to_list())]
+
+
+def test_filters_follow_mongo_semantics():
+    repo = _repo_with(
+        [
+            {"name": "Rick", "current_dimension": "C-137", "type": "character", "age": 70},
+            {"name": "Morty", "current_dimension": "C-137", "age": 14},
+            {"name": "Summer", "current_dimension": "C-131", "type": "character", "age": 17},
+            {"name": "Stone", "type": "dimensional_stone", "dimension": "C-137"},
+        ]
+    )
+    # $ne incluye los documentos sin el campo; la igualdad con None, los que no lo tienen
+    assert sorted(_names(repo, {"type": {"$ne": "dimensional_stone"}})) == ["Morty", "Rick", "Summer"]
+    assert sorted(_names(repo, {"type": None})) == ["Morty"]
+    assert sorted(_names(repo, {"current_dimension": {"$in": ["C-131", None]}})) == ["Stone", "Summer"]
+    assert sorted(_names(repo, {"current_dimension": {"$exists": False}})) == ["Stone"]
+    # Las comparaciones no cruzan tipos y un campo ausente no cumple
+    assert sorted(_names(repo, {"age": {"$gte": 17}})) == ["Rick", "Summer"]
+    assert _names(repo, {"age": {"$lt": "z"}}) == []
+    assert sorted(
+        _names(repo, {"$or": [{"name": "Rick"}, {"current_dimension": "C-131"}], "age": {"$gt": 16}})
+    ) == ["Rick", "Summer"]
+
+
+def test_sort_limit_and_projection():
+    ids = [ObjectId() for _ in range(4)]
+    repo = _repo_with(
+        [
+            {"_id": ids[0], "name": "b", "current_dimension": "C-137"},
+            {"_id": ids[1], "name": "a", "current_dimension": "C-137"},
+            {"_id": ids[2], "name": "b", "current_dimension": "C-131"},
+            {"_id": ids[3], "current_dimension": "C-131"},
+        ]
+    )
+    # null ordena antes que las cadenas; el _id desempata
+    docs = _run(repo.find({}, sort=[("name", 1), ("_id", 1)], limit=3).to_list())
+    assert [d["_id"] for d in docs] == [ids[3], ids[1], ids[0]]
+    docs = _run(repo.find({}, sort=[("name", -1), ("_id", 1)]).to_list())
+    assert [d["_id"] for d in docs] == [ids[0], ids[2], ids[1], ids[3]]
+    assert _run(repo.find_one({"_id": ids[1]}, {"name": 1, "_id": 0})) == {"name": "a"}
+    assert _run(repo.find_one({"_id": ids[1]}, {"current_dimension": 0})) == {"_id": ids[1], "name": "a"}
+
+
+def test_updates_keep_secondary_indexes_consistent():
+    repo = _repo_with([{"name": f"c{i}", "current_dimension": "C-137"} for i in range(3)])
+    before = _run(
+        repo.find_one_and_update(
+            {"name": "c0"}, {"$set": {"current_dimension": "C-131"}}, projection={"current_dimension": 1}
+        )
+    )
+    assert before["current_dimension"] == "C-137"
+    assert sorted(_names(repo, {"current_dimension": "C-137"})) == ["c1", "c2"]
+    assert _names(repo, {"current_dimension": "C-131"}) == ["c0"]
+
+    result = _run(repo.update_many({"current_dimension": "C-137"}, {"$set": {"current_dimension": "C-131"}}))
+    assert (result.matched_count, result.modified_count) == (2, 2)
+    # Mismo valor: coincide pero no modifica
+    assert _run(repo.update_one({"name": "c1"}, {"$set": {"current_dimension": "C-131"}})).modified_count == 0
+    assert _names(repo, {"current_dimension": "C-137"}) == []
+
+    deleted = _run(repo.find_one_and_delete({"name": "c2"}))
+    assert deleted["name"] == "c2"
+    assert sorted(_names(repo, {"current_dimension": "C-131"})) == ["c0", "c1"]
+    assert len(repo) == 2
+
+
+def test_upserts_and_bulk_write():
+    repo = MemoryRepository("dimension_counters")
+    result = _run(
+        repo.bulk_write(
+            [
+                UpdateOp({"_id": "C-137"}, {"$inc": {"characters": 2}}, upsert=True),
+                UpdateOp({"_id": "C-131"}, {"$inc": {"characters": 1}}, upsert=True),
+                UpdateOp({"_id": "C-137"}, {"$inc": {"characters": -1}}, upsert=True),
+            ]
+        )
+    )
+    assert (result.upserted_count, result.modified_count) == (2, 1)
+    assert _run(repo.find_one({"_id": "C-137"})) == {"_id": "C-137", "characters": 1}
+
+    result = _run(repo.bulk_write([DeleteManyOp({"_id": {"$nin": ["C-137"]}})]))
+    assert result.deleted_count == 1
+
+    after = _run(
+        repo.find_one_and_update(
+            {"_id": "C-137"}, {"$inc": {"characters": 5}}, return_document=ReturnDocument.AFTER
+        )
+    )
+    assert after["characters"] == 6
+
+    _run(repo.insert_many([{"_id": "C-131", "characters": 0}, {"_id": "C-500", "characters": 9}]))
+    result = _run(repo.bulk_write([UpdateManyOp({"characters": {"$lt": 9}}, {"$inc": {"characters": 1}})]))
+    assert (result.matched_count, result.modified_count) == (2, 2)
+    assert _run(repo.find_one({"_id": "C-137"}))["characters"] == 7
+
+
+def test_duplicate_ids_and_stored_values():
+    oid = ObjectId()
+    repo = _repo_with([{"_id": oid, "name": "Rick", "created_at": datetime(2024, 1, 1, 12, 0, 0, 123456)}])
+    with pytest.raises(DuplicateKeyError):
+        _run(repo.insert_one({"_id": oid}))
+    with pytest.raises(BulkWriteError) as e:
+        _run(repo.insert_many([{"name": "a"}, {"_id": oid}, {"name": "b"}], ordered=False))
+    assert e.value.details["nInserted"] == 2
+    assert [err["index"] for err in e.value.details["writeErrors"]] == [1]
+
+    # Precisión de milisegundos como en BSON; lo devuelto es una copia
+    doc = _run(repo.find_one({"_id": oid}))
+    assert doc["created_at"].microsecond == 123000
+    doc["name"] = "Evil Rick"
+    assert _run(repo.find_one({"_id": oid}))["name"] == "Rick"
+
+
+def test_sample_is_distinct_and_respects_filter():
+    docs = [{"name": f"c{i}", "current_dimension": "C-137"} for i in range(20)]
+    docs += [{"name": f"p{i}", "current_dimension": "RICK_PRIME_DIMENSION"} for i in range(20)]
+    docs.append({"name": "stone", "type": "dimensional_stone"})
+    repo = _repo_with(docs)
+    robbable = {"type": {"$ne": "dimensional_stone"}, "current_dimension": {"$ne": "RICK_PRIME_DIMENSION"}}
+
+    seen = set()
+    for _ in range(400):
+        picked = _run(repo.sample(robbable, 1))
+        assert len(picked) == 1 and picked[0]["name"].startswith("c")
+        seen.add(picked[0]["name"])
+    assert len(seen) == 20
+
+    many = _run(repo.sample(robbable, 50, {"name": 1}))
+    assert len(many) == 20 and len({d["name"] for d in many}) == 20
+    assert _run(repo.sample({"current_dimension": "nowhere"}, 3)) == []
+
+
+def test_range_index_scan():
+    repo = MemoryRepository("characters", range_fields=("random_key",))
+    _run(repo.insert_many([{"name": f"c{i}", "random_key": i / 10} for i in range(10)]))
+    _run(repo.insert_one({"name": "sin clave"}))
+    query = {"random_key": {"$gte": 0.45}}
+    assert _names(repo, query, sort=[("random_key", 1)], limit=2) == ["c5", "c6"]
+    assert _names(repo, {"random_key": {"$lt": 0.25}}, sort=[("random_key", 1)], limit=5) == ["c0", "c1", "c2"]
+
+    # Las actualizaciones mueven la entrada del índice; sin clave sale de él
+    _run(repo.update_one({"name": "c5"}, {"$set": {"random_key": 0.95}}))
+    _run(repo.update_one({"name": "c6"}, {"$unset": {"random_key": ""}}))
+    _run(repo.delete_one({"name": "c7"}))
+    assert _names(repo, query, sort=[("random_key", 1)], limit=3) == ["c8", "c9", "c5"]
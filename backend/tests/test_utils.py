@@ -1,11 +1,23 @@
 """
-Tests de utilidades (doc_to_character_response).
+Tests de utilidades (doc_to_character_response, serialización rápida, cursores de paginación).
 """
+import json
 from datetime import datetime
 
 import pytest
+from bson import ObjectId
+from pydantic import TypeAdapter
 
-from app.utils import doc_to_character_response
+from app.schemas import CharacterResponse, StoneResponse
+from app.utils import (
+    characters_to_json,
+    decode_cursor,
+    doc_to_character_response,
+    doc_to_stone_response,
+    encode_cursor,
+    parse_character_fields,
+    stones_to_json,
+)
 
 
 def test_doc_to_character_response_none():
@@ -37,3 +49,67 @@ def test_doc_to_character_response_valid():
     assert r.id == str(doc["_id"])
     assert r.name == doc["name"]
     assert r.current_dimension == doc["current_dimension"]
+
+
+def test_cursor_roundtrip():
+    oid = ObjectId()
+    cursor = encode_cursor("Señor Poopybutthole", oid)
+    assert decode_cursor(cursor) == ("Señor Poopybutthole", oid)
+
+
+@pytest.mark.parametrize("bad", ["", "not-a-cursor", encode_cursor("x", ObjectId())[:-3]])
+def test_decode_cursor_invalid(bad):
+    with pytest.raises(ValueError, match="Cursor inválido"):
+        decode_cursor(bad)
+
+
+def _character_doc(**overrides):
+    doc = {
+        "_id": ObjectId(),
+        "name": "Rick",
+        "status": "alive",
+        "species": "Human",
+        "origin_dimension": "C-137",
+        "current_dimension": "C-137",
+        "image_url": "https://example.com/rick.png",
+        "captured_at": datetime(2024, 5, 1, 12, 30, 15, 123000),
+    }
+    doc.update(overrides)
+    return doc
+
+
+def test_characters_to_json_matches_pydantic_serialization():
+    docs = [
+        _character_doc(),
+        _character_doc(
+            name="Señor Morty",
+            image_url=None,
+            captured_at=datetime(2024, 5, 1),
+            stolen_by_rick_prime=True,
+            original_dimension="C-131",
+        ),
+    ]
+    expected = TypeAdapter(list[CharacterResponse]).dump_json(
+        [doc_to_character_response(d) for d in docs]
+    )
+    assert json.loads(characters_to_json(docs)) == json.loads(expected)
+
+
+def test_stones_to_json_matches_pydantic_serialization():
+    docs = [{"_id": ObjectId(), "type": "dimensional_stone", "dimension": "C-137", "previous_character_id": "abc"}]
+    expected = TypeAdapter(list[StoneResponse]).dump_json([doc_to_stone_response(d) for d in docs])
+    assert json.loads(stones_to_json(docs)) == json.loads(expected)
+
+
+def test_parse_character_fields():
+    assert parse_character_fields(None) is None
+    assert parse_character_fields(" ") is None
+    assert parse_character_fields("status, name") == ("name", "status", "id")
+    with pytest.raises(ValueError, match="Campos desconocidos"):
+        parse_character_fields("name,_id")
+
+
+def test_characters_to_json_selected_fields():
+    doc = {"_id": ObjectId(), "name": "Rick", "current_dimension": "C-137"}
+    data = json.loads(characters_to_json([doc], ("name", "current_dimension", "id")))
+    assert data == [{"name": "Rick", "current_dimension": "C-137", "id": str(doc["_id"])}]
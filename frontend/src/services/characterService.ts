@@ -22,13 +22,47 @@ export interface CharacterUpdatePayload {
   captured_at?: string
 }
 
+/** Cabecera con el cursor de la siguiente página de GET /characters */
+const NEXT_CURSOR_HEADER = 'x-next-cursor'
+
+/** Páginas que getCharacters sigue como máximo (1000 personajes por página) */
+export const MAX_CHARACTER_PAGES = 10
+
+export interface CharacterPage {
+  items: Character[]
+  /** Cursor a pasar en `after` para la siguiente página; null si no hay más */
+  nextCursor: string | null
+}
+
+/** Una página de GET /characters: el llamador decide si pide la siguiente. */
+export async function getCharactersPage(
+  dimension?: string,
+  after?: string
+): Promise<CharacterPage> {
+  const { data, headers } = await api.get<Character[]>('/characters', {
+    params: { ...(dimension ? { dimension } : {}), ...(after ? { after } : {}) },
+  })
+  return { items: data, nextCursor: headers?.[NEXT_CURSOR_HEADER] || null }
+}
+
+/**
+ * Personajes de las primeras `maxPages` páginas. Si quedan más se detiene y lo
+ * avisa en consola; para recorrer el resto usar getCharactersPage con el cursor.
+ */
 export async function getCharacters(
-  dimension?: string
+  dimension?: string,
+  maxPages: number = MAX_CHARACTER_PAGES
 ): Promise<Character[]> {
-  const { data } = await api.get<Character[]>('/characters', {
-    params: dimension ? { dimension } : undefined,
-  })
-  return data
+  const all: Character[] = []
+  let after: string | undefined
+  for (let page = 0; page < maxPages; page++) {
+    const { items, nextCursor } = await getCharactersPage(dimension, after)
+    all.push(...items)
+    if (!nextCursor) return all
+    after = nextCursor
+  }
+  console.warn(`getCharacters: se alcanzó el límite de ${maxPages} páginas; hay más personajes`)
+  return all
 }
 
 export async function getStones(): Promise<DimensionalStone[]> {
@@ -10,9 +10,12 @@ export {
   createCharacter,
   deleteCharacter,
   getCharacters,
+  getCharactersPage,
+  MAX_CHARACTER_PAGES,
   moveCharacter,
   updateCharacter,
   type CharacterCreatePayload,
+  type CharacterPage,
   type CharacterUpdatePayload,
 } from './characterService'
 export { getRandomInsult, type InsultResponse } from './insultService'
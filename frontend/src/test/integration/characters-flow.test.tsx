@@ -2,6 +2,7 @@ import { describe, it, expect, vi, beforeEach } from 'vitest'
 import { render, screen, waitFor } from '@testing-library/react'
 import { BrowserRouter } from 'react-router-dom'
 import { Characters } from '../../pages/Characters'
+import { api } from '../../services/api'
 import * as characterService from '../../services/characterService'
 import type { Character } from '../../types/character'
 
@@ -78,3 +79,37 @@ describe('Flujo Characters - API mockeada', () => {
     })
   })
 })
+
+describe('getCharacters - paginación por cursor', () => {
+  beforeEach(() => {
+    vi.restoreAllMocks()
+  })
+
+  it('se detiene en el límite de páginas aunque el servidor siga devolviendo cursor', async () => {
+    const get = vi.spyOn(api, 'get').mockImplementation(async () => ({
+      data: [mockCharacters[0]],
+      headers: { 'x-next-cursor': 'siguiente' },
+    }))
+    vi.spyOn(console, 'warn').mockImplementation(() => {})
+
+    const characters = await characterService.getCharacters(undefined, 3)
+
+    expect(get).toHaveBeenCalledTimes(3)
+    expect(characters).toHaveLength(3)
+  })
+
+  it('getCharactersPage expone el cursor al llamador', async () => {
+    const get = vi
+      .spyOn(api, 'get')
+      .mockResolvedValueOnce({ data: mockCharacters, headers: { 'x-next-cursor': 'c1' } })
+      .mockResolvedValueOnce({ data: [], headers: {} })
+
+    const first = await characterService.getCharactersPage('C-137')
+    expect(first).toEqual({ items: mockCharacters, nextCursor: 'c1' })
+    const second = await characterService.getCharactersPage('C-137', first.nextCursor!)
+    expect(second.nextCursor).toBeNull()
+    expect(get).toHaveBeenLastCalledWith('/characters', {
+      params: { dimension: 'C-137', after: 'c1' },
+    })
+  })
+})